@@ -0,0 +1,45 @@
+import fnmatch
+
+from redis_memory import RedisHandler
+
+
+class InMemoryRedis:
+    """
+    Stand-in for the few Redis commands used by the forecasting models (model
+    parameters and residuals), so that benchmarks need no server. Values are
+    stored as bytes, as redis-py returns them.
+    """
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, **kwargs):
+        self.store[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, *keys):
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    def exists(self, *keys):
+        return sum(key in self.store for key in keys)
+
+    def keys(self, pattern="*"):
+        return [key for key in self.store if fnmatch.fnmatchcase(key, pattern)]
+
+    def flushdb(self):
+        self.store.clear()
+
+
+def use_in_memory_redis() -> InMemoryRedis:
+    """
+    Make `RedisHandler.shared()` return a handler backed by an InMemoryRedis.
+
+    :return: The stand-in, to clear it between benchmarks.
+    """
+    handler = RedisHandler.__new__(RedisHandler)
+    handler.r_db = InMemoryRedis()
+    RedisHandler._shared = handler
+    return handler.r_db
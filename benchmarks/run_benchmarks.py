@@ -0,0 +1,281 @@
+"""
+Offline benchmarks of the training and forecasting kernels.
+
+Each benchmark runs on seeded synthetic series (see synthetic.py) of several
+kinds, lengths and frequencies, with Redis replaced by an in-memory stand-in,
+so no database, broker or server is needed. Timings are written as JSON, to be
+kept as a baseline and compared with the runs of later commits:
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Comparing exits with status 1 when a benchmark got slower than the threshold.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Final
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+ROOT: Final[Path] = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "smartforecasting"))
+
+import statsmodels  # noqa: E402
+
+from constants import FORECAST_QUANTILES  # noqa: E402
+from forecasting.auto_regression import AutoRegression  # noqa: E402
+from forecasting.correlation import find_best_lag_pacf  # noqa: E402
+from forecasting.models import ForecastContext  # noqa: E402
+from forecasting.utility import auto_stationary  # noqa: E402
+from forecasting.utility import get_seasonal_periods  # noqa: E402
+from forecasting.utility import regularize_series  # noqa: E402
+from logging_config import logger  # noqa: E402
+from memory_redis import use_in_memory_redis  # noqa: E402
+from structs.enums import ForecastModel  # noqa: E402
+from synthetic import generate_series  # noqa: E402
+from synthetic import SERIES_KINDS  # noqa: E402
+
+RESULTS_DIR: Final[Path] = ROOT / "benchmarks" / "results"
+DEFAULT_LENGTHS: Final[tuple] = (200, 1000, 5000)
+DEFAULT_FREQUENCIES: Final[tuple] = ("1D", "1H")
+DEFAULT_REPEAT: Final[int] = 5
+DEFAULT_THRESHOLD: Final[float] = 0.2  # relative slowdown reported as regression
+FORECAST_STEPS: Final[int] = 30
+BENCHMARK_DATASOURCE_ID: Final[int] = 0
+# Fields identifying the same measurement across runs
+RESULT_KEY: Final[tuple] = ("benchmark", "kind", "length", "frequency")
+
+MEMORY_REDIS = use_in_memory_redis()
+
+
+def prepare(series: pd.DataFrame, frequency: str) -> Callable:
+    return lambda: regularize_series(series, frequency)
+
+
+def stationarity(series: pd.DataFrame, frequency: str) -> Callable:
+    values = regularize_series(series, frequency)["value"]
+    return lambda: auto_stationary(values)
+
+
+def lag_search(series: pd.DataFrame, frequency: str) -> Callable:
+    values = regularize_series(series, frequency)["value"]
+    return lambda: find_best_lag_pacf(values, AutoRegression.MAX_LAGS)
+
+
+def seasonality(series: pd.DataFrame, frequency: str) -> Callable:
+    values = regularize_series(series, frequency)["value"]
+    return lambda: get_seasonal_periods(frequency, values)
+
+
+def train(algorithm: ForecastModel) -> Callable:
+    def benchmark(series: pd.DataFrame, frequency: str) -> Callable:
+        def run():
+            # Cold fits only: a stored model would warm start the next one
+            MEMORY_REDIS.flushdb()
+            context = ForecastContext(algorithm, BENCHMARK_DATASOURCE_ID)
+            context.train(series.copy(), frequency)
+
+        return run
+
+    return benchmark
+
+
+def forecast(algorithm: ForecastModel) -> Callable:
+    def benchmark(series: pd.DataFrame, frequency: str) -> Callable:
+        MEMORY_REDIS.flushdb()
+        context = ForecastContext(algorithm, BENCHMARK_DATASOURCE_ID)
+        context.train(series.copy(), frequency)
+
+        # Same inputs as the forecasting route: the lags the model needs
+        lags = context.model.get_nb_lags_needed()
+        data = series.tail(lags).reset_index(drop=True)
+        date = series["ts"].iloc[-1]
+
+        def run():
+            result = context.forecast(
+                data.copy(), date, FORECAST_STEPS, frequency, FORECAST_QUANTILES
+            )
+            # Timing a model that cannot forecast would record a no-op
+            assert result is not None, f"{algorithm.value} did not forecast"
+            return result
+
+        return run
+
+    return benchmark
+
+
+# Trained models, by the prefix of their benchmark names
+MODELS: Final[Dict[str, ForecastModel]] = {
+    "ar": ForecastModel.AUTO_REGRESSION,
+    "es": ForecastModel.EXPONENTIAL_SMOOTHING,
+    "seasonal_naive": ForecastModel.SEASONAL_NAIVE,
+    "drift": ForecastModel.DRIFT,
+    "moving_average": ForecastModel.MOVING_AVERAGE,
+    "theta": ForecastModel.THETA,
+    "croston": ForecastModel.CROSTON,
+}
+
+BENCHMARKS: Final[Dict[str, Callable]] = {
+    "prepare": prepare,
+    "stationarity": stationarity,
+    "lag_search": lag_search,
+    "seasonality": seasonality,
+    **{
+        f"{prefix}_{step}": benchmark(algorithm)
+        for prefix, algorithm in MODELS.items()
+        for step, benchmark in (("train", train), ("forecast", forecast))
+    },
+}
+
+
+def measure(run: Callable, repeat: int) -> List[float]:
+    """Time `repeat` calls of `run` in seconds, after an untimed warm-up call."""
+    run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(
+    names: List[str],
+    kinds: List[str],
+    lengths: List[int],
+    frequencies: List[str],
+    repeat: int,
+    seed: int,
+) -> List[dict]:
+    results = []
+    for frequency in frequencies:
+        for length in lengths:
+            for kind in kinds:
+                series = generate_series(kind, length, frequency, seed)
+                for name in names:
+                    timings = measure(BENCHMARKS[name](series, frequency), repeat)
+                    result = {
+                        "benchmark": name,
+                        "kind": kind,
+                        "length": length,
+                        "frequency": frequency,
+                        "rows": len(series),
+                        "median": statistics.median(timings),
+                        "min": min(timings),
+                        "repeat": repeat,
+                    }
+                    print(
+                        f"{name:<24} {kind:<13} {length:>6} {frequency:>4} "
+                        f"median {result['median'] * 1000:10.3f} ms"
+                    )
+                    results.append(result)
+    return results
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline: dict, threshold: float) -> bool:
+    """
+    Print the ratio of each median to the baseline one.
+
+    :return: True if a benchmark got slower than `1 + threshold` times.
+    """
+    baseline_medians = {
+        tuple(result[field] for field in RESULT_KEY): result["median"]
+        for result in baseline["results"]
+    }
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('created_at')})")
+
+    regressed = False
+    for result in results:
+        key = tuple(result[field] for field in RESULT_KEY)
+        if key not in baseline_medians:
+            continue
+        ratio = result["median"] / baseline_medians[key]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, regressed = "  REGRESSION", True
+        elif ratio < 1 - threshold:
+            flag = "  improved"
+        print(f"{key[0]:<24} {key[1]:<13} {key[2]:>6} {key[3]:>4} x{ratio:6.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--kinds", nargs="+", choices=SERIES_KINDS)
+    parser.add_argument("--lengths", nargs="+", type=int)
+    parser.add_argument("--frequencies", nargs="+")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, help="JSON file (default: results/<commit>.json)"
+    )
+    parser.add_argument("--compare", type=Path, help="Baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    # Model logs and convergence warnings would dominate the output
+    logger.setLevel(logging.WARNING)
+    warnings.simplefilter("ignore")
+
+    results = run_benchmarks(
+        args.benchmarks or list(BENCHMARKS),
+        args.kinds or list(SERIES_KINDS),
+        args.lengths or list(DEFAULT_LENGTHS),
+        args.frequencies or list(DEFAULT_FREQUENCIES),
+        args.repeat,
+        args.seed,
+    )
+
+    commit = get_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "statsmodels": statsmodels.__version__,
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from typing import Final
+
+import numpy as np
+import pandas as pd
+
+# Shapes of the generated series, from the easiest to the hardest to forecast
+SERIES_KINDS: Final[tuple] = ("trend", "seasonal", "gaps", "intermittent")
+
+# Season length of each frequency unit, as in forecasting.utility
+SEASON_LENGTHS: Final[dict] = {"T": 1440, "H": 24, "D": 7, "W": 52, "M": 12}
+
+START: Final[str] = "2020-01-01"
+
+
+def generate_series(
+    kind: str, length: int, frequency: str = "1D", seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate a reproducible (ts, value) series of non-negative demand.
+
+    - trend: linear growth with noise.
+    - seasonal: trend and a sinusoidal season of the calendar period.
+    - gaps: seasonal, with 10% of the timestamps (and a 5% run) missing.
+    - intermittent: mostly zeros, with Poisson demand on 15% of the periods.
+
+    :param frequency: Pandas frequency, as stored for datasources (e.g. "1H").
+    :param seed: Seed of the generator, the same arguments give the same series.
+    """
+    if kind not in SERIES_KINDS:
+        raise ValueError(f"Unknown series kind: {kind}")
+
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(START, periods=length, freq=frequency)
+    steps = np.arange(length)
+
+    if kind == "intermittent":
+        demand = rng.poisson(5.0, length) + 1
+        values = np.where(rng.random(length) < 0.15, demand, 0).astype(float)
+        return pd.DataFrame({"ts": ts, "value": values})
+
+    values = 100 + 0.05 * steps + rng.normal(0, 2, length)
+    if kind in ("seasonal", "gaps"):
+        period = SEASON_LENGTHS[frequency[-1]] // int(frequency[:-1]) or 1
+        values += 20 * np.sin(2 * np.pi * steps / period)
+
+    series = pd.DataFrame({"ts": ts, "value": np.clip(values, 0, None).round(2)})
+    if kind == "gaps":
+        # Keep the first and last timestamps so that the range is unchanged
+        missing = rng.random(length) < 0.1
+        run = rng.integers(1, max(length - length // 20, 2))
+        missing[run : run + length // 20] = True
+        missing[[0, -1]] = False
+        series = series[~missing].reset_index(drop=True)
+    return series
@@ -1,4 +1,5 @@
 from datetime import datetime
+from datetime import timezone
 from typing import List
 
 import numpy as np
@@ -22,6 +23,7 @@ from components.filter import DateFilter
 from components.navbar import Navbar
 from components.table import DataTable
 from utils.constants import DATAPOINTS_HEADERS
+from utils.helpers import fetch_chart_data
 from utils.helpers import fetch_datapoints
 from utils.helpers import fetch_datasources
 
@@ -79,25 +81,40 @@ async def build_table_content(datapoints: List[dict]) -> list:
     return rows
 
 
-def get_data_point(date_str, y):
-    base_date = datetime.fromisoformat(date_str)
-    x = base_date.timestamp() * 1000
-    return [x, y]
+def format_ts(ts: int) -> str:
+    """Format an epoch-ms timestamp as an ISO 8601 UTC string."""
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
 
+def columns_to_records(columns: dict) -> List[dict]:
+    """
+    Build table records from columnar data, with empty cells for missing values.
 
-def generate_chart(datapoints):
-    main_data = [get_data_point(dp["ts"], dp["value"]) for dp in reversed(datapoints)]
-    auto_data = [get_data_point(dp["ts"], dp["AutoReg"]) for dp in reversed(datapoints)]
-    exp_data = [
-        get_data_point(dp["ts"], dp["ExpSmoothing"]) for dp in reversed(datapoints)
+    :param columns: Parallel arrays keyed by column name.
+    :return: List of datapoint dictionaries.
+    """
+    return [
+        {key: "" if value is None else value for key, value in zip(columns, row)}
+        for row in zip(*columns.values())
     ]
 
-    start_date = datapoints[len(auto_data) // 4]["ts"]
-    end_date = datapoints[0]["ts"]
 
-    main_data = list(map(lambda x: [x[0], None] if not x[1] else x, main_data))
-    auto_data = list(map(lambda x: [x[0], None] if not x[1] else x, auto_data))
-    exp_data = list(map(lambda x: [x[0], None] if not x[1] else x, exp_data))
+def generate_chart(series: dict):
+    # Series are downsampled server-side, oldest first with epoch-ms timestamps
+    main_data, auto_data, exp_data = (
+        [list(point) for point in zip(data["ts"], data["values"])]
+        for data in (
+            series.get(name, {"ts": [], "values": []})
+            for name in ("value", "AutoReg", "ExpSmoothing")
+        )
+    )
+
+    # Brush the latest quarter of the chart
+    ts = sorted(x for x, _ in main_data + auto_data + exp_data)
+    start_date = format_ts(ts[len(ts) * 3 // 4])
+    end_date = format_ts(ts[-1])
 
     return Chart(main_data, auto_data, exp_data, start_date, end_date)
 
@@ -120,65 +137,41 @@ async def datapoints(request: Request):
         datasource_id, start_date, end_date, latest, page
     )
 
-    if (
-        datasource_id != -1
-        and latest is not None
-        and len(datapoints["data"])
-        and start_date is None
-        and end_date is None
-    ):
-        start_date = datapoints["data"][-1]["ts"]
-
-    table_content = (
-        DataTable(datapoints["data"])
-        if datasource_id != -1 and len(datapoints["data"])
-        else Div()
-    )
+    columns = datapoints["data"] if datasource_id != -1 else {}
+    has_data = bool(columns.get("ts"))
+
+    if has_data and latest is not None and start_date is None and end_date is None:
+        start_date = format_ts(columns["ts"][-1])
+
+    table_content = DataTable(columns_to_records(columns)) if has_data else Div()
 
     chart_content = (
         [
-            generate_chart(datapoints["data"]),
+            generate_chart(
+                await fetch_chart_data(datasource_id, start_date, end_date, latest)
+            ),
             Div(id="chart-line2"),
             Div(id="chart-line"),
         ]
-        if datasource_id != -1 and len(datapoints["data"])
+        if has_data
         else []
     )
     minDate = datapoints["minDate"] if datasource_id != -1 else None
     maxDate = datapoints["maxDate"] if datasource_id != -1 else None
 
     cards_content = []
-    if datasource_id != -1:
-        y_actual_auto, y_auto = (
-            zip(
-                *[
-                    (dp["value"], dp["AutoReg"])
-                    for dp in reversed(datapoints["data"])
-                    if dp["value"] and dp["AutoReg"]
-                ]
-            )
-            if any(dp["value"] and dp["AutoReg"] for dp in datapoints["data"])
-            else ([], [])
-        )
-
-        y_actual_exp, y_exp = (
-            zip(
-                *[
-                    (dp["value"], dp["ExpSmoothing"])
-                    for dp in reversed(datapoints["data"])
-                    if dp["value"] and dp["ExpSmoothing"]
-                ]
-            )
-            if any(dp["value"] and dp["ExpSmoothing"] for dp in datapoints["data"])
-            else ([], [])
-        )
-
-        rmse_auto = np.sqrt(((np.array(y_auto) - y_actual_auto) ** 2).mean())
-        rmse_exp = np.sqrt(((np.array(y_exp) - y_actual_exp) ** 2).mean())
-        if len(y_auto):
-            cards_content.append(Card("Auto Regression", rmse_auto))
-        if len(y_exp):
-            cards_content.append(Card("Exponential Smoothing", rmse_exp))
+    if has_data:
+        # Missing values are null, i.e. NaN, and like zeros are left out
+        y_actual = np.nan_to_num(np.array(columns["value"], dtype=float))
+        for name, title in (
+            ("AutoReg", "Auto Regression"),
+            ("ExpSmoothing", "Exponential Smoothing"),
+        ):
+            y_predicted = np.nan_to_num(np.array(columns[name], dtype=float))
+            mask = (y_actual != 0) & (y_predicted != 0)
+            if mask.any():
+                rmse = np.sqrt(((y_predicted[mask] - y_actual[mask]) ** 2).mean())
+                cards_content.append(Card(title, rmse))
 
     return (
         Title("SmartForecasting - Datapoints"),
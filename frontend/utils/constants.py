@@ -20,3 +20,4 @@ DATASOURCES_HEADERS: Final = [
 DATAPOINTS_HEADERS: Final = ["ID", "Date", "Value", "AutoReg", "ExpSmoothing"]
 
 API_BASE_URL: Final = "http://156.67.83.177:8000/api/v1"
+CHART_MAX_POINTS: Final = 2000
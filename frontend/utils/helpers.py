@@ -1,6 +1,7 @@
 import requests
 
 from utils.constants import API_BASE_URL
+from utils.constants import CHART_MAX_POINTS
 
 def get_visible_pages(number_pages, current_page):
     """
@@ -39,9 +40,25 @@ async def fetch_datapoints(datasource_id: int,
                            page: int | None, per_page: int = 15):
     
     endpoint = f'{API_BASE_URL}/datasources/{datasource_id}/datapoints/all'
+    # Columnar format: parallel arrays with epoch-ms timestamps, newest first
     params = {"page": page, "per_page": per_page, 
               'start_date': start_date, 'end_date': end_date,
-              'latest': latest}
+              'latest': latest, 'format': 'columnar'}
     response = requests.get(endpoint, params=params)
     
     return response.json()
+
+async def fetch_chart_data(datasource_id: int,
+                           start_date: str | None, end_date: str | None,
+                           latest: int | None):
+    """
+    Fetch the chart series of a datasource, downsampled server-side.
+
+    :return: Series keyed by name, with epoch-ms timestamps and values.
+    """
+    endpoint = f'{API_BASE_URL}/datasources/{datasource_id}/datapoints/chart'
+    params = {'start_date': start_date, 'end_date': end_date,
+              'latest': latest, 'max_points': CHART_MAX_POINTS}
+    response = requests.get(endpoint, params=params)
+
+    return response.json()["series"]
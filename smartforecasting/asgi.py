@@ -0,0 +1,525 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import wraps
+from itertools import islice
+from typing import Any
+from typing import Tuple
+
+import pandas as pd
+import redis.asyncio as aioredis
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount
+from starlette.routing import Route
+from werkzeug.http import parse_etags
+from werkzeug.http import quote_etag
+
+from app_builder import create_app
+from async_database import AsyncDatabaseHandler
+from config import Config
+from constants import ASGI_MODEL_WORKERS
+from constants import BASE_PATH
+from constants import CELERY_RESULT_BACKEND
+from constants import COLD_START_HISTORY_ROWS
+from constants import COLD_START_MODEL
+from constants import COLUMNAR_MIMETYPE
+from constants import PROGRESS_KEEPALIVE_INTERVAL
+from forecasting.models import ForecastContext
+from logging_config import logger
+from progress import FINAL_STATES
+from redis_memory import RedisHandler
+from redis_progress import TaskProgressEvents
+from structs.enums import ForecastModel
+from structs.models import DataPoint
+from structs.models import ForecastingData
+from structs.utility import period_to_pandas_freq
+from timestamps import ISO_UTC_FORMAT
+from timestamps import parse_datetime
+from utility import is_columnar_requested
+
+# The Flask app initializes Config, which the route modules read at import time
+flask_app, celery = create_app()
+
+from routes.conditional import make_etag  # noqa: E402
+from routes.datapoints import build_all_datapoints_cursor_page  # noqa: E402
+from routes.datapoints import build_all_datapoints_payload  # noqa: E402
+from routes.datapoints import build_datapoints_cursor_page  # noqa: E402
+from routes.datapoints import build_datapoints_payload  # noqa: E402
+from routes.datapoints import get_stream_format  # noqa: E402
+from routes.datapoints import iter_all_datapoints  # noqa: E402
+from routes.datapoints import parse_keyset_params  # noqa: E402
+from routes.datapoints import stream_records  # noqa: E402
+from routes.datapoints import STREAM_MIMETYPES  # noqa: E402
+from routes.forecasting import format_forecast  # noqa: E402
+from routes.forecasting import parse_quantiles  # noqa: E402
+from routes.status import build_status_payload  # noqa: E402
+from routes.status import format_sse  # noqa: E402
+from routes.status import SSE_HEADERS  # noqa: E402
+from routes.status import task_state_event  # noqa: E402
+
+
+def json_response(
+    payload, status_code: int = 200, columnar: bool | None = None
+) -> Response:
+    """
+    Serialize like `jsonify` so both serving modes return the same bodies.
+    Responses of endpoints supporting the columnar format (`columnar` is not
+    None) vary on Accept, like `columnar_response`.
+    """
+    response = Response(
+        flask_app.json.dumps(payload),
+        status_code,
+        media_type=COLUMNAR_MIMETYPE if columnar else "application/json",
+    )
+    if columnar is not None:
+        response.headers.append("Vary", "Accept")
+    return response
+
+
+def wants_columnar(request: Request) -> bool:
+    return is_columnar_requested(
+        request.query_params.get("format"), request.headers.get("accept", "")
+    )
+
+
+def conditional_on_data_version(handler):
+    """Async counterpart of `routes.conditional.conditional_on_data_version`."""
+
+    @wraps(handler)
+    async def wrapper(request: Request):
+        datasource_id = request.path_params["datasource_id"]
+        if Config.data_sources.get(datasource_id) is None:
+            return json_response(
+                {"error": f"No data source found with ID {datasource_id}"}, 404
+            )
+
+        version = await request.app.state.redis.get(
+            f"{RedisHandler.DATA_VERSION_KEY_PREFIX}{datasource_id}"
+        )
+        etag = make_etag(
+            datasource_id,
+            int(version or 0),
+            f"{request.url.path}?{request.url.query}|{request.headers.get('accept', '')}",
+        )
+        if etag in parse_etags(request.headers.get("if-none-match")):
+            response = Response(status_code=304)
+        else:
+            response = await handler(request)
+            if response.status_code != 200:
+                return response
+
+        response.headers["ETag"] = quote_etag(etag)
+        if "accept" not in response.headers.get("vary", "").lower():
+            response.headers.append("Vary", "Accept")
+        return response
+
+    return wrapper
+
+
+async def cursor_page_response(
+    request: Request, build_page, datasource_id: int, start_date, end_date
+) -> Response:
+    """Answer a keyset page, read from the sync pool in Starlette's thread pool."""
+    try:
+        limit, cursor = parse_keyset_params(
+            request.query_params.get("limit"), request.query_params.get("cursor")
+        )
+    except ValueError as e:
+        logger.error(f"Invalid pagination parameters: {e}")
+        return json_response({"error": "Invalid limit or cursor"}, 400)
+
+    columnar = wants_columnar(request)
+    payload = await run_in_threadpool(
+        build_page, datasource_id, start_date, end_date, limit, cursor, columnar
+    )
+    return json_response(payload, columnar=columnar)
+
+
+def load_model(
+    algorithm: ForecastModel,
+    datasource_id: int,
+    training_data: pd.DataFrame | None,
+    frequency: str,
+) -> ForecastContext:
+    """
+    Load a trained model, or fit it in memory first when cold start data is
+    given, without storing it under the key of a trained model.
+    """
+    model = ForecastContext(algorithm, datasource_id, persist=training_data is None)
+    if training_data is not None:
+        logger.info(f"Cold start forecast with {algorithm.value}")
+        model.train(training_data, frequency)
+    return model
+
+
+async def get_datapoint(request: Request):
+    datasource_id = request.path_params["datasource_id"]
+
+    # Extract and validate the timestamp query parameter
+    ts = request.query_params.get("ts")
+    if not ts:
+        return json_response({"error": "Missing required parameter: ts"}, 400)
+
+    try:
+        datapoint = DataPoint(ts=datetime.fromisoformat(ts), value=-1)
+    except Exception as e:
+        logger.error(e)
+        return json_response({"error": "Invalid timestamp format"}, 400)
+
+    if Config.data_sources.get(datasource_id) is None:
+        return json_response(
+            {"error": f"No data source found with ID {datasource_id}"}, 404
+        )
+
+    datapoint.value = await request.app.state.database.get_data_point(
+        datasource_id, datapoint.ts
+    )
+    if datapoint.value == -1:
+        error_message = "No data point exists with that timestamp!"
+        logger.error(error_message)
+        return json_response({"error": error_message}, 500)
+    return json_response(datapoint.model_dump())
+
+
+@conditional_on_data_version
+async def get_datapoints(request: Request):
+    datasource_id = request.path_params["datasource_id"]
+    if Config.data_sources.get(datasource_id) is None:
+        return json_response(
+            {"error": f"No data source found with ID {datasource_id}"}, 404
+        )
+
+    start_date_str = request.query_params.get("start_date")
+    end_date_str = request.query_params.get("end_date")
+
+    try:
+        start_date = parse_datetime(start_date_str, ISO_UTC_FORMAT)
+        end_date = parse_datetime(end_date_str, ISO_UTC_FORMAT)
+        if (start_date_str and start_date is None) or (
+            end_date_str and end_date is None
+        ):
+            return json_response(
+                {
+                    "error": 'Invalid date format. Please use ISO 8601 format with "Z" (YYYY-MM-DDTHH:MM:SSZ).'
+                },
+                400,
+            )
+
+        if request.query_params.get("limit"):
+            return await cursor_page_response(
+                request,
+                build_datapoints_cursor_page,
+                datasource_id,
+                start_date,
+                end_date,
+            )
+
+        data_points_df = await request.app.state.database.get_all_data_for_datasource(
+            datasource_id
+        )
+        columnar = wants_columnar(request)
+        payload, status = build_datapoints_payload(
+            datasource_id,
+            data_points_df,
+            start_date,
+            end_date,
+            request.query_params.get("page"),
+            request.query_params.get("per_page"),
+            columnar,
+        )
+        return json_response(payload, status, columnar)
+    except Exception as e:
+        logger.error(f"An error occurred while retrieving data points: {e}")
+        return json_response(
+            {"error": "Failed to retrieve data points from the database."}, 500
+        )
+
+
+@conditional_on_data_version
+async def get_all_datapoints(request: Request):
+    datasource_id = request.path_params["datasource_id"]
+    if Config.data_sources.get(datasource_id) is None:
+        return json_response(
+            {"error": f"No data source found with ID {datasource_id}"}, 404
+        )
+
+    start_date_str = request.query_params.get("start_date")
+    end_date_str = request.query_params.get("end_date")
+
+    try:
+        start_date = parse_datetime(start_date_str)
+        end_date = parse_datetime(end_date_str)
+        if (start_date_str and start_date is None) or (
+            end_date_str and end_date is None
+        ):
+            return json_response(
+                {
+                    "error": 'Invalid date format. Please use ISO 8601 format with "Z" (e.g., YYYY-MM-DDTHH:MM:SSZ, YYYY-MM-DDTHH:MM:SS.mmmZ, or YYYY-MM-DD).'
+                },
+                400,
+            )
+
+        if request.query_params.get("limit"):
+            return await cursor_page_response(
+                request,
+                build_all_datapoints_cursor_page,
+                datasource_id,
+                start_date,
+                end_date,
+            )
+
+        # Streams are read from the sync pool in Starlette's thread pool
+        stream_format = get_stream_format(
+            request.query_params.get("format"), request.headers.get("accept", "")
+        )
+        latest = request.query_params.get("latest")
+        if stream_format and not (
+            request.query_params.get("page") and request.query_params.get("per_page")
+        ):
+            records = iter_all_datapoints(datasource_id, start_date, end_date)
+            if latest:
+                records = islice(records, int(latest))
+            return StreamingResponse(
+                stream_records(records, stream_format),
+                media_type=STREAM_MIMETYPES[stream_format],
+            )
+
+        # The join is a couple of short queries on the sync connection, run in
+        # Starlette's thread pool
+        columnar = wants_columnar(request)
+        payload, status = await run_in_threadpool(
+            build_all_datapoints_payload,
+            datasource_id,
+            start_date,
+            end_date,
+            latest,
+            request.query_params.get("page"),
+            request.query_params.get("per_page"),
+            columnar,
+        )
+        return json_response(payload, status, columnar)
+    except Exception as e:
+        logger.error(f"Failed to retrieve all data points: {e}")
+        return json_response(
+            {"error": "Failed to retrieve all data points from the database."}, 500
+        )
+
+
+@conditional_on_data_version
+async def get_forecast(request: Request):
+    start_time = time.perf_counter()
+    datasource_id = request.path_params["datasource_id"]
+
+    date_param = request.query_params.get("date")
+    steps_param = request.query_params.get("steps")
+
+    try:
+        forecasting_data = ForecastingData(
+            date=date_param, steps=int(steps_param) if steps_param else 1
+        )
+    except (ValidationError, ValueError) as e:
+        logger.error(f"Invalid query parameters: {e}")
+        return json_response({"error": "Invalid query parameters"}, 400)
+
+    try:
+        quantiles = parse_quantiles(request.query_params.get("quantiles"))
+    except ValueError as e:
+        logger.error(f"Invalid quantiles: {e}")
+        return json_response(
+            {"error": "Invalid quantiles, expected values between 0 and 1"}, 400
+        )
+
+    datasource = Config.data_sources.get_model(datasource_id)
+    if datasource is None:
+        return json_response(
+            {"error": f"No data source found with ID {datasource_id}"}, 404
+        )
+    if not datasource.trained and not datasource.initialized:
+        return json_response({"error": "Training is required for this step!"}, 400)
+
+    frequency = period_to_pandas_freq(datasource.datasource_info.period)
+    algorithms = (
+        datasource.training.models
+        if datasource.trained
+        else [ForecastModel(COLD_START_MODEL)]
+    )
+
+    columnar = wants_columnar(request)
+
+    # Model loading and evaluation are CPU bound: keep them off the event loop
+    loop = asyncio.get_running_loop()
+    executor = request.app.state.executor
+    database = request.app.state.database
+
+    try:
+        forecast_results = []
+        for algorithm in algorithms:
+            training_data = (
+                None
+                if datasource.trained
+                else await database.get_latest_data_points(
+                    datasource_id, COLD_START_HISTORY_ROWS
+                )
+            )
+            model = await loop.run_in_executor(
+                executor, load_model, algorithm, datasource_id, training_data, frequency
+            )
+
+            lags_needed = model.model.get_nb_lags_needed()
+            data = (
+                await database.get_latest_data_points(datasource_id, lags_needed)
+                if lags_needed > 0
+                else None
+            )
+            if data is not None and data.empty:
+                raise ValueError("No data points exist!")
+
+            result = await loop.run_in_executor(
+                executor,
+                model.forecast,
+                data,
+                forecasting_data.date,
+                forecasting_data.steps,
+                frequency,
+                quantiles,
+            )
+            if result is None:
+                return json_response({"error": "Forecast result is None"}, 400)
+
+            forecast_results.append(
+                format_forecast(
+                    algorithm, result, forecasting_data.steps, quantiles, columnar
+                )
+            )
+
+        end_time = time.perf_counter()
+        return json_response(
+            {
+                "forecasts": forecast_results,
+                "operation_time": f"{end_time - start_time:.4f}s",
+            },
+            columnar=columnar,
+        )
+    except Exception as e:
+        logger.error(f"Error during forecasting: {e}")
+        return json_response(
+            {"error": "Failed to retrieve data point from the database."}, 500
+        )
+
+
+async def read_task_state(request: Request, task_id: str) -> Tuple[str, Any]:
+    """Read the Celery result backend directly instead of a blocking AsyncResult."""
+    backend = celery.backend
+    meta = await request.app.state.redis.get(backend.get_key_for_task(task_id))
+    if meta is None:
+        return "PENDING", None
+
+    meta = backend.decode_result(meta)
+    return meta["status"], meta["result"]
+
+
+async def get_status(request: Request):
+    state, info = await read_task_state(request, request.path_params["task_id"])
+    return json_response(build_status_payload(state, info))
+
+
+async def get_status_events(request: Request):
+    # Each stream only holds a pub/sub connection, not a worker thread
+    task_id = request.path_params["task_id"]
+    redis = request.app.state.redis
+
+    async def generate():
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(TaskProgressEvents.channel(task_id))
+        try:
+            latest = await redis.get(TaskProgressEvents.key(task_id))
+            if latest is not None:
+                event = json.loads(latest)
+            else:
+                event = task_state_event(*await read_task_state(request, task_id))
+            yield format_sse(event)
+
+            while event["status"] not in FINAL_STATES:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=PROGRESS_KEEPALIVE_INTERVAL,
+                )
+                if message is None:
+                    state, info = await read_task_state(request, task_id)
+                    if state in FINAL_STATES:
+                        event = task_state_event(state, info)
+                        yield format_sse(event)
+                    else:
+                        yield ": keepalive\n\n"
+                    continue
+
+                event = json.loads(message["data"])
+                yield format_sse(event)
+        finally:
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        generate(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    app.state.database = AsyncDatabaseHandler(Config.db_config)
+    await app.state.database.connect()
+    app.state.redis = aioredis.from_url(CELERY_RESULT_BACKEND)
+    app.state.executor = ThreadPoolExecutor(max_workers=ASGI_MODEL_WORKERS)
+    logger.info("ASGI application started")
+
+    yield
+
+    app.state.executor.shutdown(wait=False)
+    await app.state.redis.aclose()
+    await app.state.database.disconnect()
+
+
+# Read endpoints are served natively, every other route by the mounted Flask app
+app = Starlette(
+    routes=[
+        Route(
+            f"{BASE_PATH}/datasources/{{datasource_id:int}}/datapoints",
+            get_datapoint,
+            methods=["GET"],
+        ),
+        Route(
+            f"{BASE_PATH}/datasources/{{datasource_id:int}}/datapoints/data",
+            get_datapoints,
+            methods=["GET"],
+        ),
+        Route(
+            f"{BASE_PATH}/datasources/{{datasource_id:int}}/datapoints/all",
+            get_all_datapoints,
+            methods=["GET"],
+        ),
+        Route(
+            f"{BASE_PATH}/datasources/{{datasource_id:int}}/forecasting",
+            get_forecast,
+            methods=["GET"],
+        ),
+        Route(f"{BASE_PATH}/status/{{task_id}}", get_status, methods=["GET"]),
+        Route(
+            f"{BASE_PATH}/status/{{task_id}}/events",
+            get_status_events,
+            methods=["GET"],
+        ),
+        Mount("/", WSGIMiddleware(flask_app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,122 @@
+from datetime import date
+from datetime import datetime
+
+import asyncpg
+import pandas as pd
+
+from logging_config import logger
+
+
+class AsyncDatabaseHandler:
+    """
+    Read side of DatabaseHandler for the ASGI server, backed by an asyncpg pool.
+
+    Queries awaiting the database release the event loop instead of holding a
+    worker thread, so slow reads do not block the other requests.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.pool = None
+
+    async def connect(self):
+        """Create the connection pool."""
+        try:
+            self.pool = await asyncpg.create_pool(
+                min_size=1,
+                max_size=20,
+                host=self.config["database"]["host"],
+                port=self.config["database"]["port"],
+                database=self.config["database"]["dbname"],
+                user=self.config["database"]["user"],
+                password=self.config["database"]["password"],
+                ssl=self.config["database"]["sslmode"],
+            )
+            logger.info("Async database connection pool created successfully.")
+        except Exception as e:
+            logger.error(f"Failed to create async connection pool: {e}")
+            raise e
+
+    async def disconnect(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Async database connection pool closed.")
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        """Quote a table name like psycopg2's sql.Identifier."""
+        return '"' + name.replace('"', '""') + '"'
+
+    def _table(self, key: str) -> str:
+        return self._identifier(self.config["database"][key])
+
+    async def get_data_point(self, ds_id: int, ts: date | datetime) -> float:
+        logger.info(
+            f"Retrieving data point for data source ID: {ds_id} at timestamp: {ts}"
+        )
+        query = (
+            f"SELECT * FROM {self._table('data-sources-table-name')} "
+            "WHERE datasource_id = $1 AND ts = $2"
+        )
+
+        try:
+            result = await self.pool.fetchrow(query, ds_id, ts)
+            return result[2] if result else -1
+        except Exception as e:
+            logger.error(f"An error occurred while retrieving data: {e}")
+            return -1
+
+    async def get_all_data_for_datasource(self, ds_id: int) -> pd.DataFrame:
+        logger.info(f"Retrieving all data for data source ID: {ds_id}")
+        query = (
+            f"SELECT ts, value FROM {self._table('data-sources-table-name')} "
+            "WHERE datasource_id = $1 ORDER BY ts"
+        )
+
+        try:
+            result = await self.pool.fetch(query, ds_id)
+            return pd.DataFrame(
+                [tuple(row) for row in result], columns=["ts", "value"]
+            )
+        except Exception as e:
+            logger.error(f"An error occurred while retrieving all data: {e}")
+            return pd.DataFrame(columns=["ts", "value"])
+
+    async def get_latest_data_points(
+        self, datasource_id: int, lags: int
+    ) -> pd.DataFrame:
+        logger.info(
+            f"Retrieving latest {lags} data points for data source ID: {datasource_id}"
+        )
+        query = f"""
+            SELECT ts, value FROM (
+                SELECT * FROM {self._table('data-sources-table-name')}
+                WHERE datasource_id = $1 ORDER BY ts DESC LIMIT $2
+            ) AS latest_data ORDER BY ts ASC
+        """
+
+        try:
+            result = await self.pool.fetch(query, datasource_id, lags)
+            return pd.DataFrame(
+                [tuple(row) for row in result], columns=["ts", "value"]
+            )
+        except Exception as e:
+            logger.error(f"An error occurred: {e}")
+            return pd.DataFrame(columns=["ts", "value"])
+
+    async def get_forecasting_data_for_datasource(self, ds_id: int) -> pd.DataFrame:
+        logger.info(f"Retrieving all forecasting data for data source ID: {ds_id}")
+        query = (
+            f"SELECT ts, algorithm, value FROM {self._table('forecasting-table-name')} "
+            "WHERE datasource_id = $1 ORDER BY ts"
+        )
+
+        try:
+            result = await self.pool.fetch(query, ds_id)
+            return pd.DataFrame(
+                [tuple(row) for row in result], columns=["ts", "algorithm", "value"]
+            )
+        except Exception as e:
+            logger.error(f"An error occurred while retrieving all data: {e}")
+            return pd.DataFrame(columns=["ts", "algorithm", "value"])
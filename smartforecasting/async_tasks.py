@@ -2,35 +2,60 @@
 import base64
 import io
 import time
+from typing import List
+from typing import Tuple
 
 import pandas as pd
+from celery import chord
 from celery import shared_task
 from celery.contrib.abortable import AbortableTask
+from celery.utils import uuid
 
-from database import DatabaseHandler
+from constants import INGEST_CHUNK_ROWS
+from constants import RETRAINING_INTERVAL
+from constants import RETRAINING_STAGGER
+from constants import TRAINING_MODEL_TIME_BUDGET
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import TrainingCancelled
 from forecasting.models import ForecastContext
 from logging_config import logger
+from progress import TaskProgress
 from redis_memory import RedisHandler
+from structs.models import DataSource
 from structs.models import Training
-from utility import find_data_source_by_id
+from structs.utility import period_to_pandas_freq
+from worker_resources import WorkerResources
 
 
-@shared_task(bind=True)
-def process_file(self, file_data, datasource_id: int, config: dict):
-    try:
-        start_time = time.perf_counter()
+def ingest_frame(df: pd.DataFrame, datasource_id: int) -> int:
+    """
+    Insert the rows of an initialization file and their rollups.
 
-        # Connect to Databases
-        redis_handler = RedisHandler()
-        database = DatabaseHandler(config)
+    :return: The number of rows the database inserted, which callers compare
+        with the number of rows of the file.
+    """
+    redis_handler = WorkerResources.get_redis_handler()
+    database = WorkerResources.get_database()
+    try:
         database.connect()
-        logger.info(f"config: {database.config}")
-        logger.info(f"ds id: {datasource_id}")
+        inserted_rows = database.insert_dataframe(df, datasource_id)
+        # The rows bypassed the ingestion index, reload it on the next batch
+        redis_handler.ingest_index.reset(datasource_id)
+
+        # Rollups of the inserted data (columns are positional: ts, value)
+        redis_handler.rollups.before_insert(datasource_id)
+        database.insert_rollups(df.set_axis(["ts", "value"], axis=1), datasource_id)
+        return inserted_rows
+    finally:
+        database.disconnect()  # Ensure the database connection is closed
 
-        datasource_str, datasource_index = find_data_source_by_id(
-            datasource_id, redis_handler.get_all_data_sources()
-        )
 
+@shared_task(bind=True)
+def process_file(self, file_data, datasource_id: int):
+    start_time = time.perf_counter()
+    logger.info(f"ds id: {datasource_id}")
+
+    try:
         # Decode the file data from base64
         file_data = base64.b64decode(file_data)
 
@@ -39,83 +64,303 @@ def process_file(self, file_data, datasource_id: int, config: dict):
 
         # Read the CSV data into a DataFrame
         df = pd.read_csv(file_io)
-        database.insert_dataframe(df, datasource_id)
-        # database.disconnect()
+    except Exception as e:
+        raise Exception(e)
+
+    # Large files are split into time-ordered chunks ingested in parallel by
+    # the ingest workers. The chord callback replaces this task, so its result
+    # is only ready once every chunk is inserted.
+    if len(df) > INGEST_CHUNK_ROWS:
+        df = df.iloc[pd.to_datetime(df.iloc[:, 0]).argsort(kind="stable")]
+        chunks = [
+            df.iloc[index : index + INGEST_CHUNK_ROWS].to_csv(index=False)
+            for index in range(0, len(df), INGEST_CHUNK_ROWS)
+        ]
+        logger.info(f"Ingesting {len(df)} rows in {len(chunks)} chunks")
+        raise self.replace(
+            chord(
+                (ingest_chunk.s(chunk, datasource_id) for chunk in chunks),
+                finish_ingestion.s(datasource_id, len(df), time.time()),
+            )
+        )
+
+    try:
+        inserted_rows = ingest_frame(df, datasource_id)
+        if inserted_rows != len(df):
+            raise Exception(
+                f"Inserted {inserted_rows} of {len(df)} rows "
+                f"for data source {datasource_id}"
+            )
         end_time = time.perf_counter()
 
-        redis_handler.set_item(datasource_index, "initialized", True)
+        WorkerResources.get_redis_handler().set_item(
+            datasource_id, "initialized", True
+        )
         return f"Data insertion has been successfully completed in: {end_time - start_time} seconds"
     except Exception as e:
         raise Exception(e)
-    finally:
-        database.disconnect()  # Ensure the database connection is closed
 
-    return "Something went wrong!"
 
+@shared_task
+def ingest_chunk(chunk: str, datasource_id: int) -> int:
+    """Insert a chunk (CSV text) of an initialization file."""
+    return ingest_frame(pd.read_csv(io.StringIO(chunk)), datasource_id)
 
-@shared_task(bind=True, base=AbortableTask)
-def process_training(
-    self, training_data: str, datasource_id: int, config: dict, frequency: int
+
+@shared_task(acks_late=True)
+def finish_ingestion(
+    inserted_rows: List[int], datasource_id: int, total_rows: int, started_at: float
 ):
+    """
+    Chord callback of a chunked ingestion, only called once every chunk
+    succeeded: mark the datasource initialized if no row is missing.
+    """
+    if sum(inserted_rows) != total_rows:
+        raise Exception(
+            f"Inserted {sum(inserted_rows)} of {total_rows} rows "
+            f"for data source {datasource_id}"
+        )
+
+    WorkerResources.get_redis_handler().set_item(datasource_id, "initialized", True)
+
+    # The chunks ran on other workers, so use the wall clock
+    return f"Data insertion has been successfully completed in: {time.time() - started_at} seconds"
+
+
+@shared_task(bind=True, base=AbortableTask)
+def process_training(self, training_data: str, datasource_id: int, frequency: str):
     start_time = time.perf_counter()
 
-    # Initialize necessary handlers and models outside the try-except for cleaner resource handling
-    redis_handler = RedisHandler()
-    database = DatabaseHandler(config)
+    # Borrow the handlers of the worker process outside the try-except
+    redis_handler = WorkerResources.get_redis_handler()
+    database = WorkerResources.get_database()
     try:
         # Parse the training data and connect to the database
         training_data_object: Training = Training.parse_raw(training_data)
+
+        # Train the models of every request absorbed while this task was queued
+        flight_models = redis_handler.flights.start(datasource_id, self.request.id)
+        if flight_models is not None:
+            training_data_object = Training(models=flight_models)
+
         database.connect()
-        logger.info(f"Config: {database.config}, Datasource ID: {datasource_id}")
+        logger.info(f"Datasource ID: {datasource_id}")
 
-        # Retrieve datasource info
-        datasource_str, datasource_index = find_data_source_by_id(
-            datasource_id, redis_handler.get_all_data_sources()
-        )
+        # Fingerprint the data before reading it: points added in between only
+        # make the next scheduled retraining happen again
+        fingerprints = database.get_data_fingerprints(datasource_id)
+        fingerprint = fingerprints.get(datasource_id)
 
         # Get all the data needed for training
         df = database.get_all_data_for_datasource(datasource_id)
         logger.info(f"Training data fetched: {df.head()}")
 
-        total_models = len(training_data_object.models)
+        # Progress is published at a fixed cadence, not per inserted row
+        progress = TaskProgress(
+            self, redis_handler, len(training_data_object.models)
+        )
+
+        # Aborts are noticed inside the fits, not only between inserted rows
+        token = CancellationToken(self.is_aborted)
+
+        # Models out of time budget, and the ones among them never trained before
+        skipped = []
+        untrained = []
 
         # Iterate through all the models specified in training data
         for algorithm_index, algorithm in enumerate(training_data_object.models):
+            progress.start_model(algorithm_index, algorithm.value)
+            redis_handler.flights.refresh(datasource_id, self.request.id)
             model = ForecastContext(algorithm, datasource_id)
-            forecast_data = model.train(df, frequency)
+            try:
+                forecast_data = model.train(
+                    df, frequency, token.with_budget(TRAINING_MODEL_TIME_BUDGET)
+                )
+            except TrainingCancelled as e:
+                if self.is_aborted():
+                    progress.finish("ABORTED", "TASK STOPPED!")
+                    return "TASK STOPPED!"
+                logger.warning(f"Training of {algorithm.value} skipped: {e.reason}")
+                skipped.append(algorithm.value)
+                if not model.has_model_params():
+                    untrained.append(algorithm.value)
+                continue
 
-            # Inserting forecast data into the database and updating progress in a single loop
-            # We gather all the rows in one step to avoid having an inner loop that just counts
-            insert_result = database.insert_forecasting_dataframe(
+            # The insertion yields every few rows, stop there when aborted
+            inserted = 0
+            for index, total in database.insert_forecasting_dataframe(
                 forecast_data, datasource_id, algorithm.value
-            )
+            ):
+                progress.update(index + 1 - inserted, fraction=(index + 1) / total)
+                inserted = index + 1
 
-            # Only iterate once over the inserted rows, saving one iteration
-            total_rows = len(insert_result)
-            for index, _ in enumerate(insert_result):
-                if self.is_aborted():  # Check for task abortion before continuing
+                if self.is_aborted():
+                    progress.finish("ABORTED", "TASK STOPPED!")
                     return "TASK STOPPED!"
+            progress.update(len(forecast_data) - inserted, fraction=1.0)
 
-                # Update task progress
-                self.update_state(
-                    state="PROGRESS",
-                    meta={
-                        "current": index + 1,
-                        "total": total_rows,
-                        "current_model": algorithm_index,
-                        "total_models": total_models,
-                    },
-                )
-
-        # Mark the datasource as trained in Redis
-        redis_handler.set_item(datasource_index, "trained", True)
+        # Mark the datasource as trained in Redis once every model can forecast
+        if not untrained:
+            redis_handler.set_item(datasource_id, "trained", True)
+        # A skipped model must be retried by the next scheduled retraining
+        if fingerprint is not None and not skipped:
+            redis_handler.fingerprints.set(datasource_id, fingerprint)
 
         end_time = time.perf_counter()
         logger.info(f"Training completed in {end_time - start_time:.2f} seconds")
-        return f"Training completed successfully in {end_time - start_time:.2f} seconds"
+        result = (
+            f"Training completed successfully in {end_time - start_time:.2f} seconds"
+        )
+        if skipped:
+            result += f", skipped out of time budget: {', '.join(skipped)}"
+        progress.finish("SUCCESS", result)
+        return result
     except Exception as e:
+        redis_handler.task_progress.publish(
+            self.request.id, {"status": "FAILURE", "result": str(e)}
+        )
         raise Exception(e)
     finally:
         database.disconnect()  # Ensure the database connection is closed
 
+        # Requests received while running are trained by a single follow-up run
+        followup = redis_handler.flights.finish(datasource_id, self.request.id)
+        if followup is not None:
+            followup_task_id, models = followup
+            process_training.apply_async(
+                args=[Training(models=models).json(), datasource_id, frequency],
+                task_id=followup_task_id,
+            )
+
     return "Something went wrong!"
+
+
+def request_training(
+    redis_handler: RedisHandler,
+    datasource_id: int,
+    training: Training,
+    frequency: str,
+    **options,
+) -> Tuple[str, str, List[str]]:
+    """
+    Request the training of a datasource with single-flight semantics: at most
+    one training per datasource is queued or running, later requests are merged
+    into it or into a single follow-up run (see TrainingFlights.claim).
+
+    :param options: Options of apply_async, used when a task is enqueued.
+    :return: The outcome ("new", "merged" or "followup"), the ID of the task
+        that will train the models and the merged models.
+    """
+    models = [model.value for model in training.models]
+    outcome, task_id, models = redis_handler.flights.claim(
+        datasource_id, models, uuid()
+    )
+    if outcome == "new":
+        process_training.apply_async(
+            args=[training.json(), datasource_id, frequency],
+            task_id=task_id,
+            **options,
+        )
+    return outcome, task_id, models
+
+
+@shared_task(bind=True, acks_late=True)
+def compact_rollups(self):
+    """
+    Periodic task (Celery beat) recomputing the rollups from the raw data, so
+    that partial rows are merged and stale data sources are fixed.
+    """
+    redis_handler = WorkerResources.get_redis_handler()
+    if not redis_handler.rollups.start_compaction():
+        return "Compaction already running"
+
+    database = WorkerResources.get_database()
+    succeeded = False
+    try:
+        start_time = time.perf_counter()
+        database.connect()
+        succeeded = database.rebuild_rollups() == 1
+
+        end_time = time.perf_counter()
+        logger.info(f"Rollups compacted in {end_time - start_time:.2f} seconds")
+        return f"Rollups compacted in {end_time - start_time:.2f} seconds"
+    finally:
+        redis_handler.rollups.finish_compaction(succeeded)
+        database.disconnect()
+
+
+def retraining_priority(previous: str, current: str) -> int:
+    """
+    Celery priority of a retraining, from 0 (most urgent, with the Redis broker)
+    to 9, by the share of rows added since the last training.
+    """
+    previous_count = int(previous.split(":")[0])
+    current_count = int(current.split(":")[0])
+    growth = (current_count - previous_count) / max(previous_count, 1)
+    return 9 - min(max(int(growth * 10), 0), 9)
+
+
+@shared_task(bind=True, acks_late=True)
+def schedule_retraining(self):
+    """
+    Periodic task (Celery beat) enqueuing the training of the trained data
+    sources whose data changed since their last training. Unchanged data
+    sources are skipped, the others are staggered by priority. Data sources
+    trained before their fingerprint was recorded are not retrained, their
+    current fingerprint is recorded as the one of their training.
+    """
+    redis_handler = WorkerResources.get_redis_handler()
+    database = WorkerResources.get_database()
+    try:
+        database.connect()
+        fingerprints = database.get_data_fingerprints()
+    finally:
+        database.disconnect()
+    trained_fingerprints = redis_handler.fingerprints.get_all()
+
+    changed = []
+    unknown = {}
+    for data_source_dict in redis_handler.get_all_data_sources():
+        data_source = DataSource(**data_source_dict)
+        fingerprint = fingerprints.get(data_source.id)
+        previous = trained_fingerprints.get(data_source.id)
+        if (
+            not data_source.trained
+            or not data_source.training.models
+            or fingerprint is None
+            or fingerprint == previous
+        ):
+            continue
+        if previous is None:
+            unknown[data_source.id] = fingerprint
+            continue
+        priority = retraining_priority(previous, fingerprint)
+        changed.append((priority, data_source, fingerprint))
+
+    # Retraining them all at once at the top priority would flood the queue
+    redis_handler.fingerprints.seed(unknown)
+
+    scheduled = 0
+    changed.sort(key=lambda item: item[0])
+    for priority, data_source, fingerprint in changed:
+        if not redis_handler.fingerprints.schedule_retraining(
+            data_source.id, fingerprint, RETRAINING_INTERVAL
+        ):
+            continue
+
+        # Spread the trainings instead of starting them all at once
+        request_training(
+            redis_handler,
+            data_source.id,
+            data_source.training,
+            period_to_pandas_freq(data_source.datasource_info.period),
+            countdown=scheduled * RETRAINING_STAGGER,
+            priority=priority,
+        )
+        scheduled += 1
+
+    logger.info(
+        f"Scheduled {scheduled} of {len(changed)} changed data sources, "
+        f"recorded the fingerprints of {len(unknown)}"
+    )
+    return f"Scheduled {scheduled} retrainings"
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def splitmix64(keys: np.ndarray) -> np.ndarray:
+    """Mix 64-bit keys into well distributed hashes (SplitMix64 finalizer)."""
+    with np.errstate(over="ignore"):
+        keys = keys + np.uint64(0x9E3779B97F4A7C15)
+        keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return keys ^ (keys >> np.uint64(31))
+
+
+def bloom_positions(keys, size: int, hashes: int) -> np.ndarray:
+    """
+    Bit positions of integer keys in a Bloom filter of `size` bits.
+
+    The `hashes` positions of a key are derived from two hashes by double
+    hashing (h1 + i * h2), computed for the whole array at once.
+
+    :param keys: Integer keys (e.g. epoch seconds).
+    :return: An array of shape (len(keys), hashes).
+    """
+    keys = np.asarray(keys, dtype=np.int64).astype(np.uint64)
+    first = splitmix64(keys)
+    second = splitmix64(first) | np.uint64(1)
+    rounds = np.arange(hashes, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        positions = first[:, None] + rounds * second[:, None]
+    return (positions % np.uint64(size)).astype(np.int64)
+
+
+def bloom_bitmap(keys, size: int, hashes: int) -> bytes:
+    """
+    Build the bitmap of a Bloom filter holding `keys`, with the bit order of
+    Redis SETBIT/GETBIT (bit 0 is the most significant bit of the first byte).
+    """
+    bits = np.zeros(size, dtype=bool)
+    bits[bloom_positions(keys, size, hashes).ravel()] = True
+    return np.packbits(bits).tobytes()
@@ -3,7 +3,11 @@ from celery import Celery
 
 from constants import CELERY_BROKER_URL
 from constants import CELERY_RESULT_BACKEND
+from constants import CELERY_TASK_QUEUES
+from constants import CELERY_TASK_RATE_LIMITS
 from constants import MODULE
+from constants import RETRAINING_INTERVAL
+from constants import ROLLUP_COMPACTION_INTERVAL
 
 def make_celery(app):
     celery = Celery(
@@ -13,4 +17,38 @@ def make_celery(app):
     )
     # celery.conf.update(app.config)
     celery.autodiscover_tasks(['async_tasks'])
+    # Bulk ingestion, training and maintenance run on separate worker pools
+    celery.conf.task_routes = {
+        task: {"queue": queue} for task, queue in CELERY_TASK_QUEUES.items()
+    }
+    celery.conf.task_annotations = {
+        task: {"rate_limit": rate_limit}
+        for task, rate_limit in CELERY_TASK_RATE_LIMITS.items()
+    }
+    # Tasks are acknowledged when received (the default): an unacknowledged
+    # task is only redelivered after the visibility timeout, much later than
+    # the next retraining schedule retries a crashed training. Only the
+    # idempotent tasks are acknowledged late (acks_late=True): the maintenance
+    # tasks, and finish_ingestion, the chord callback of a chunked ingestion.
+    # A redelivered callback gets the same chunk results and only marks the
+    # datasource initialized again, while an early ack lost with its worker
+    # would leave the ingested datasource uninitialized for good.
+    # Consume higher priority (lower number) tasks first with the Redis broker
+    celery.conf.broker_transport_options = {
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        # Unacknowledged tasks, including those waiting for their countdown (the
+        # staggered retrainings), are redelivered after it
+        "visibility_timeout": 43200,
+    }
+    celery.conf.beat_schedule = {
+        "compact-rollups": {
+            "task": "async_tasks.compact_rollups",
+            "schedule": ROLLUP_COMPACTION_INTERVAL,
+        },
+        "schedule-retraining": {
+            "task": "async_tasks.schedule_retraining",
+            "schedule": RETRAINING_INTERVAL,
+        },
+    }
     return celery
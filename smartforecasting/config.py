@@ -1,5 +1,6 @@
 from celery_config import make_celery
 from constants import DB_CONFIG_FILENAME
+from data_source_cache import DataSourceCache
 from database import DatabaseHandler
 from redis_memory import RedisHandler
 from utility import read_config
@@ -8,7 +9,10 @@ class Config:
     @classmethod
     def initialize(cls, app):
         # Setup Redis and Celery
-        cls.redis_handler = RedisHandler()
+        cls.redis_handler = RedisHandler.shared()
+        cls.redis_handler.migrate_data_source_list()
+        cls.data_sources = DataSourceCache(cls.redis_handler)
+        cls.data_sources.start()
         cls.celery = make_celery(app)
         
         # Initialize the Database
@@ -18,4 +22,5 @@ class Config:
         cls.database.connect()
         cls.database.create_data_sources_table()
         cls.database.create_datasource_forecasting_table()
+        cls.database.create_rollups_table()
         app.app_context().push()
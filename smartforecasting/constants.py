@@ -5,6 +5,44 @@ DB_CONFIG_FILENAME: Final[str] = "db.json"
 MODULE: Final[str] = "app"
 CELERY_BROKER_URL: Final[str] = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND: Final[str] = "redis://localhost:6379/0"
+FORECAST_QUANTILES: Final[tuple] = (0.1, 0.5, 0.9)
+COLD_START_MODEL: Final[str] = "seasonal-naive"
+COLD_START_HISTORY_ROWS: Final[int] = 5000  # latest points fitted by the cold start
+TRAINING_MODEL_TIME_BUDGET: Final[int] = 600  # seconds per trained model
+STREAM_BATCH_SIZE: Final[int] = 10000  # rows fetched per query when streaming
+STREAM_CHUNK_ROWS: Final[int] = 1000  # records serialized per response chunk
+INGEST_CHUNK_ROWS: Final[int] = 100000  # rows per parallel initialization chunk
+INGEST_HEAD_ROWS: Final[int] = 100000  # latest timestamps loaded in the dedup filter
+INGEST_BLOOM_CAPACITY: Final[int] = 200000  # timestamps before the filter is rebuilt
+INGEST_BLOOM_BITS: Final[int] = 2**21  # size of the dedup filter (256 KiB)
+INGEST_BLOOM_HASHES: Final[int] = 7  # bits set per timestamp
+COLUMNAR_MIMETYPE: Final[str] = "application/vnd.smartforecasting.columnar+json"
+CHART_MAX_POINTS: Final[int] = 2000  # default points per downsampled chart series
+# Rollup buckets and their QuestDB timestamp_floor units
+ROLLUP_BUCKETS: Final[dict] = {"hour": "h", "day": "d", "week": "w"}
+ROLLUP_COMPACTION_INTERVAL: Final[int] = 3600  # seconds between rollup compactions
+RETRAINING_INTERVAL: Final[int] = 3600  # seconds between retraining schedules
+RETRAINING_STAGGER: Final[int] = 30  # seconds between scheduled trainings
+# Celery queue of each task, consumed by separate worker pools (start_celery.sh)
+CELERY_TASK_QUEUES: Final[dict] = {
+    "async_tasks.process_file": "ingest",
+    "async_tasks.ingest_chunk": "ingest",
+    "async_tasks.finish_ingestion": "ingest",
+    "async_tasks.process_training": "train",
+    "async_tasks.compact_rollups": "maintenance",
+    "async_tasks.schedule_retraining": "maintenance",
+}
+# Rate limit of tasks, per worker. The chunks of a file are not limited, they
+# are fanned out by a single rate limited process_file.
+CELERY_TASK_RATE_LIMITS: Final[dict] = {
+    "async_tasks.process_file": "30/m",
+    "async_tasks.compact_rollups": "10/m",
+    "async_tasks.schedule_retraining": "10/m",
+}
+ASGI_MODEL_WORKERS: Final[int] = 4  # threads evaluating models in ASGI mode
+PROGRESS_PUBLISH_INTERVAL: Final[float] = 1.0  # seconds between progress events
+PROGRESS_KEEPALIVE_INTERVAL: Final[int] = 15  # seconds between idle SSE comments
+TIMESTAMP_CACHE_SIZE: Final[int] = 65536  # parsed timestamp strings kept
 
 SWAGGER_TEMPLATE: Final[str] = {
     "swagger": "2.0",
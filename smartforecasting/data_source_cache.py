@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Final
+
+from logging_config import logger
+from redis_memory import RedisHandler
+from structs.models import DataSource
+
+
+class DataSourceCache:
+    """
+    Process local snapshot of the data source registry.
+
+    Reads are plain dictionary lookups. The snapshot follows the registry
+    through the change messages published by RedisHandler ("<id>:<version>").
+    A gap in the versions, or a registry version that differs from the local
+    one when it is checked (at most every VERSION_CHECK_INTERVAL seconds),
+    triggers a full reload since pub/sub does not replay missed messages.
+    """
+
+    VERSION_CHECK_INTERVAL: Final[float] = 5.0
+
+    def __init__(self, redis_handler: RedisHandler):
+        self.redis_handler = redis_handler
+        self.data_sources: dict[int, dict] = {}
+        self.models: dict[int, DataSource] = {}
+        self.version = -1
+        self.last_version_check = 0.0
+        self.lock = threading.RLock()
+        self.pubsub_thread = None
+
+    def start(self):
+        """Load the snapshot and listen to the change channel in a daemon thread."""
+        self.reload()
+        pubsub = self.redis_handler.r_db.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{RedisHandler.DATA_SOURCE_CHANNEL: self._on_change})
+        self.pubsub_thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=self._on_error
+        )
+        logger.info(f"Data source cache started with {len(self.data_sources)} items")
+
+    def reload(self):
+        with self.lock:
+            version = self.redis_handler.get_version()
+            self.data_sources = {
+                data_source["id"]: data_source
+                for data_source in self.redis_handler.get_all_data_sources()
+            }
+            self.models = {}
+            self.version = version
+            self.last_version_check = time.monotonic()
+
+    def refresh(self, data_source_id: int):
+        """Reload a single data source from Redis."""
+        data_source = self.redis_handler.get_data_source(data_source_id)
+        with self.lock:
+            self.models.pop(data_source_id, None)
+            if data_source is None:
+                self.data_sources.pop(data_source_id, None)
+            else:
+                self.data_sources[data_source_id] = data_source
+
+    def _on_change(self, message):
+        data_source_id, version = map(int, message["data"].decode().split(":"))
+        with self.lock:
+            if version > self.version + 1:
+                logger.info(f"Missed data source changes before version {version}")
+                self.reload()
+                return
+
+            self.refresh(data_source_id)
+            self.version = max(self.version, version)
+
+    def _on_error(self, error, pubsub, thread):
+        logger.warning(f"Data source change listener error: {error}")
+        time.sleep(1)
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self.last_version_check < self.VERSION_CHECK_INTERVAL:
+            return
+
+        self.last_version_check = now
+        if self.redis_handler.get_version() != self.version:
+            self.reload()
+
+    @staticmethod
+    def _normalize_id(data_source_id) -> int | None:
+        try:
+            return int(data_source_id)
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, data_source_id) -> dict | None:
+        """
+        Get a data source dictionary by ID, or None if it does not exist.
+
+        :param data_source_id: ID of the data source (int or numeric string).
+        """
+        self._check_version()
+        return self.data_sources.get(self._normalize_id(data_source_id))
+
+    def get_model(self, data_source_id) -> DataSource | None:
+        """Same as `get` but returns the parsed DataSource, built once per change."""
+        data_source_id = self._normalize_id(data_source_id)
+        data_source = self.get(data_source_id)
+        if data_source is None:
+            return None
+
+        model = self.models.get(data_source_id)
+        if model is None:
+            model = self.models[data_source_id] = DataSource(**data_source)
+        return model
+
+    def all(self) -> list[dict]:
+        """All data sources ordered by ID."""
+        self._check_version()
+        return [self.data_sources[key] for key in sorted(self.data_sources)]
+
+    def add_data_source(self, data_source_dict: dict):
+        self.redis_handler.add_data_source(data_source_dict)
+        self.refresh(data_source_dict["id"])
+
+    def set_item(self, data_source_id, key, new_value):
+        self.redis_handler.set_item(data_source_id, key, new_value)
+        self.refresh(self._normalize_id(data_source_id))
+
+    def remove_data_source(self, data_source_id):
+        self.redis_handler.remove_data_source(data_source_id)
+        self.refresh(self._normalize_id(data_source_id))
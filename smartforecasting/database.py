@@ -1,5 +1,8 @@
 from datetime import date
 from datetime import datetime
+from typing import Iterator
+from typing import List
+from typing import Tuple
 
 import pandas as pd
 import psycopg2
@@ -8,6 +11,8 @@ from psycopg2 import OperationalError
 from psycopg2 import pool
 from psycopg2 import sql
 
+from constants import ROLLUP_BUCKETS
+from constants import STREAM_BATCH_SIZE
 from logging_config import logger
 from structs.models import DataPoint
 
@@ -64,6 +69,10 @@ class DatabaseHandler:
                 self.conn_pool.putconn(self.connection)
             else:
                 self.connection.close()
+
+        # The handler can be connected again, e.g. by the next task of a worker
+        self.cursor = None
+        self.connection = None
         logger.info("Disconnected from database and connection returned to pool.")
 
     def check_and_reconnect(self):
@@ -106,10 +115,16 @@ class DatabaseHandler:
             self.connection.rollback()
             raise e
 
-    def insert_dataframe(self, df: pd.DataFrame, ds_id: int):
+    def insert_dataframe(self, df: pd.DataFrame, ds_id: int) -> int:
+        """
+        Insert the (ts, value) rows of a DataFrame.
+
+        :return: The number of rows the database reported as inserted.
+        """
         logger.info(f"Inserting data for data source ID: {ds_id}")
 
         table_name = self.config["database"]["data-sources-table-name"]
+        inserted = 0
         for index, row in df.iterrows():
             # Create INSERT statement
             insert_statement = sql.SQL(
@@ -120,24 +135,36 @@ class DatabaseHandler:
             )
             # Execute INSERT statement
             self.execute_statement(insert_statement)
+            inserted += max(self.cursor.rowcount, 0)
+        return inserted
 
-    def add_data_point(self, data_point: DataPoint, ds_id: int):
+    def add_data_point(
+        self, data_point: DataPoint, ds_id: int, check_existing: bool = True
+    ):
+        """
+        Insert a datapoint unless one already exists at its timestamp.
+
+        :param check_existing: Query for an existing datapoint first. Callers
+            knowing the timestamp is new (e.g. from the ingestion index) skip it.
+        :return: 1 if the datapoint was inserted, 0 otherwise.
+        """
         logger.info(f"Inserting data for data source ID: {ds_id}")
 
         table_name = self.config["database"]["data-sources-table-name"]
 
         # First, check if a datapoint with the same ds_id and ts already exists
-        check_statement = sql.SQL(
-            "SELECT COUNT(*) FROM {} WHERE datasource_id = %s AND ts = %s"
-        ).format(sql.Identifier(table_name))
-        self.execute_statement(check_statement, (ds_id, data_point.ts))
-        count = self.cursor.fetchone()[0]
-
-        if count > 0:
-            logger.info(
-                f"Datapoint for data source ID: {ds_id} at timestamp: {data_point.ts} already exists. Skipping insertion."
-            )
-            return 0
+        if check_existing:
+            check_statement = sql.SQL(
+                "SELECT COUNT(*) FROM {} WHERE datasource_id = %s AND ts = %s"
+            ).format(sql.Identifier(table_name))
+            self.execute_statement(check_statement, (ds_id, data_point.ts))
+            count = self.cursor.fetchone()[0]
+
+            if count > 0:
+                logger.info(
+                    f"Datapoint for data source ID: {ds_id} at timestamp: {data_point.ts} already exists. Skipping insertion."
+                )
+                return 0
 
         # If no existing datapoint found, proceed with insertion
         insert_statement = sql.SQL(
@@ -352,6 +379,153 @@ class DatabaseHandler:
             logger.error(f"An error occurred while retrieving all data: {e}")
             return pd.DataFrame(columns=["ts", "value"])
 
+    def iter_rows(
+        self,
+        table_name: str,
+        columns: List[str],
+        ds_id: int,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        before: datetime | None = None,
+    ) -> Iterator[tuple]:
+        """
+        Yield the rows of a datasource from the newest to the oldest, holding at
+        most `batch_size` rows in memory. The first column must be `ts`.
+        `before` is an exclusive upper bound on ts (a keyset pagination cursor)
+        replacing the inclusive `end_date`.
+
+        QuestDB does not support named (DECLARE) cursors, so batches are read by
+        keyset on ts. Rows sharing the last ts of a full batch are read again
+        with the next batch, so none are lost when a batch ends inside a group.
+        A dedicated pooled connection keeps the shared cursor usable meanwhile.
+        """
+        logger.info(f"Streaming {table_name} rows for data source ID: {ds_id}")
+
+        connection = self.conn_pool.getconn()
+        try:
+            with connection.cursor() as cursor:
+                upper_bound, inclusive = (
+                    (before, False) if before is not None else (end_date, True)
+                )
+                while True:
+                    conditions = [sql.SQL("datasource_id = %s")]
+                    params = [ds_id]
+                    if start_date is not None:
+                        conditions.append(sql.SQL("ts >= %s"))
+                        params.append(start_date)
+                    if upper_bound is not None:
+                        conditions.append(
+                            sql.SQL("ts <= %s" if inclusive else "ts < %s")
+                        )
+                        params.append(upper_bound)
+
+                    select_statement = sql.SQL(
+                        "SELECT {columns} FROM {table} WHERE {conditions} "
+                        "ORDER BY ts DESC LIMIT %s"
+                    ).format(
+                        columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                        table=sql.Identifier(table_name),
+                        conditions=sql.SQL(" AND ").join(conditions),
+                    )
+                    cursor.execute(select_statement, params + [batch_size])
+                    rows = cursor.fetchall()
+
+                    if len(rows) < batch_size:
+                        yield from rows
+                        return
+
+                    last_ts = rows[-1][0]
+                    complete_rows = [row for row in rows if row[0] != last_ts]
+                    if complete_rows:
+                        yield from complete_rows
+                        upper_bound, inclusive = last_ts, True
+                    else:
+                        yield from rows
+                        upper_bound, inclusive = last_ts, False
+        finally:
+            self.conn_pool.putconn(connection)
+
+    def iter_data_points(
+        self,
+        ds_id: int,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        before: datetime | None = None,
+    ) -> Iterator[tuple]:
+        """Stream (ts, value) rows of a datasource, newest first."""
+        table_name = self.config["database"]["data-sources-table-name"]
+        return self.iter_rows(
+            table_name,
+            ["ts", "value"],
+            ds_id,
+            start_date,
+            end_date,
+            batch_size,
+            before,
+        )
+
+    def iter_forecasting_data(
+        self,
+        ds_id: int,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        before: datetime | None = None,
+    ) -> Iterator[tuple]:
+        """Stream (ts, algorithm, value) forecast rows of a datasource, newest first."""
+        table_name = self.config["database"]["forecasting-table-name"]
+        return self.iter_rows(
+            table_name,
+            ["ts", "algorithm", "value"],
+            ds_id,
+            start_date,
+            end_date,
+            batch_size,
+            before,
+        )
+
+    def get_data_fingerprints(self, ds_id: int | None = None) -> dict[int, str]:
+        """
+        Fingerprint the data of every datasource (or a single one) with one
+        aggregate query: row count, last ts and sum of the values as checksum.
+        Appended, deleted and updated points all change the fingerprint.
+
+        :return: Fingerprint per datasource ID, for datasources with data.
+        """
+        logger.info(f"Fingerprinting data for data source ID: {ds_id or 'all'}")
+
+        table_name = self.config["database"]["data-sources-table-name"]
+        select_statement = sql.SQL(
+            "SELECT datasource_id, count(), max(ts), sum(value) FROM {table}{where} "
+            "GROUP BY datasource_id"
+        ).format(
+            table=sql.Identifier(table_name),
+            where=sql.SQL(" WHERE datasource_id = %s" if ds_id is not None else ""),
+        )
+
+        try:
+            self.execute_statement(
+                select_statement, (ds_id,) if ds_id is not None else None
+            )
+            return {
+                datasource_id: f"{count}:{max_ts.isoformat()}:{checksum!r}"
+                for datasource_id, count, max_ts, checksum in self.cursor.fetchall()
+            }
+        except Exception as e:
+            logger.error(f"An error occurred while fingerprinting data: {e}")
+            return {}
+
+    def get_head_timestamps(self, ds_id: int, limit: int) -> List[datetime]:
+        """Latest `limit` timestamps of a datasource, newest first."""
+        table_name = self.config["database"]["data-sources-table-name"]
+        statement = sql.SQL(
+            "SELECT ts FROM {} WHERE datasource_id = %s ORDER BY ts DESC LIMIT %s"
+        ).format(sql.Identifier(table_name))
+        self.execute_statement(statement, (ds_id, limit))
+        return [row[0] for row in self.cursor.fetchall()]
+
     def get_latest_data_points(self, datasource_id: int, lags: int) -> pd.DataFrame:
         logger.info(
             f"Retrieving latest {lags} data points for data source ID: {datasource_id}"
@@ -489,3 +663,356 @@ class DatabaseHandler:
         except Exception as e:
             logger.error(f"An error occurred while retrieving all data: {e}")
             return pd.DataFrame(columns=["ts", "algorithm", "value"])
+
+    def joined_data_query(
+        self,
+        ds_id: int,
+        algorithms: dict,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> Tuple[sql.Composed, list]:
+        """
+        Build the query joining the data points of a datasource with the
+        forecasts of each algorithm, as one row per ts with the columns ts,
+        value and one column per algorithm (truncated to integers).
+
+        QuestDB has no FULL OUTER JOIN nor PIVOT, so both tables are stacked with
+        UNION ALL, each forecast in the column of its algorithm, then grouped by
+        ts. The range is applied to both tables before grouping.
+
+        :param algorithms: Response column name of each algorithm.
+        :return: The query and its parameters.
+        """
+        conditions = [sql.SQL("datasource_id = %s")]
+        params = [ds_id]
+        if start_date is not None:
+            conditions.append(sql.SQL("ts >= %s"))
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append(sql.SQL("ts <= %s"))
+            params.append(end_date)
+        where = sql.SQL(" AND ").join(conditions)
+
+        data_table = self.config["database"]["data-sources-table-name"]
+        forecasting_table = self.config["database"]["forecasting-table-name"]
+        null_column = sql.SQL("CAST(NULL AS DOUBLE)")
+        columns = [sql.Identifier(f"column_{i}") for i in range(len(algorithms))]
+        data_statement = sql.SQL("SELECT ts, value, {nulls} FROM {table} WHERE {where}")
+        forecasting_statement = sql.SQL(
+            "SELECT ts, {null}, {forecasts} FROM {table} WHERE {where}"
+        )
+
+        select_statement = sql.SQL(
+            "SELECT ts, max(value) AS value, {aggregates} FROM ("
+            "{data} UNION ALL {forecasting}) GROUP BY ts"
+        ).format(
+            aggregates=sql.SQL(", ").join(
+                sql.SQL("CAST(max({column}) AS LONG) AS {name}").format(
+                    column=column, name=sql.Identifier(name)
+                )
+                for column, name in zip(columns, algorithms.values())
+            ),
+            data=data_statement.format(
+                nulls=sql.SQL(", ").join(
+                    sql.SQL("{null} AS {column}").format(
+                        null=null_column, column=column
+                    )
+                    for column in columns
+                ),
+                table=sql.Identifier(data_table),
+                where=where,
+            ),
+            forecasting=forecasting_statement.format(
+                null=null_column,
+                forecasts=sql.SQL(", ").join(
+                    sql.SQL("CASE WHEN algorithm = {algorithm} THEN value END").format(
+                        algorithm=sql.Literal(algorithm)
+                    )
+                    for algorithm in algorithms
+                ),
+                table=sql.Identifier(forecasting_table),
+                where=where,
+            ),
+        )
+        return select_statement, params + params
+
+    def get_joined_data_summary(
+        self,
+        ds_id: int,
+        algorithms: dict,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> Tuple[datetime | None, datetime | None, int]:
+        """
+        Summarize the joined data of a datasource without reading its rows.
+
+        :return: The first and last ts of the whole datasource and the number of
+            timestamps within the range.
+        """
+        logger.info(f"Summarizing joined data for data source ID: {ds_id}")
+
+        # The bounds only need the designated timestamps of both tables, and the
+        # count the join of the range, so the whole history is never grouped
+        bounds_statement = sql.SQL(
+            "SELECT min(first_ts), max(last_ts) FROM ("
+            "SELECT min(ts) AS first_ts, max(ts) AS last_ts FROM {data} "
+            "WHERE datasource_id = %s UNION ALL "
+            "SELECT min(ts), max(ts) FROM {forecasting} WHERE datasource_id = %s)"
+        ).format(
+            data=sql.Identifier(self.config["database"]["data-sources-table-name"]),
+            forecasting=sql.Identifier(
+                self.config["database"]["forecasting-table-name"]
+            ),
+        )
+        joined_statement, params = self.joined_data_query(
+            ds_id, algorithms, start_date, end_date
+        )
+        count_statement = sql.SQL("SELECT count(*) FROM ({joined})").format(
+            joined=joined_statement
+        )
+
+        try:
+            self.execute_statement(bounds_statement, (ds_id, ds_id))
+            first_ts, last_ts = self.cursor.fetchone()
+            self.execute_statement(count_statement, params)
+            (total_items,) = self.cursor.fetchone()
+            return first_ts, last_ts, total_items or 0
+        except Exception as e:
+            logger.error(f"An error occurred while summarizing joined data: {e}")
+            raise e
+
+    def get_joined_data(
+        self,
+        ds_id: int,
+        algorithms: dict,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        lo: int = 0,
+        hi: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Read the joined data of a datasource, newest first, as a frame with the
+        columns ts, value and one column per algorithm.
+
+        :param lo: Index of the first row to return.
+        :param hi: Index after the last row to return, None for all the rows.
+        """
+        logger.info(f"Retrieving joined data for data source ID: {ds_id}")
+
+        joined_statement, params = self.joined_data_query(
+            ds_id, algorithms, start_date, end_date
+        )
+        select_statement = sql.SQL("{joined} ORDER BY ts DESC").format(
+            joined=joined_statement
+        )
+        if hi is not None:
+            # QuestDB's LIMIT lo, hi returns the rows lo (inclusive) to hi (exclusive)
+            select_statement += sql.SQL(" LIMIT %s, %s")
+            params += [lo, hi]
+
+        columns = ["ts", "value", *algorithms.values()]
+        try:
+            self.execute_statement(select_statement, params)
+            return pd.DataFrame(self.cursor.fetchall(), columns=columns)
+        except Exception as e:
+            logger.error(f"An error occurred while retrieving joined data: {e}")
+            raise e
+
+    def create_rollups_table(self):
+        logger.info(f"Creating rollups table")
+
+        table_name = self.config["database"]["rollups-table-name"]
+        create_statement = f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                datasource_id INT NOT NULL,
+                bucket varchar NOT NULL,
+                ts TIMESTAMP NOT NULL,
+                value_sum DOUBLE PRECISION NOT NULL,
+                value_count LONG NOT NULL,
+                value_min DOUBLE PRECISION NOT NULL,
+                value_max DOUBLE PRECISION NOT NULL
+            );
+        """
+
+        try:
+            self.execute_statement(create_statement)
+        except Exception as e:
+            logger.error(f"An error occurred while creating the table: {e}")
+
+    def insert_rollups(self, df: pd.DataFrame, ds_id: int):
+        """
+        Append the partial aggregates of newly ingested (ts, value) rows.
+
+        Rollup tables are append-only: a bucket may hold several partial rows
+        until `rebuild_rollups` compacts them, and reads combine them with
+        sum/min/max, which only touches the precomputed rows.
+        """
+        df = df.dropna(subset=["value"])
+        if df.empty:
+            return
+        logger.info(f"Updating rollups for data source ID: {ds_id}")
+
+        table_name = self.config["database"]["rollups-table-name"]
+        timestamps = pd.to_datetime(df["ts"])
+        rows = []
+        for bucket in ROLLUP_BUCKETS:
+            partials = (
+                df["value"]
+                .astype(float)
+                .groupby(bucket_start(timestamps, bucket))
+                .agg(["sum", "count", "min", "max"])
+            )
+            rows.extend(
+                [ds_id, bucket, ts.to_pydatetime(), total, int(count), low, high]
+                for ts, (total, count, low, high) in zip(
+                    partials.index, partials.values.tolist()
+                )
+            )
+
+        insert_statement = sql.SQL(
+            "INSERT INTO {} (datasource_id, bucket, ts, value_sum, value_count, "
+            "value_min, value_max) VALUES {}"
+        ).format(
+            sql.Identifier(table_name),
+            sql.SQL(", ").join(
+                sql.SQL("({})").format(sql.SQL(", ").join(map(sql.Literal, row)))
+                for row in rows
+            ),
+        )
+        try:
+            self.execute_statement(insert_statement)
+        except Exception as e:
+            logger.error(f"An error occurred while updating the rollups: {e}")
+
+    def get_rollups(
+        self,
+        ds_id: int,
+        bucket: str,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        from_raw: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Aggregate a datasource per bucket, from the rollup table or, when its
+        rollups are stale (`from_raw`), directly from the raw data points.
+
+        :return: DataFrame with ts, sum, mean, min, max and count per bucket.
+        """
+        logger.info(f"Retrieving {bucket} rollups for data source ID: {ds_id}")
+
+        if from_raw:
+            table_name = self.config["database"]["data-sources-table-name"]
+            source = sql.SQL(
+                "(SELECT timestamp_floor({unit}, ts) AS ts, value AS value_sum, "
+                "1 AS value_count, value AS value_min, value AS value_max "
+                "FROM {table} WHERE datasource_id = %s AND value IS NOT NULL)"
+            ).format(
+                unit=sql.Literal(ROLLUP_BUCKETS[bucket]),
+                table=sql.Identifier(table_name),
+            )
+            params = [ds_id]
+        else:
+            table_name = self.config["database"]["rollups-table-name"]
+            source = sql.SQL(
+                "(SELECT * FROM {table} WHERE datasource_id = %s AND bucket = %s)"
+            ).format(table=sql.Identifier(table_name))
+            params = [ds_id, bucket]
+
+        # The range applies to the bucket starts
+        conditions = []
+        if start_date is not None:
+            conditions.append(sql.SQL("ts >= %s"))
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append(sql.SQL("ts <= %s"))
+            params.append(end_date)
+        where = (
+            sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+            if conditions
+            else sql.SQL("")
+        )
+
+        select_statement = sql.SQL(
+            "SELECT ts, sum(value_sum), sum(value_count), min(value_min), "
+            "max(value_max) FROM {source}{where} GROUP BY ts ORDER BY ts"
+        ).format(source=source, where=where)
+
+        try:
+            self.execute_statement(select_statement, params)
+            result = self.cursor.fetchall()
+
+            df = pd.DataFrame(result, columns=["ts", "sum", "count", "min", "max"])
+            df["mean"] = df["sum"] / df["count"]
+            return df[["ts", "sum", "mean", "min", "max", "count"]]
+        except Exception as e:
+            logger.error(f"An error occurred while retrieving rollups: {e}")
+            return pd.DataFrame(columns=["ts", "sum", "mean", "min", "max", "count"])
+
+    def rebuild_rollups(self) -> int:
+        """
+        Compact the rollup table by recomputing one row per bucket from the raw
+        data points, which also drops the buckets of updated or deleted points.
+
+        :return: 1 if successful, -1 if an error occurs.
+        """
+        logger.info("Rebuilding rollups")
+
+        table_name = self.config["database"]["rollups-table-name"]
+        temp_table_name = f"{table_name}_temp"
+        data_table_name = self.config["database"]["data-sources-table-name"]
+
+        bucket_statements = [
+            sql.SQL(
+                """
+                SELECT datasource_id, {bucket} AS bucket, ts,
+                    sum(value) AS value_sum, count(*) AS value_count,
+                    min(value) AS value_min, max(value) AS value_max
+                FROM (
+                    SELECT datasource_id, timestamp_floor({unit}, ts) AS ts, value
+                    FROM {data_table} WHERE value IS NOT NULL
+                ) GROUP BY datasource_id, ts
+                """
+            ).format(
+                bucket=sql.Literal(bucket),
+                unit=sql.Literal(unit),
+                data_table=sql.Identifier(data_table_name),
+            )
+            for bucket, unit in ROLLUP_BUCKETS.items()
+        ]
+
+        try:
+            # Same table swap as the deletions: build, drop, then rename
+            create_temp_table_sql = sql.SQL(
+                "CREATE TABLE {temp_table} AS ({buckets})"
+            ).format(
+                temp_table=sql.Identifier(temp_table_name),
+                buckets=sql.SQL(" UNION ALL ").join(bucket_statements),
+            )
+            self.execute_statement(create_temp_table_sql)
+
+            drop_original_table_sql = sql.SQL("DROP TABLE {main_table}").format(
+                main_table=sql.Identifier(table_name)
+            )
+            self.execute_statement(drop_original_table_sql)
+
+            rename_temp_table_sql = sql.SQL(
+                "RENAME TABLE {temp_table} TO {main_table}"
+            ).format(
+                temp_table=sql.Identifier(temp_table_name),
+                main_table=sql.Identifier(table_name),
+            )
+            self.execute_statement(rename_temp_table_sql)
+
+            return 1
+        except Exception as e:
+            logger.error(f"An error occurred while rebuilding rollups: {e}")
+            self.connection.rollback()
+            return -1
+
+
+def bucket_start(timestamps: pd.Series, bucket: str) -> pd.Series:
+    """Start of the rollup bucket of each timestamp, like QuestDB's timestamp_floor."""
+    if bucket == "week":
+        # timestamp_floor('w', ...) starts weeks on Monday
+        return timestamps.dt.to_period("W-SUN").dt.start_time
+    return timestamps.dt.floor({"hour": "h", "day": "D"}[bucket])
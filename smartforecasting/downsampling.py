@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select `threshold` points of a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept and the inner points are split into
+    `threshold - 2` buckets. From each bucket, the point forming the largest
+    triangle with the previously selected point and the average point of the
+    next bucket is kept. Bucket averages and triangle areas are computed with
+    NumPy, so the Python loop only runs once per bucket.
+
+    :param x: Increasing x values (e.g. epoch-ms timestamps).
+    :param y: Values, without NaN.
+    :param threshold: Maximum number of points to keep.
+    :return: Indices of the selected points, in increasing order.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket b holds the inner points edges[b] <= i < edges[b + 1]
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    counts = np.diff(edges)
+    average_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    average_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+
+    # Third vertex of each bucket: the average of the next one, or the last point
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs(
+            (x[previous] - next_x[bucket]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def lttb(x, y, threshold: int):
+    """
+    Downsample a series with LTTB, ignoring missing (NaN) values.
+
+    :return: The selected x and y values as lists.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    present = ~np.isnan(y)
+    x, y = x[present], y[present]
+
+    indices = lttb_indices(x, y, threshold)
+    return x[indices].tolist(), y[indices].tolist()
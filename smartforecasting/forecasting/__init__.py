@@ -0,0 +1,4 @@
+# Import the strategies so that they register themselves in the ForecastRegistry
+from forecasting import auto_regression
+from forecasting import baselines
+from forecasting import exponential_smoothing
@@ -1,15 +1,17 @@
-import json
 from typing import Final
 
 import numpy as np
 import pandas as pd
 from statsmodels.tsa.ar_model import AutoReg
 
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+from forecasting.correlation import find_best_lag_pacf
+from forecasting.intervals import ar_psi_weights
 from forecasting.models import ForecastRegistry
 from forecasting.models import ForecastStrategy
 from forecasting.utility import add_time
 from forecasting.utility import auto_stationary
-from forecasting.utility import find_best_lag_pvalues
 from forecasting.utility import generate_range_datetime
 from forecasting.utility import make_stationary
 from forecasting.utility import reconstruct_series_from_stationary
@@ -23,7 +25,7 @@ class AutoRegression(ForecastStrategy):
     stationary: bool = False
     model_params = None
 
-    def train(self, data, frequency="1D"):
+    def train(self, data, frequency="1D", token: CancellationToken | None = None):
         logger.info("Training Data with Auto Regression ...")
         original_data = data.copy()
 
@@ -43,21 +45,23 @@ class AutoRegression(ForecastStrategy):
         data = data.reset_index(drop=True)
 
         if self.stationary:
-            stationary_data, nb_diffs = auto_stationary(data["value"])
+            stationary_data, nb_diffs = auto_stationary(data["value"], token)
             stationary_data = pd.concat(
                 [pd.Series([data.iloc[0, -1]], index=[data.index[0]]), stationary_data]
             )
         else:
             stationary_data, nb_diffs = data["value"], 0
 
-        optimal_lag = find_best_lag_pvalues(stationary_data, self.MAX_LAGS)
+        optimal_lag = find_best_lag_pacf(stationary_data, self.MAX_LAGS, token=token)
         logger.info(optimal_lag)
 
+        check_cancelled(token)
         model = AutoReg(stationary_data, lags=optimal_lag).fit()
         self.model_params = [param for param in model.params]
         self.model_params.append(0)
 
-        self.vector_db.set(self.vector_id, json.dumps(self.model_params))
+        self.save_model_params()
+        self.save_residuals(model.resid)
 
         start_index = len(model.params)  # The index in df where the forecast starts
         end_index = len(data) - 1  # The index in df where the forecast ends
@@ -123,23 +127,23 @@ class AutoRegression(ForecastStrategy):
         if pd.Timestamp(date) < last_date:
             return None
 
-        # Initialize result and range for forecasting
+        # Initialize result and range for forecasting, the window holds the
+        # lags of the model (none for an order 0 model, forecasting its intercept)
         result = []
         end_range = add_time(date, frequency, steps)
+        window = len(self.model_params) - 2 + self.model_params[-1]
 
-        for index, timestamp in enumerate(
-            generate_range_datetime(last_date, end_range, frequency)
-        ):
+        for timestamp in generate_range_datetime(last_date, end_range, frequency):
             # Prepare stationary data
             if self.stationary:
                 stationary_data = make_stationary(
-                    data.iloc[index:, -1], lag=self.model_params[-1]
+                    data.iloc[len(data) - window :, -1], lag=self.model_params[-1]
                 )
                 forecast_value = self.__forecast_next_value(stationary_data) + float(
                     data.iloc[-1, -1]
                 )
             else:
-                stationary_data = data.iloc[index:, -1].values
+                stationary_data = data.iloc[len(data) - window :, -1].values
                 forecast_value = self.__forecast_next_value(stationary_data)
 
             # Append the forecasted value and update the dataset
@@ -149,12 +153,24 @@ class AutoRegression(ForecastStrategy):
 
         return data
 
+    def get_psi_weights(self, steps: int) -> np.ndarray | None:
+        """
+        Psi-weights of the fitted AR coefficients, integrated once when the model
+        was trained on differenced data.
+        """
+        if not self.model_params:
+            return None
+
+        psi = ar_psi_weights(self.model_params[1:-1], steps)
+        return np.cumsum(psi) if self.stationary else psi
+
     def get_nb_lags_needed(self) -> int:
         """
-        Calculate the number of lags required by the model.
+        Calculate the number of lags required by the model, at least the latest
+        datapoint which dates the forecast.
         """
         if not self.model_params:
             return -1
 
         # Number of lags is determined by the length of parameters and the lag indicator
-        return len(self.model_params) - 2 + self.model_params[-1]
+        return max(len(self.model_params) - 2 + self.model_params[-1], 1)
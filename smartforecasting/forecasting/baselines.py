@@ -0,0 +1,199 @@
+from abc import abstractmethod
+from typing import Final
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+from forecasting.models import ForecastRegistry
+from forecasting.models import ForecastStrategy
+from forecasting.utility import add_time
+from forecasting.utility import generate_range_datetime
+from forecasting.utility import get_seasonal_periods
+from forecasting.utility import regularize_series
+from logging_config import logger
+from structs.enums import ForecastModel
+
+
+class BaselineStrategy(ForecastStrategy):
+    """
+    Base class of the NumPy-only strategies: training is a single O(n) pass with
+    no optimizer and forecasting is a closed form over the horizon, which makes
+    them usable as cold-start models and as cheap baselines.
+    """
+
+    def train(self, data, frequency="1D", token: CancellationToken | None = None):
+        logger.info(f"Training Data with {type(self).__name__} ...")
+        original_data = data.copy()
+        data = regularize_series(data, frequency)
+        values = data["value"].to_numpy(dtype=float)
+
+        check_cancelled(token)
+        self.model_params, fitted = self.fit(
+            values, get_seasonal_periods(frequency, values) or 1
+        )
+        self.save_model_params()
+        self.save_residuals(values - fitted)
+        logger.info(f"model_params: {self.model_params}")
+
+        forecast_data = pd.DataFrame({"ts": data["ts"], "value": fitted}).dropna()
+        forecast_data = forecast_data[
+            forecast_data["ts"].isin(pd.to_datetime(original_data["ts"]))
+        ]
+        return forecast_data.reset_index(drop=True)
+
+    def forecast(
+        self, data: pd.DataFrame, date: str, steps: int = 1, frequency: str = "1D"
+    ) -> pd.DataFrame | None:
+        if self.model_params is None or data is None:
+            return None
+
+        # Ensure the date is not in the past
+        last_date = data["ts"].iloc[-1]
+        if pd.Timestamp(date) < last_date:
+            return None
+
+        timestamps = generate_range_datetime(
+            last_date, add_time(date, frequency, steps), frequency
+        )
+        forecast_data = pd.DataFrame(
+            {"ts": timestamps, "value": self.predict(len(timestamps))}
+        )
+        return pd.concat([data, forecast_data], ignore_index=True)
+
+    def get_nb_lags_needed(self) -> int:
+        return 1
+
+    @abstractmethod
+    def fit(self, values: np.ndarray, seasonal_periods: int) -> Tuple[dict, np.ndarray]:
+        """
+        Estimate the model parameters from a regular series.
+
+        Returns the JSON-serializable parameters and the one-step-ahead in-sample
+        predictions (NaN where the model has no prediction yet).
+        """
+        pass
+
+    @abstractmethod
+    def predict(self, steps: int) -> np.ndarray:
+        """Forecast the next `steps` values from the stored parameters."""
+        pass
+
+
+@ForecastRegistry.register(ForecastModel.SEASONAL_NAIVE)
+class SeasonalNaive(BaselineStrategy):
+    def fit(self, values, seasonal_periods):
+        fitted = np.full(len(values), np.nan)
+        fitted[seasonal_periods:] = values[:-seasonal_periods]
+        return {"last_season": values[-seasonal_periods:].tolist()}, fitted
+
+    def predict(self, steps):
+        return np.resize(np.asarray(self.model_params["last_season"]), steps)
+
+    def get_psi_weights(self, steps: int) -> np.ndarray | None:
+        if self.model_params is None:
+            return None
+
+        # Errors only propagate to the same position in the following seasons
+        seasonal_periods = len(self.model_params["last_season"])
+        return (np.arange(steps) % seasonal_periods == 0).astype(float)
+
+
+@ForecastRegistry.register(ForecastModel.DRIFT)
+class Drift(BaselineStrategy):
+    def fit(self, values, seasonal_periods):
+        slope = (values[-1] - values[0]) / (len(values) - 1) if len(values) > 1 else 0.0
+        fitted = np.full(len(values), np.nan)
+        fitted[1:] = values[:-1] + slope
+        return {"last_value": float(values[-1]), "slope": float(slope)}, fitted
+
+    def predict(self, steps):
+        horizon = np.arange(1, steps + 1)
+        return self.model_params["last_value"] + self.model_params["slope"] * horizon
+
+
+@ForecastRegistry.register(ForecastModel.MOVING_AVERAGE)
+class MovingAverage(BaselineStrategy):
+    WINDOW: Final[int] = 7
+
+    def fit(self, values, seasonal_periods):
+        window = min(
+            seasonal_periods if seasonal_periods > 1 else self.WINDOW, len(values)
+        )
+
+        # Rolling mean of the `window` previous values from a single cumulative sum
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
+        fitted = np.full(len(values), np.nan)
+        fitted[window:] = (cumulative[window:-1] - cumulative[: -window - 1]) / window
+        return {"mean": float(values[-window:].mean()), "window": window}, fitted
+
+    def predict(self, steps):
+        return np.full(steps, self.model_params["mean"])
+
+
+@ForecastRegistry.register(ForecastModel.THETA)
+class Theta(BaselineStrategy):
+    """
+    Theta method as simple exponential smoothing with drift equal to half the
+    slope of the linear trend (Hyndman & Billah, 2003).
+    """
+
+    ALPHA: Final[float] = 0.5
+
+    def fit(self, values, seasonal_periods):
+        slope = (
+            np.polyfit(np.arange(len(values)), values, 1)[0] if len(values) > 1 else 0.0
+        )
+        level = pd.Series(values).ewm(alpha=self.ALPHA, adjust=False).mean().to_numpy()
+
+        fitted = np.full(len(values), np.nan)
+        fitted[1:] = level[:-1] + slope / 2
+        params = {
+            "level": float(level[-1]),
+            "slope": float(slope),
+            "alpha": self.ALPHA,
+            "nobs": len(values),
+        }
+        return params, fitted
+
+    def predict(self, steps):
+        alpha = self.model_params["alpha"]
+        horizon = np.arange(1, steps + 1)
+        drift = (
+            horizon - 1 + 1 / alpha - (1 - alpha) ** self.model_params["nobs"] / alpha
+        )
+        return self.model_params["level"] + self.model_params["slope"] / 2 * drift
+
+
+@ForecastRegistry.register(ForecastModel.CROSTON)
+class Croston(BaselineStrategy):
+    """
+    Croston's method for intermittent demand: demand sizes and the intervals
+    between demands are smoothed separately and forecast as their ratio.
+    """
+
+    ALPHA: Final[float] = 0.1
+
+    def fit(self, values, seasonal_periods):
+        demand_indexes = np.flatnonzero(values)
+        if len(demand_indexes) == 0:
+            return {"rate": 0.0}, np.zeros(len(values))
+
+        sizes = values[demand_indexes]
+        intervals = np.diff(demand_indexes, prepend=-1)
+        smoothed_sizes = pd.Series(sizes).ewm(alpha=self.ALPHA, adjust=False).mean()
+        smoothed_intervals = (
+            pd.Series(intervals).ewm(alpha=self.ALPHA, adjust=False).mean()
+        )
+        rates = (smoothed_sizes / smoothed_intervals).to_numpy()
+
+        # Each estimate holds from the period after its demand until the next one
+        fitted = np.full(len(values), np.nan)
+        fitted[demand_indexes] = rates
+        fitted = pd.Series(fitted).ffill().shift(1).to_numpy()
+        return {"rate": float(rates[-1])}, fitted
+
+    def predict(self, steps):
+        return np.full(steps, self.model_params["rate"])
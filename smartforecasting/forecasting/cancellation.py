@@ -0,0 +1,65 @@
+import time
+from typing import Callable
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a model fit when its task was aborted or ran out of time."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation token threaded through model training.
+
+    Long running loops (optimizer iterations, lag search, stationarity
+    recursion) call `check()` which raises `TrainingCancelled` once the task is
+    aborted or the wall-clock budget is spent. The abort callback usually hits
+    the result backend, so it is polled at most every `poll_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        is_aborted: Callable[[], bool] | None = None,
+        budget: float | None = None,
+        poll_interval: float = 0.5,
+    ):
+        self.is_aborted = is_aborted
+        self.deadline = time.monotonic() + budget if budget else None
+        self.poll_interval = poll_interval
+        self.last_poll = 0.0
+        self.aborted = False
+
+    def with_budget(self, budget: float | None) -> "CancellationToken":
+        """
+        Create a token sharing the abort callback with its own wall-clock budget,
+        e.g. one per trained model. The parent deadline still applies.
+        """
+        token = CancellationToken(self.is_aborted, budget, self.poll_interval)
+        if self.deadline is not None:
+            token.deadline = min(token.deadline or self.deadline, self.deadline)
+        return token
+
+    def check(self):
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            raise TrainingCancelled("Time budget exceeded")
+
+        if self.is_aborted and now - self.last_poll >= self.poll_interval:
+            self.last_poll = now
+            self.aborted = self.is_aborted()
+
+        if self.aborted:
+            raise TrainingCancelled("Task aborted")
+
+    def __call__(self, *args, **kwargs):
+        """Allow the token to be used directly as an optimizer callback."""
+        self.check()
+
+
+def check_cancelled(token: CancellationToken | None):
+    """Check an optional token."""
+    if token is not None:
+        token.check()
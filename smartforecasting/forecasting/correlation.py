@@ -0,0 +1,133 @@
+from statistics import NormalDist
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+
+
+def acf(values, nlags: int) -> np.ndarray:
+    """
+    Sample autocorrelation up to `nlags` computed with the FFT in O(n log n).
+
+    The series is zero-padded to at least twice its length so that the circular
+    correlation computed by the FFT equals the linear one.
+    """
+    x = np.asarray(values, dtype=float)
+    x = x - x.mean()
+    nlags = min(nlags, len(x) - 1)
+
+    size = 1 << (2 * len(x) - 1).bit_length()
+    spectrum = np.fft.rfft(x, n=size)
+    autocovariance = np.fft.irfft(spectrum * np.conj(spectrum), n=size)[: nlags + 1]
+
+    if autocovariance[0] == 0:
+        return np.zeros(nlags + 1)
+    return autocovariance / autocovariance[0]
+
+
+def durbin_levinson(
+    autocorrelation: np.ndarray, token: CancellationToken | None = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the Durbin-Levinson recursion on an autocorrelation sequence.
+
+    Returns the partial autocorrelations (pacf[0] = 1) and the coefficients of
+    the Yule-Walker AR model of the highest order. The token is checked before
+    every order.
+    """
+    nlags = len(autocorrelation) - 1
+    pacf_values = np.zeros(nlags + 1)
+    pacf_values[0] = 1.0
+    phi = np.zeros(0)
+    variance = 1.0
+
+    for k in range(1, nlags + 1):
+        check_cancelled(token)
+
+        # Perfectly predictable series: the remaining partial correlations are 0
+        if variance <= 0:
+            break
+
+        numerator = autocorrelation[k] - phi @ autocorrelation[k - 1 : 0 : -1]
+        reflection = numerator / variance
+        phi = np.concatenate([phi - reflection * phi[::-1], [reflection]])
+        variance *= 1 - reflection**2
+        pacf_values[k] = reflection
+
+    return pacf_values, phi
+
+
+def pacf(values, nlags: int, token: CancellationToken | None = None) -> np.ndarray:
+    """Sample partial autocorrelation up to `nlags` (Durbin-Levinson on the FFT ACF)."""
+    return durbin_levinson(acf(values, nlags), token)[0]
+
+
+def significance_bound(nobs: int, significance_level: float = 0.05) -> float:
+    """Large sample bound above which an (P)ACF value is significantly non-zero."""
+    return NormalDist().inv_cdf(1 - significance_level / 2) / np.sqrt(nobs)
+
+
+def find_best_lag_pacf(
+    values,
+    max_lag: int,
+    significance_level: float = 0.05,
+    token: CancellationToken | None = None,
+) -> int:
+    """
+    Select the AR order as the number of leading significant partial autocorrelations.
+
+    The order grows while the new lag is significant, without refitting one
+    model per candidate lag.
+    """
+    partial = pacf(values, max_lag, token)[1:]
+    insignificant = np.abs(partial) < significance_bound(
+        len(values), significance_level
+    )
+    return int(np.argmax(insignificant)) if insignificant.any() else len(partial)
+
+
+def detect_seasonal_periods(
+    values, max_period: int | None = None, significance_level: float = 0.05
+) -> List[int]:
+    """
+    Detect seasonal periods as the significant local maxima of the ACF.
+
+    The series is differenced once so that a trend does not hide the seasonal
+    peaks. Periods are capped at a third of the series (and at `max_period`),
+    and each ACF value is tested at `significance_level` divided by the number
+    of tested lags (Bonferroni), so that white noise yields no period.
+
+    A period is kept if it has multiples up to the cap and they are significant
+    too, which rules out isolated spikes. Periods are returned from the shortest, so the
+    fundamental period comes before its multiples.
+    """
+    x = np.diff(np.asarray(values, dtype=float))
+    max_period = min(max_period or len(x) // 3, len(x) // 3)
+    if max_period < 2:
+        return []
+
+    autocorrelation = acf(x, max_period + 1)
+    bound = significance_bound(len(x), significance_level / max_period)
+    lags = np.arange(2, len(autocorrelation) - 1)
+    peaks = (
+        (autocorrelation[lags] > autocorrelation[lags - 1])
+        & (autocorrelation[lags] >= autocorrelation[lags + 1])
+        & (autocorrelation[lags] > bound)
+    )
+
+    def is_significant(lag: int) -> bool:
+        # One lag of tolerance, for periods that are not a whole number of steps
+        return autocorrelation[lag - 1 : lag + 2].max() > bound
+
+    return [
+        int(period)
+        for period in lags[peaks]
+        if 2 * period <= max_period
+        and all(
+            is_significant(multiple)
+            for multiple in range(2 * period, max_period + 1, period)
+        )
+    ]
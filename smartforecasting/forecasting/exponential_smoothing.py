@@ -1,8 +1,13 @@
-import json
+import time
+from typing import Final
 
-from pandas import pd
+import numpy as np
+import pandas as pd
 from statsmodels.tsa.holtwinters import ExponentialSmoothing as ES
 
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+from forecasting.intervals import holt_winters_psi_weights
 from forecasting.models import ForecastRegistry
 from forecasting.models import ForecastStrategy
 from forecasting.utility import add_time
@@ -14,7 +19,13 @@ from structs.enums import ForecastModel
 
 @ForecastRegistry.register(ForecastModel.EXPONENTIAL_SMOOTHING)
 class ExponentialSmoothing(ForecastStrategy):
-    def train(self, data, frequency="1D"):
+    # Seed the optimizer with the parameters of the previous fit
+    WARM_START: bool = True
+    # Refit only the most recent points when few points were added since then
+    WARM_START_WINDOW: Final[int] = 1000
+    WARM_START_MAX_CHANGE: Final[float] = 0.05
+
+    def train(self, data, frequency="1D", token: CancellationToken | None = None):
         logger.info("Training Data with Exponential smoothing ...")
         original_data = data.copy()
         data.index = data["ts"]
@@ -32,28 +43,75 @@ class ExponentialSmoothing(ForecastStrategy):
         # Step 3: Interpolate or impute missing values
         data["value"] = data["value"].fillna(0.0)
 
-        model = ES(
-            data["value"],
+        # Fall back to a non-seasonal model when no period can be detected
+        check_cancelled(token)
+        seasonal_periods = get_seasonal_periods(frequency, data["value"])
+
+        previous_params = self.model_params if self.WARM_START else None
+        fit_data = self.__select_fit_window(data, previous_params, seasonal_periods)
+        es_model = ES(
+            fit_data["value"],
             trend="add",
-            seasonal="add",
+            seasonal="add" if seasonal_periods else None,
             freq=frequency,
-            seasonal_periods=get_seasonal_periods(frequency),
-        ).fit()
+            seasonal_periods=seasonal_periods,
+        )
+        start_params = self.__warm_start_params(
+            es_model, previous_params, seasonal_periods, fit_data["ts"].iloc[0]
+        )
+
+        # The token is called on every optimizer iteration
+        check_cancelled(token)
+        fit_start_time = time.perf_counter()
+        model = es_model.fit(
+            start_params=start_params,
+            minimize_kwargs={"callback": token} if token else None,
+        )
+        fit_stats = {
+            "warm_start": start_params is not None,
+            "nobs": len(fit_data),
+            "iterations": getattr(model.mle_retvals, "nit", None),
+            "fit_time": time.perf_counter() - fit_start_time,
+        }
         logger.info(f"Freq: {model.model.seasonal_periods}")
 
+        # Keep the stats of the last full fit to measure what warm starts save
+        cold_fit_stats = (
+            previous_params.get("cold_fit_stats")
+            if start_params is not None and previous_params
+            else fit_stats
+        )
+        self.__log_fit_savings(fit_stats, cold_fit_stats)
+
         self.model_params = {
             "alpha": model.params["smoothing_level"],
             "beta": model.params["smoothing_trend"],
-            "gamma": model.params["smoothing_seasonal"],
+            "gamma": model.params["smoothing_seasonal"] if seasonal_periods else 0.0,
             "last_level": model.level.iloc[-1],
             "last_trend": model.trend.iloc[-1],
-            "last_season": model.season.iloc[-model.model.seasonal_periods :].tolist(),
+            "last_season": (
+                model.season.iloc[-seasonal_periods:].tolist()
+                if seasonal_periods
+                else [0.0]
+            ),
+            "initial_level": model.params["initial_level"],
+            "initial_trend": model.params["initial_trend"],
+            "initial_season": (
+                np.asarray(model.params["initial_seasons"]).tolist()
+                if seasonal_periods
+                else []
+            ),
+            "fit_start": str(fit_data["ts"].iloc[0]),
+            "fit_end": str(fit_data["ts"].iloc[-1]),
+            "fit_stats": fit_stats,
+            "cold_fit_stats": cold_fit_stats,
         }
-        self.vector_db.set(self.vector_id, json.dumps(self.model_params))
+        self.save_model_params()
+        self.save_residuals(model.resid)
         logger.info(f"model_params: {self.model_params}")
 
         start_index = 0  # The index in df where the forecast starts
-        end_index = len(data) - 1  # The index in df where the forecast ends
+        end_index = len(fit_data) - 1  # The index in df where the forecast ends
 
         forecast = model.predict(start=start_index, end=end_index)
 
@@ -68,6 +126,66 @@ class ExponentialSmoothing(ForecastStrategy):
         logger.info(f"forecast_data: {forecast_data}")
         return forecast_data
 
+    def __select_fit_window(
+        self, data: pd.DataFrame, previous_params: dict | None, seasonal_periods
+    ) -> pd.DataFrame:
+        """
+        Keep only the most recent points when the previous fit covers all but a
+        small fraction of the series. The window holds at least 4 seasons.
+        """
+        if not previous_params or "fit_end" not in previous_params:
+            return data
+
+        window = max(self.WARM_START_WINDOW, 4 * (seasonal_periods or 0))
+        new_points = (data["ts"] > pd.Timestamp(previous_params["fit_end"])).sum()
+        if len(data) <= window or new_points > self.WARM_START_MAX_CHANGE * len(data):
+            return data
+
+        logger.info(f"Refitting the last {window} points ({new_points} new points)")
+        return data.iloc[-window:]
+
+    def __warm_start_params(
+        self, es_model: ES, previous_params: dict | None, seasonal_periods, fit_start
+    ) -> list | None:
+        """
+        Build the optimizer start vector (alpha, beta, gamma, initial level, initial
+        trend, initial seasons) from the previous fit. The stored initial states are
+        only reused when the fit starts at the same timestamp, otherwise the
+        heuristic initial values of the new window are used.
+        """
+        if not previous_params or "initial_level" not in previous_params:
+            return None
+        if len(previous_params["initial_season"]) != (seasonal_periods or 0):
+            return None
+
+        if previous_params["fit_start"] == str(fit_start):
+            level, trend, season = (
+                previous_params["initial_level"],
+                previous_params["initial_trend"],
+                previous_params["initial_season"],
+            )
+        else:
+            level, trend, season = es_model.initial_values(force=True)
+
+        smoothing = [previous_params["alpha"], previous_params["beta"]]
+        if seasonal_periods:
+            smoothing.append(previous_params["gamma"])
+        return smoothing + [level, trend] + list(season)
+
+    def __log_fit_savings(self, fit_stats: dict, cold_fit_stats: dict | None):
+        logger.info(f"Fit stats: {fit_stats}")
+        if not fit_stats["warm_start"] or not cold_fit_stats:
+            return
+
+        time_saved = cold_fit_stats["fit_time"] - fit_stats["fit_time"]
+        iterations_saved = (cold_fit_stats["iterations"] or 0) - (
+            fit_stats["iterations"] or 0
+        )
+        logger.info(
+            f"Warm start saved {time_saved:.4f}s and {iterations_saved} optimizer "
+            "iterations compared to the last full fit"
+        )
+
     def update_model_params(self, model_params, new_data_point, trend_type="additive"):
         logger.info("Start updating model parameters:")
         alpha = model_params["alpha"]
@@ -139,5 +257,17 @@ class ExponentialSmoothing(ForecastStrategy):
         data = data[data["value"] != 0.0]
         return data
 
+    def get_psi_weights(self, steps: int) -> np.ndarray | None:
+        if self.model_params is None:
+            return None
+
+        return holt_winters_psi_weights(
+            self.model_params["alpha"],
+            self.model_params["beta"],
+            self.model_params["gamma"],
+            len(self.model_params["last_season"]),
+            steps,
+        )
+
     def get_nb_lags_needed(self) -> int:
         return 1
@@ -0,0 +1,88 @@
+from statistics import NormalDist
+from typing import Dict
+from typing import Sequence
+
+import numpy as np
+
+
+def quantile_label(quantile: float) -> str:
+    """Format a quantile as the key used in responses (0.1 -> 'p10')."""
+    return f"p{quantile * 100:g}"
+
+
+def ar_psi_weights(coefficients: Sequence[float], steps: int) -> np.ndarray:
+    """
+    Compute the MA(infinity) psi-weights of an AR(p) process.
+
+    psi_0 = 1 and psi_j = sum_{i=1..p} phi_i * psi_{j-i}, truncated to `steps` terms.
+    """
+    phi = np.asarray(coefficients, dtype=float)
+    psi = np.zeros(steps)
+    psi[0] = 1.0
+    for j in range(1, steps):
+        k = min(j, len(phi))
+        psi[j] = phi[:k] @ psi[j - 1 :: -1][:k]
+    return psi
+
+
+def holt_winters_psi_weights(
+    alpha: float, beta: float, gamma: float, seasonal_periods: int, steps: int
+) -> np.ndarray:
+    """
+    Compute the error propagation weights of additive Holt-Winters.
+
+    Follows the ETS(A,A,A) state space form: c_0 = 1 and
+    c_j = alpha + j * alpha * beta + gamma * [j % m == 0] for j >= 1, where
+    alpha * beta is the trend smoothing of the error correction form.
+
+    :param beta: Trend smoothing of the Holt-Winters recursions (statsmodels'
+        `smoothing_trend`).
+    """
+    j = np.arange(steps, dtype=float)
+    psi = alpha * (1 + j * beta)
+    if seasonal_periods:
+        psi += gamma * (j % seasonal_periods == 0)
+    psi[0] = 1.0
+    return psi
+
+
+def analytic_quantiles(
+    point: np.ndarray, variance: np.ndarray, quantiles: Sequence[float]
+) -> Dict[str, np.ndarray]:
+    """Gaussian quantiles around a point forecast given its h-step variance."""
+    std = np.sqrt(np.maximum(variance, 0.0))
+    return {quantile_label(q): point + NormalDist().inv_cdf(q) * std for q in quantiles}
+
+
+def bootstrap_quantiles(
+    point: np.ndarray,
+    residuals: np.ndarray,
+    quantiles: Sequence[float],
+    psi: np.ndarray | None = None,
+    n_paths: int = 2000,
+    seed: int | None = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Empirical quantiles from N simulated residual paths.
+
+    Residuals are resampled into an (N x h) shock matrix and propagated through
+    the psi-weights with a single matrix product, so the cost does not depend on
+    calling the model's forecast loop once per path. Without psi-weights the
+    shocks accumulate like a random walk. The residuals are centered first so
+    that a biased fit does not shift the median away from the point forecast.
+    """
+    steps = len(point)
+    if psi is None:
+        psi = np.ones(steps)
+
+    rng = np.random.default_rng(seed)
+    residuals = np.asarray(residuals, dtype=float)
+    shocks = rng.choice(residuals - residuals.mean(), size=(n_paths, steps))
+
+    # Lower triangular Toeplitz matrix: propagation[i, j] = psi[i - j] for i >= j
+    offsets = np.subtract.outer(np.arange(steps), np.arange(steps))
+    propagation = np.where(offsets >= 0, psi[np.clip(offsets, 0, None)], 0.0)
+
+    paths = point + shocks @ propagation.T
+    values = np.quantile(paths, quantiles, axis=0)
+    return {quantile_label(q): value for q, value in zip(quantiles, values)}
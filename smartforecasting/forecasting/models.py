@@ -3,24 +3,38 @@ from abc import ABC
 from abc import abstractmethod
 from datetime import date
 from datetime import datetime
+from typing import Dict
+from typing import Final
 from typing import List
+from typing import Sequence
 
+import numpy as np
 import pandas as pd
 
+from forecasting.cancellation import CancellationToken
+from forecasting.intervals import analytic_quantiles
+from forecasting.intervals import bootstrap_quantiles
 from logging_config import logger
 from redis_memory import RedisHandler
 from structs.enums import ForecastModel
 
 
 class ForecastContext:
-    def __init__(self, algorithm_type: ForecastModel, datasource_id: int):
+    def __init__(
+        self, algorithm_type: ForecastModel, datasource_id: int, persist: bool = True
+    ):
         logger.info(algorithm_type)
         self.model = ForecastRegistry.get_model(
-            algorithm_type, f"{datasource_id}_{algorithm_type.name}"
+            algorithm_type, f"{datasource_id}_{algorithm_type.name}", persist
         )
 
-    def train(self, data: pd.DataFrame, frequency="1D"):
-        return self.model.train(data, frequency)
+    def train(
+        self,
+        data: pd.DataFrame,
+        frequency="1D",
+        token: CancellationToken | None = None,
+    ):
+        return self.model.train(data, frequency, token)
 
     def forecast(
         self,
@@ -28,29 +42,55 @@ class ForecastContext:
         date: date | datetime,
         steps: int = 1,
         frequency: str = "1D",
+        quantiles: Sequence[float] | None = None,
     ) -> pd.DataFrame | None:
-        return self.model.forecast(data, date, steps, frequency)
+        result = self.model.forecast(data, date, steps, frequency)
+        if result is None or data is None or not quantiles:
+            return result
+        return self.model.add_prediction_intervals(
+            result, data["ts"].iloc[-1], quantiles
+        )
 
     def set_model_params(self, model_params: list | None):
         self.model.set_model_params(model_params)
 
+    def has_model_params(self) -> bool:
+        """Whether the model was fitted, now or by an earlier training."""
+        return self.model.model_params is not None
+
 
 class ForecastStrategy(ABC):
-    def __init__(self, vector_id: str) -> None:
+    RESIDUALS_SAMPLE_SIZE: Final[int] = 1000
+    BOOTSTRAP_PATHS: Final[int] = 2000
+
+    def __init__(self, vector_id: str, persist: bool = True) -> None:
+        """
+        :param vector_id: Redis key of the model parameters
+        :param persist: False to fit and forecast in memory only, e.g. for the
+            cold start baseline of an untrained data source, so that nothing is
+            read from or written to the key of a trained model
+        """
         self.vector_id = vector_id
-        redis_handler = RedisHandler()
-        self.vector_db = redis_handler.r_db
-        vector_str = self.vector_db.get(vector_id)
+        self.persist = persist
+        self.residuals = None
+        self.model_params = None
         logger.info(vector_id)
-        if vector_str is not None:
-            self.model_params = json.loads(vector_str)
-        else:
-            self.model_params = None
+        if persist:
+            self.vector_db = RedisHandler.shared().r_db
+            vector_str = self.vector_db.get(vector_id)
+            if vector_str is not None:
+                self.model_params = json.loads(vector_str)
 
         logger.info(self.model_params)
 
     @abstractmethod
-    def train(self, data, frequency="1D") -> List[float]:
+    def train(
+        self, data, frequency="1D", token: CancellationToken | None = None
+    ) -> List[float]:
+        """
+        Fit the model. Long running steps must call `token.check()` so that
+        aborts and time budgets take effect while fitting.
+        """
         pass
 
     @abstractmethod
@@ -64,6 +104,78 @@ class ForecastStrategy(ABC):
     def set_model_params(self, model_params: list | None):
         self.model_params = model_params
 
+    def save_model_params(self) -> None:
+        """Store the fitted parameters, unless the model lives in memory only."""
+        if self.persist:
+            self.vector_db.set(self.vector_id, json.dumps(self.model_params))
+
+    def get_psi_weights(self, steps: int) -> np.ndarray | None:
+        """
+        Error propagation weights of the fitted model for the next `steps` values.
+        Strategies without an analytic form return None and fall back to bootstrapping.
+        """
+        return None
+
+    def save_residuals(self, residuals) -> None:
+        """
+        Store the most recent in-sample residuals next to the model parameters.
+        """
+        residuals = np.asarray(residuals, dtype=float)
+        residuals = residuals[~np.isnan(residuals)][-self.RESIDUALS_SAMPLE_SIZE :]
+        self.residuals = residuals
+        if self.persist:
+            self.vector_db.set(
+                f"{self.vector_id}_residuals", json.dumps(residuals.tolist())
+            )
+
+    def load_residuals(self) -> np.ndarray | None:
+        if not self.persist:
+            return self.residuals
+        residuals_str = self.vector_db.get(f"{self.vector_id}_residuals")
+        if residuals_str is None:
+            return None
+        return np.asarray(json.loads(residuals_str), dtype=float)
+
+    def prediction_intervals(
+        self, point: np.ndarray, quantiles: Sequence[float]
+    ) -> Dict[str, np.ndarray] | None:
+        """
+        Compute forecast quantiles around the point forecast `point`.
+
+        Uses the analytic h-step variance sigma^2 * sum(psi_j^2) when the strategy
+        provides psi-weights, otherwise a vectorized residual bootstrap.
+        """
+        residuals = self.load_residuals()
+        if residuals is None or len(residuals) == 0 or len(point) == 0:
+            return None
+
+        psi = self.get_psi_weights(len(point))
+        if psi is not None:
+            variance = np.mean(residuals**2) * np.cumsum(psi**2)
+            return analytic_quantiles(point, variance, quantiles)
+
+        return bootstrap_quantiles(
+            point, residuals, quantiles, n_paths=self.BOOTSTRAP_PATHS
+        )
+
+    def add_prediction_intervals(
+        self, result: pd.DataFrame, last_date, quantiles: Sequence[float]
+    ) -> pd.DataFrame:
+        """
+        Add one column per quantile to the forecasted rows (those after `last_date`).
+        """
+        horizon = result["ts"] > pd.Timestamp(last_date)
+        intervals = self.prediction_intervals(
+            result.loc[horizon, "value"].to_numpy(dtype=float), quantiles
+        )
+        if intervals is None:
+            return result
+
+        result = result.copy()
+        for label, values in intervals.items():
+            result.loc[horizon, label] = values
+        return result
+
 
 class ForecastRegistry:
     registry = {}
@@ -77,8 +189,8 @@ class ForecastRegistry:
         return inner_wrapper
 
     @classmethod
-    def get_model(cls, model_type: ForecastModel, vector_id: str):
+    def get_model(cls, model_type: ForecastModel, vector_id: str, persist: bool = True):
         model_class = cls.registry.get(model_type)
         if not model_class:
             raise ValueError(f"No algorithm registered for {model_type}")
-        return model_class(vector_id)
+        return model_class(vector_id, persist)
@@ -2,9 +2,12 @@ from typing import List
 
 import numpy as np
 import pandas as pd
-from statsmodels.tsa.ar_model import AutoReg
 from statsmodels.tsa.stattools import adfuller
 
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+from forecasting.correlation import detect_seasonal_periods
+
 
 def generate_range_datetime(start_date_str, end_date_str, frequency):
     # Convert strings to pandas datetime objects
@@ -15,6 +18,22 @@ def generate_range_datetime(start_date_str, end_date_str, frequency):
     return pd.date_range(start=start_date, end=end_date, freq=frequency)[1:]
 
 
+def regularize_series(data: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    Reindex a (ts, value) DataFrame on a complete datetime range with the given
+    frequency, filling the missing values with 0.
+    """
+    data = data.set_index(pd.to_datetime(data["ts"]))
+    full_index = pd.date_range(
+        start=data.index.min(), end=data.index.max(), freq=frequency
+    )
+
+    data = data.reindex(full_index)
+    data["ts"] = data.index
+    data["value"] = data["value"].fillna(0.0)
+    return data.reset_index(drop=True)
+
+
 def add_time(base_date, frequency, steps=1):
     """
     Add time to a base date based on the specified frequency and steps.
@@ -48,18 +67,36 @@ def add_time(base_date, frequency, steps=1):
         raise ValueError(f"Unsupported frequency: {frequency}")
 
 
-def get_seasonal_periods(frequency: str):
+def get_seasonal_periods(frequency: str, values=None) -> int | None:
+    """
+    Get the seasonal period of a series with the given frequency.
+
+    When the values are given, the shortest period detected from the ACF, up to
+    twice the calendar period, is used and the calendar period (day for
+    sub-daily data, week for daily data, year for weekly and monthly data) is
+    the fallback. Returns None if the series is
+    too short to hold two full cycles.
+    """
     freq_type = frequency[
         -1
     ]  # Get the last character, which indicates the frequency type
     freq_value = int(frequency[:-1])  # Get the numeric value of the frequency
 
-    if freq_type == "T":
-        return 1440 // freq_value
-    elif freq_type == "H":
-        return 24 // freq_value
-    else:
-        return None
+    calendar_periods = {"T": 1440, "H": 24, "D": 7, "W": 52, "M": 12}
+    seasonal_periods = calendar_periods.get(freq_type, 0) // freq_value or None
+
+    if values is None:
+        return seasonal_periods
+
+    detected_periods = detect_seasonal_periods(
+        values, 2 * seasonal_periods if seasonal_periods else None
+    )
+    if detected_periods:
+        return detected_periods[0]
+
+    if seasonal_periods and len(values) >= 2 * seasonal_periods:
+        return seasonal_periods
+    return None
 
 
 def make_stationary(time_series, method="difference", lag=1):
@@ -85,16 +122,19 @@ def make_stationary(time_series, method="difference", lag=1):
     return stationary_series
 
 
-def auto_stationary(series: pd.Series) -> List:
+def auto_stationary(series: pd.Series, token: CancellationToken | None = None) -> List:
     """
     Convert a time series to a stationary series by performing differencing if necessary.
 
     Args:
         series (pd.Series): The input time series data.
+        token (CancellationToken | None): Checked before every stationarity test.
 
     Returns:
         List: A list where the first element is the stationary series and the second element is the number of differences applied.
     """
+    check_cancelled(token)
+
     # Perform the Augmented Dickey-Fuller test to check for stationarity
     result = adfuller(series)
 
@@ -106,7 +146,7 @@ def auto_stationary(series: pd.Series) -> List:
         # Series is non-stationary, perform differencing
         diff_series = series.diff().dropna()
         # Recursively apply differencing until stationarity is achieved
-        result = auto_stationary(diff_series)
+        result = auto_stationary(diff_series, token)
         result[1] += 1  # Increment the count of differences applied
         return result
 
@@ -133,15 +173,3 @@ def reconstruct_series_from_stationary(
 
     return series
 
-
-def find_best_lag_pvalues(data, max_lag, significance_level=0.05):
-    best_lag = 0
-    for lag in range(1, max_lag + 1):
-        model = AutoReg(data, lags=lag)
-        model_fitted = model.fit()
-        pvalues = model_fitted.pvalues[1:]  # Exclude the intercept p-value
-        if all(p < significance_level for p in pvalues):
-            best_lag = lag
-        else:
-            break
-    return best_lag
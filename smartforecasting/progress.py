@@ -0,0 +1,77 @@
+import time
+from typing import Final
+
+from constants import PROGRESS_PUBLISH_INTERVAL
+from redis_memory import RedisHandler
+
+# Task states after which no more progress is published
+FINAL_STATES: Final[frozenset] = frozenset({"SUCCESS", "FAILURE", "ABORTED", "REVOKED"})
+
+
+class TaskProgress:
+    """
+    Progress reporter of a multi-model training task.
+
+    Updates are cheap and can be reported as often as needed: an event (percent,
+    rows/s, ETA, current model) is only published to the task channel, and
+    stored as the task state for `/status` polling, at most every
+    `interval` seconds. Model changes and the final state are always published.
+    """
+
+    def __init__(
+        self,
+        task,
+        redis_handler: RedisHandler,
+        total_models: int,
+        interval: float = PROGRESS_PUBLISH_INTERVAL,
+    ):
+        self.task = task
+        self.redis_handler = redis_handler
+        self.total_models = max(total_models, 1)
+        self.interval = interval
+        self.start_time = time.monotonic()
+        self.last_publish = float("-inf")
+        self.model_index = 0
+        self.model = None
+        self.rows = 0
+
+    def start_model(self, model_index: int, model: str):
+        self.model_index, self.model = model_index, model
+        self.publish(force=True)
+
+    def update(self, rows: int, fraction: float = 0.0):
+        """
+        Report processed rows and how far the current model is, from 0 to 1.
+        """
+        self.rows += rows
+        self.publish(fraction)
+
+    def event(self, fraction: float = 0.0) -> dict:
+        elapsed = time.monotonic() - self.start_time
+        done = min((self.model_index + fraction) / self.total_models, 1.0)
+        return {
+            "status": "PROGRESS",
+            "percent": round(done * 100, 1),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "eta_seconds": round(elapsed * (1 - done) / done, 1) if done > 0 else None,
+            "current_model": self.model,
+            "model_index": self.model_index,
+            "total_models": self.total_models,
+        }
+
+    def publish(self, fraction: float = 0.0, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_publish < self.interval:
+            return
+
+        self.last_publish = now
+        event = self.event(fraction)
+        self.task.update_state(state="PROGRESS", meta=event)
+        self.redis_handler.task_progress.publish(self.task.request.id, event)
+
+    def finish(self, state: str, result=None):
+        """Publish the final state, which ends the event streams of the task."""
+        self.redis_handler.task_progress.publish(
+            self.task.request.id,
+            {"status": state, "result": None if result is None else str(result)},
+        )
@@ -0,0 +1,67 @@
+from typing import Final
+
+import redis
+
+
+class TrainedFingerprints:
+    """
+    Data fingerprint of each data source at its last successful training, and
+    the claims of the retrainings scheduled since its data changed.
+    """
+
+    KEY: Final[str] = "trained_fingerprints"
+    RETRAINING_SCHEDULED_KEY_PREFIX: Final[str] = "retraining_scheduled:"
+
+    def __init__(self, r_db: redis.Redis):
+        self.r_db = r_db
+
+    def get_all(self) -> dict[int, str]:
+        """Data fingerprint of each data source at its last successful training."""
+        return {
+            int(data_source_id): fingerprint.decode()
+            for data_source_id, fingerprint in self.r_db.hgetall(self.KEY).items()
+        }
+
+    def set(self, data_source_id, fingerprint: str):
+        """Record the data a data source was trained on and clear its schedule."""
+        pipeline = self.r_db.pipeline()
+        pipeline.hset(self.KEY, data_source_id, fingerprint)
+        pipeline.delete(f"{self.RETRAINING_SCHEDULED_KEY_PREFIX}{data_source_id}")
+        pipeline.execute()
+
+    def seed(self, fingerprints: dict[int, str]):
+        """
+        Record the fingerprints of data sources trained before fingerprints
+        existed, without overwriting one set by a training in the meantime.
+        """
+        if not fingerprints:
+            return
+        pipeline = self.r_db.pipeline()
+        for data_source_id, fingerprint in fingerprints.items():
+            pipeline.hsetnx(self.KEY, data_source_id, fingerprint)
+        pipeline.execute()
+
+    def delete(self, data_source_id, pipeline=None):
+        """
+        Forget the training of a removed data source.
+
+        :param pipeline: Pipeline to queue the deletion in, instead of running it.
+        """
+        (pipeline or self.r_db).hdel(self.KEY, data_source_id)
+
+    def schedule_retraining(self, data_source_id, fingerprint: str, ttl: int) -> bool:
+        """
+        Claim the retraining of a data source, so it is not enqueued again while
+        a training is waiting in the queue (that training reads the latest data
+        anyway). The claim expires after `ttl` seconds in case it fails.
+
+        :return: False if a retraining is already scheduled.
+        """
+        return bool(
+            self.r_db.set(
+                f"{self.RETRAINING_SCHEDULED_KEY_PREFIX}{data_source_id}",
+                fingerprint,
+                nx=True,
+                ex=ttl,
+            )
+        )
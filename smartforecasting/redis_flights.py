@@ -0,0 +1,160 @@
+import json
+from typing import Final
+from typing import List
+from typing import Tuple
+
+import redis
+
+from constants import TRAINING_MODEL_TIME_BUDGET
+from structs.enums import ForecastModel
+
+# KEYS: flight. ARGV: models (JSON), task ID, timeout
+CLAIM_SCRIPT: Final[str] = """
+local function merge(field)
+    local models = cjson.decode(redis.call('HGET', KEYS[1], field) or '[]')
+    local seen = {}
+    for _, model in ipairs(models) do seen[model] = true end
+    for _, model in ipairs(cjson.decode(ARGV[1])) do
+        if not seen[model] then
+            table.insert(models, model)
+            seen[model] = true
+        end
+    end
+    local encoded = cjson.encode(models)
+    redis.call('HSET', KEYS[1], field, encoded)
+    return encoded
+end
+
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state then
+    redis.call(
+        'HSET', KEYS[1], 'state', 'pending', 'task_id', ARGV[2], 'models', ARGV[1]
+    )
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return {'new', ARGV[2], ARGV[1]}
+elseif state == 'pending' then
+    return {'merged', redis.call('HGET', KEYS[1], 'task_id'), merge('models')}
+end
+
+local followup = redis.call('HGET', KEYS[1], 'followup_task_id')
+if not followup then
+    followup = ARGV[2]
+    redis.call('HSET', KEYS[1], 'followup_task_id', followup)
+end
+return {'followup', followup, merge('followup_models')}
+"""
+
+# KEYS: flight. ARGV: task ID, timeout
+START_SCRIPT: Final[str] = """
+if redis.call('HGET', KEYS[1], 'task_id') ~= ARGV[1] then return false end
+redis.call('HSET', KEYS[1], 'state', 'running')
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return redis.call('HGET', KEYS[1], 'models')
+"""
+
+# KEYS: flight. ARGV: task ID, timeout
+REFRESH_SCRIPT: Final[str] = """
+if redis.call('HGET', KEYS[1], 'task_id') ~= ARGV[1] then return 0 end
+return redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+# KEYS: flight. ARGV: task ID, timeout
+FINISH_SCRIPT: Final[str] = """
+if redis.call('HGET', KEYS[1], 'task_id') ~= ARGV[1] then return false end
+local followup = redis.call('HGET', KEYS[1], 'followup_task_id')
+local models = redis.call('HGET', KEYS[1], 'followup_models')
+redis.call('DEL', KEYS[1])
+if not followup then return false end
+
+redis.call('HSET', KEYS[1], 'state', 'pending', 'task_id', followup, 'models', models)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return {followup, models}
+"""
+
+
+class TrainingFlights:
+    """
+    Single-flight trainings: at most one training per data source is queued or
+    running. Its flight is a hash holding its task ID, its state (pending or
+    running) and the requested models.
+    """
+
+    KEY_PREFIX: Final[str] = "training_flight:"
+    # Longest training (every model using its whole time budget) plus the
+    # forecast inserts, the flight is also refreshed at each model
+    TIMEOUT: Final[int] = len(ForecastModel) * TRAINING_MODEL_TIME_BUDGET + 3600
+
+    def __init__(self, r_db: redis.Redis):
+        self.r_db = r_db
+        self._claim_script = r_db.register_script(CLAIM_SCRIPT)
+        self._start_script = r_db.register_script(START_SCRIPT)
+        self._refresh_script = r_db.register_script(REFRESH_SCRIPT)
+        self._finish_script = r_db.register_script(FINISH_SCRIPT)
+
+    def key(self, data_source_id) -> str:
+        return f"{self.KEY_PREFIX}{data_source_id}"
+
+    def claim(
+        self, data_source_id, models: List[str], task_id: str
+    ) -> Tuple[str, str, List[str]]:
+        """
+        Single-flight entry of a training request:
+
+        - without a flight, a pending one is created for `task_id` ("new"), and
+          the caller must enqueue that task;
+        - a pending flight absorbs the request, its models are merged into the
+          ones the queued task will train ("merged");
+        - a running flight records the request as a single follow-up run, which
+          the running task enqueues when it finishes ("followup").
+
+        The flight expires after TIMEOUT in case a worker dies.
+
+        :return: The outcome, the ID of the task training the models and the
+            models it will train.
+        """
+        outcome, flight_task_id, flight_models = self._claim_script(
+            keys=[self.key(data_source_id)],
+            args=[json.dumps(models), task_id, self.TIMEOUT],
+        )
+        return outcome.decode(), flight_task_id.decode(), json.loads(flight_models)
+
+    def start(self, data_source_id, task_id: str) -> List[str] | None:
+        """
+        Mark the pending flight of `task_id` as running, so later requests are
+        coalesced into a follow-up run.
+
+        :return: The models to train, merged from all the absorbed requests, or
+            None if the task does not own the flight (e.g. it expired).
+        """
+        models = self._start_script(
+            keys=[self.key(data_source_id)], args=[task_id, self.TIMEOUT]
+        )
+        return json.loads(models) if models else None
+
+    def refresh(self, data_source_id, task_id: str) -> bool:
+        """
+        Extend the flight of `task_id` by TIMEOUT, so that it only expires when
+        the worker stops making progress.
+
+        :return: True if the task still owns the flight.
+        """
+        return bool(
+            self._refresh_script(
+                keys=[self.key(data_source_id)], args=[task_id, self.TIMEOUT]
+            )
+        )
+
+    def finish(self, data_source_id, task_id: str) -> Tuple[str, List[str]] | None:
+        """
+        End the flight of `task_id`. A recorded follow-up becomes the pending
+        flight, which the caller must enqueue.
+
+        :return: The task ID and the models of the follow-up run, if any.
+        """
+        followup = self._finish_script(
+            keys=[self.key(data_source_id)], args=[task_id, self.TIMEOUT]
+        )
+        if not followup:
+            return None
+        followup_task_id, models = followup
+        return followup_task_id.decode(), json.loads(models)
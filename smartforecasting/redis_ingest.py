@@ -0,0 +1,172 @@
+from typing import Final
+from typing import Tuple
+
+import numpy as np
+import redis
+
+from bloom import bloom_bitmap
+from bloom import bloom_positions
+from constants import INGEST_BLOOM_BITS
+from constants import INGEST_BLOOM_CAPACITY
+from constants import INGEST_BLOOM_HASHES
+
+# KEYS: index hash, Bloom filter. ARGV: timeout
+BEGIN_LOAD_SCRIPT: Final[str] = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('DEL', KEYS[2])
+redis.call('HSET', KEYS[1], 'loading', 1, 'count', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS: index hash, Bloom filter, temporary key. ARGV: watermark, floor, count,
+# bitmap
+LOAD_INDEX_SCRIPT: Final[str] = """
+if redis.call('HGET', KEYS[1], 'loading') ~= '1' then return 0 end
+redis.call('SET', KEYS[3], ARGV[4])
+redis.call('BITOP', 'OR', KEYS[2], KEYS[2], KEYS[3])
+redis.call('DEL', KEYS[3])
+local watermark = tonumber(redis.call('HGET', KEYS[1], 'watermark'))
+if not watermark or (tonumber(ARGV[1]) or -math.huge) > watermark then
+    redis.call('HSET', KEYS[1], 'watermark', ARGV[1])
+end
+redis.call('HSET', KEYS[1], 'floor', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'count', ARGV[3])
+redis.call('HDEL', KEYS[1], 'loading')
+redis.call('PERSIST', KEYS[1])
+return 1
+"""
+
+# KEYS: index hash, Bloom filter. ARGV: watermark, count, bit positions...
+RECORD_TIMESTAMPS_SCRIPT: Final[str] = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 3, #ARGV do redis.call('SETBIT', KEYS[2], ARGV[i], 1) end
+local watermark = tonumber(redis.call('HGET', KEYS[1], 'watermark'))
+if not watermark or tonumber(ARGV[1]) > watermark then
+    redis.call('HSET', KEYS[1], 'watermark', ARGV[1])
+end
+redis.call('HINCRBY', KEYS[1], 'count', ARGV[2])
+return 1
+"""
+
+
+class IngestIndex:
+    """
+    Ingestion index of each data source, skipping the existence query of new
+    datapoints: a watermark (latest stored epoch second) and a Bloom filter of
+    the stored timestamps from a floor.
+
+    Loading it from the database is not atomic: the index is marked as loading
+    before the latest timestamps are read, so that the datapoints inserted in
+    the meantime are recorded into it and merged by the load.
+    """
+
+    INDEX_KEY_PREFIX: Final[str] = "ingest_index:"
+    BLOOM_KEY_PREFIX: Final[str] = "ingest_bloom:"
+    LOAD_KEY_PREFIX: Final[str] = "ingest_bloom_load:"
+    # A loading index expires in case its request dies before loading it
+    LOAD_TIMEOUT: Final[int] = 60
+
+    def __init__(self, r_db: redis.Redis):
+        self.r_db = r_db
+        self._begin_load_script = r_db.register_script(BEGIN_LOAD_SCRIPT)
+        self._load_script = r_db.register_script(LOAD_INDEX_SCRIPT)
+        self._record_script = r_db.register_script(RECORD_TIMESTAMPS_SCRIPT)
+
+    def keys(self, data_source_id) -> Tuple[str, str]:
+        return (
+            f"{self.INDEX_KEY_PREFIX}{data_source_id}",
+            f"{self.BLOOM_KEY_PREFIX}{data_source_id}",
+        )
+
+    def get(self, data_source_id) -> dict | None:
+        """
+        Ingestion index of a data source: the watermark (latest stored epoch
+        second), and the floor from which the Bloom filter holds every stored
+        timestamp, -inf when it holds all of them.
+
+        :return: The index, or None if it is being loaded or must be (re)loaded
+            because it is missing or its filter is too full to be selective.
+        """
+        index_key, bloom_key = self.keys(data_source_id)
+        fields = self.r_db.hgetall(index_key)
+        if not fields or b"loading" in fields:
+            return None
+
+        index = {key.decode(): float(value) for key, value in fields.items()}
+        if index["count"] > INGEST_BLOOM_CAPACITY:
+            self.r_db.delete(index_key, bloom_key)
+            return None
+        return index
+
+    def begin_load(self, data_source_id) -> bool:
+        """
+        Mark a missing ingestion index as loading, before reading the latest
+        stored timestamps. The timestamps recorded from then on are kept.
+
+        :return: False if the index exists or another request is loading it.
+        """
+        return bool(
+            self._begin_load_script(
+                keys=self.keys(data_source_id), args=[self.LOAD_TIMEOUT]
+            )
+        )
+
+    def load(self, data_source_id, timestamps: np.ndarray, floor: float):
+        """
+        Merge the latest stored timestamps (epoch seconds), read after
+        `begin_load`, into the loading index. Nothing is loaded if the index
+        was reset or expired in the meantime.
+        """
+        watermark = timestamps.max() if len(timestamps) else float("-inf")
+        load_key = f"{self.LOAD_KEY_PREFIX}{data_source_id}"
+        self._load_script(
+            keys=[*self.keys(data_source_id), load_key],
+            args=[
+                repr(float(watermark)),
+                repr(float(floor)),
+                len(timestamps),
+                bloom_bitmap(timestamps, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES),
+            ],
+        )
+
+    def may_contain(self, data_source_id, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Check timestamps (epoch seconds) against the Bloom filter.
+
+        :return: A boolean array, False for the timestamps definitely absent.
+        """
+        positions = bloom_positions(timestamps, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+        # A single GET of the whole filter, the bits are looked up locally
+        _, bloom_key = self.keys(data_source_id)
+        bitmap = np.frombuffer(self.r_db.get(bloom_key) or b"", dtype=np.uint8)
+        bits = np.zeros(INGEST_BLOOM_BITS, dtype=bool)
+        bits[: len(bitmap) * 8] = np.unpackbits(bitmap)[:INGEST_BLOOM_BITS]
+        return bits[positions].all(axis=1)
+
+    def record(self, data_source_id, timestamps: np.ndarray):
+        """
+        Add inserted timestamps (epoch seconds) to the ingestion index, raising
+        its watermark, including an index being loaded. A missing index is left
+        to be loaded from the database, which then holds the timestamps.
+        """
+        if not len(timestamps):
+            return
+
+        positions = bloom_positions(timestamps, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+        self._record_script(
+            keys=self.keys(data_source_id),
+            args=[
+                repr(float(timestamps.max())),
+                len(timestamps),
+                *np.unique(positions).tolist(),
+            ],
+        )
+
+    def reset(self, data_source_id, pipeline=None):
+        """
+        Drop the ingestion index, e.g. after rows were inserted around it.
+
+        :param pipeline: Pipeline to queue the deletion in, instead of running it.
+        """
+        (pipeline or self.r_db).delete(*self.keys(data_source_id))
@@ -1,87 +1,210 @@
 import json
+from typing import Final
 
 import redis
 
 from logging_config import logger
+from redis_fingerprints import TrainedFingerprints
+from redis_flights import TrainingFlights
+from redis_ingest import IngestIndex
+from redis_progress import TaskProgressEvents
+from redis_rollups import RollupState
+
+# Bump the registry version and publish "<id>:<version>".
+# KEYS: version. ARGV: channel, data source ID
+NOTIFY_CHANGE_SCRIPT: Final[str] = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], ARGV[2] .. ':' .. version)
+return version
+"""
+
+# Only update fields that already exist so that a concurrent removal cannot
+# resurrect a partial data source. KEYS: data source. ARGV: field, value
+SET_ITEM_SCRIPT: Final[str] = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
 
 class RedisHandler:
+    """
+    Registry of the data sources and their data versions. The other state kept
+    in Redis is handled by its own component, sharing the connection pool:
+    rollups, ingest_index, fingerprints, flights and task_progress.
+    """
+
+    DATA_SOURCE_KEY_PREFIX: Final[str] = "data_source:"
+    DATA_SOURCE_IDS_KEY: Final[str] = "data_source_ids"
+    LEGACY_DATA_SOURCES_KEY: Final[str] = "data_sources"
+    DATA_SOURCE_VERSION_KEY: Final[str] = "data_source_version"
+    DATA_SOURCE_CHANNEL: Final[str] = "data_source_changes"
+    DATA_VERSION_KEY_PREFIX: Final[str] = "data_version:"
+
+    _shared: "RedisHandler | None" = None
+
     def __init__(self, host='localhost', port=6379, db=0):
         self.r_db = redis.Redis(host=host, port=port, db=db)
+        # Scripts run by SHA (EVALSHA), loaded once per server
+        self._notify_change_script = self.r_db.register_script(NOTIFY_CHANGE_SCRIPT)
+        self._set_item_script = self.r_db.register_script(SET_ITEM_SCRIPT)
+
+        self.rollups = RollupState(self.r_db)
+        self.ingest_index = IngestIndex(self.r_db)
+        self.fingerprints = TrainedFingerprints(self.r_db)
+        self.flights = TrainingFlights(self.r_db)
+        self.task_progress = TaskProgressEvents(self.r_db)
         logger.info('Redis instance has been initialized!')
 
+    @classmethod
+    def shared(cls) -> "RedisHandler":
+        """
+        Process wide handler reusing its connection pool, instead of a new
+        client per use. redis-py resets the pool in forked processes.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _data_source_key(self, data_source_id) -> str:
+        return f"{self.DATA_SOURCE_KEY_PREFIX}{data_source_id}"
+
+    def _data_version_key(self, data_source_id) -> str:
+        return f"{self.DATA_VERSION_KEY_PREFIX}{data_source_id}"
+
+    @staticmethod
+    def _decode_data_source(fields: dict) -> dict | None:
+        """Convert a hash of JSON encoded fields back to a data source dictionary."""
+        if not fields:
+            return None
+        return {key.decode(): json.loads(value) for key, value in fields.items()}
+
+    def _notify_change(self, pipeline, data_source_id):
+        """
+        Bump the registry version and publish "<id>:<version>" so that process
+        local caches can refresh that single entry and detect missed messages.
+        """
+        self._notify_change_script(
+            keys=[self.DATA_SOURCE_VERSION_KEY],
+            args=[self.DATA_SOURCE_CHANNEL, data_source_id],
+            client=pipeline,
+        )
+
+    def get_version(self) -> int:
+        """Version of the data source registry, bumped by every change."""
+        return int(self.r_db.get(self.DATA_SOURCE_VERSION_KEY) or 0)
+
     def add_data_source(self, data_source_dict):
         """
-        Add a data source to the Redis list.
+        Add a data source as a hash of JSON encoded fields and index its ID.
 
         :param data_source_dict: Dictionary containing the data source information.
         """
-        # Convert the dictionary to a JSON string
-        json_item = json.dumps(data_source_dict)
-        
-        # Append the JSON string to the Redis list
-        self.r_db.rpush('data_sources', json_item)
+        data_source_id = data_source_dict["id"]
+        fields = {key: json.dumps(value) for key, value in data_source_dict.items()}
+
+        # Write the hash and the index in a single transaction
+        pipeline = self.r_db.pipeline()
+        pipeline.hset(self._data_source_key(data_source_id), mapping=fields)
+        pipeline.sadd(self.DATA_SOURCE_IDS_KEY, data_source_id)
+        self._notify_change(pipeline, data_source_id)
+        pipeline.execute()
+
+    def get_data_source(self, data_source_id) -> dict | None:
+        """
+        Retrieve a single data source by its ID in O(1).
+
+        :param data_source_id: ID of the data source.
+        :return: The data source dictionary, or None if it does not exist.
+        """
+        return self._decode_data_source(
+            self.r_db.hgetall(self._data_source_key(data_source_id))
+        )
 
     def get_all_data_sources(self):
         """
-        Retrieve all data sources from the Redis list.
+        Retrieve all data sources with a single pipelined round trip.
 
-        :return: List of data source dictionaries.
+        :return: List of data source dictionaries ordered by ID.
         """
-        # Get all items from the Redis list
-        json_items = self.r_db.lrange('data_sources', 0, -1)
-        
-        # Convert JSON strings back to dictionaries
-        return [json.loads(item) for item in json_items]
+        data_source_ids = sorted(
+            int(i) for i in self.r_db.smembers(self.DATA_SOURCE_IDS_KEY)
+        )
+
+        pipeline = self.r_db.pipeline(transaction=False)
+        for data_source_id in data_source_ids:
+            pipeline.hgetall(self._data_source_key(data_source_id))
+
+        data_sources = map(self._decode_data_source, pipeline.execute())
+        return [data_source for data_source in data_sources if data_source]
 
-    def set_item(self, index, key, new_value):
+    def set_item(self, data_source_id, key, new_value):
         """
-        Update a specific key in a data source at the given index.
+        Atomically update a single field of a data source.
 
-        :param index: Index of the data source in the Redis list.
+        :param data_source_id: ID of the data source.
         :param key: Key to be updated in the data source.
         :param new_value: New value for the specified key.
-        :raises IndexError: If the data source is not found at the specified index.
-        :raises KeyError: If the specified key is not found in the data source.
-        """
-        # Get the item at the specified index
-        json_item = self.r_db.lindex('data_sources', index)
-        
-        if json_item is None:
-            raise IndexError("Data source not found at the specified index")
-        
-        # Convert JSON string to dictionary
-        data_source = json.loads(json_item)
-        
-        # Update the specified key with the new value
-        if key not in data_source:
-            raise KeyError(f"Key '{key}' not found in the data source")
-        
-        data_source[key] = new_value
-        
-        # Convert the updated dictionary back to a JSON string
-        updated_json_item = json.dumps(data_source)
-        
-        # Replace the item in the Redis list
-        self.r_db.lset('data_sources', index, updated_json_item)
-    
+        :raises KeyError: If the data source or the specified key is not found.
+        """
+        updated = self._set_item_script(
+            keys=[self._data_source_key(data_source_id)],
+            args=[key, json.dumps(new_value)],
+        )
+
+        if not updated:
+            raise KeyError(
+                f"Key '{key}' not found in the data source with ID {data_source_id}"
+            )
+
+        # Fields like training, initialized and trained change the served data
+        pipeline = self.r_db.pipeline()
+        pipeline.incr(self._data_version_key(data_source_id))
+        self._notify_change(pipeline, data_source_id)
+        pipeline.execute()
+
     def remove_data_source(self, data_source_id):
         """
-        Remove a data source from the Redis list based on its ID.
+        Remove a data source based on its ID.
 
         :param data_source_id: ID of the data source to be removed.
         :raises ValueError: If the data source with the given ID is not found.
         """
-        # Get all items from the Redis list
-        json_items = self.r_db.lrange('data_sources', 0, -1)
-        
-        # Find the index of the item with the specified ID
-        for index, json_item in enumerate(json_items):
-            data_source = json.loads(json_item)
-            
-            if data_source.get('id') == data_source_id:
-                # Remove the item from the Redis list
-                self.r_db.lrem('data_sources', 1, json_item)
-                logger.info(f"Removed data source with ID: {data_source_id}")
-                return
-        
-        raise ValueError(f"Data source with ID {data_source_id} not found.")
+        pipeline = self.r_db.pipeline()
+        pipeline.delete(self._data_source_key(data_source_id))
+        pipeline.srem(self.DATA_SOURCE_IDS_KEY, data_source_id)
+        self.fingerprints.delete(data_source_id, pipeline)
+        self.ingest_index.reset(data_source_id, pipeline)
+        pipeline.incr(self._data_version_key(data_source_id))
+        self._notify_change(pipeline, data_source_id)
+        deleted, *_ = pipeline.execute()
+
+        if not deleted:
+            raise ValueError(f"Data source with ID {data_source_id} not found.")
+        logger.info(f"Removed data source with ID: {data_source_id}")
+
+    def get_data_version(self, data_source_id) -> int:
+        """
+        Version of the data points and models of a data source. It only ever
+        increases, even across removal, so it can key HTTP caches.
+        """
+        return int(self.r_db.get(self._data_version_key(data_source_id)) or 0)
+
+    def bump_data_version(self, data_source_id) -> int:
+        """Mark the data points or models of a data source as changed."""
+        return self.r_db.incr(self._data_version_key(data_source_id))
+
+    def migrate_data_source_list(self):
+        """
+        Move the data sources of the legacy JSON list into per-ID hashes.
+        The list is only deleted once every data source has been written.
+        """
+        json_items = self.r_db.lrange(self.LEGACY_DATA_SOURCES_KEY, 0, -1)
+        if not json_items:
+            return
+
+        for json_item in json_items:
+            self.add_data_source(json.loads(json_item))
+
+        self.r_db.delete(self.LEGACY_DATA_SOURCES_KEY)
+        logger.info(f"Migrated {len(json_items)} data sources to Redis hashes")
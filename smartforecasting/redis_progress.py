@@ -0,0 +1,42 @@
+import json
+from typing import Final
+
+import redis
+
+
+class TaskProgressEvents:
+    """
+    Progress events of tasks: published on a channel per task, and the latest
+    one kept for the subscribers joining late and for `/status` polling.
+    """
+
+    KEY_PREFIX: Final[str] = "task_progress:"
+    CHANNEL_PREFIX: Final[str] = "task_progress_events:"
+    TTL: Final[int] = 86400
+
+    def __init__(self, r_db: redis.Redis):
+        self.r_db = r_db
+
+    @classmethod
+    def key(cls, task_id: str) -> str:
+        return f"{cls.KEY_PREFIX}{task_id}"
+
+    @classmethod
+    def channel(cls, task_id: str) -> str:
+        return f"{cls.CHANNEL_PREFIX}{task_id}"
+
+    def publish(self, task_id: str, event: dict):
+        """
+        Publish a progress event of a task and keep it as the latest one, since
+        pub/sub does not replay messages to subscribers joining late.
+        """
+        message = json.dumps(event)
+        pipeline = self.r_db.pipeline()
+        pipeline.set(self.key(task_id), message, ex=self.TTL)
+        pipeline.publish(self.channel(task_id), message)
+        pipeline.execute()
+
+    def get(self, task_id: str) -> dict | None:
+        """Latest progress event of a task, if any was published."""
+        message = self.r_db.get(self.key(task_id))
+        return json.loads(message) if message else None
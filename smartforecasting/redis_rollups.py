@@ -0,0 +1,62 @@
+from typing import Final
+
+import redis
+
+
+class RollupState:
+    """
+    Redis state of the rollup tables: the data sources whose partial rollups
+    are stale, and the flag of the periodic compaction rebuilding them.
+    """
+
+    STALE_KEY: Final[str] = "rollups_stale"
+    COMPACTED_STALE_KEY: Final[str] = "rollups_stale:compacting"
+    COMPACTING_KEY: Final[str] = "rollups_compacting"
+    COMPACTING_TIMEOUT: Final[int] = 3600
+
+    def __init__(self, r_db: redis.Redis):
+        self.r_db = r_db
+
+    def mark_stale(self, data_source_id):
+        """
+        Flag the rollups of a data source as stale until the next compaction,
+        e.g. after an update or a deletion that partial rollups cannot undo.
+        """
+        self.r_db.sadd(self.STALE_KEY, data_source_id)
+
+    def before_insert(self, data_source_id):
+        """
+        Must be called before appending partial rollups: rows appended while a
+        compaction is rebuilding the table would be lost by the table swap.
+        """
+        if self.r_db.exists(self.COMPACTING_KEY):
+            self.mark_stale(data_source_id)
+
+    def are_stale(self, data_source_id) -> bool:
+        pipeline = self.r_db.pipeline(transaction=False)
+        pipeline.sismember(self.STALE_KEY, data_source_id)
+        pipeline.sismember(self.COMPACTED_STALE_KEY, data_source_id)
+        return any(pipeline.execute())
+
+    def start_compaction(self) -> bool:
+        """
+        Flag a running compaction and move the stale data sources aside: the
+        rebuild fixes them, while those marked from now on stay stale.
+
+        :return: False if another compaction is running.
+        """
+        if not self.r_db.set(
+            self.COMPACTING_KEY, 1, nx=True, ex=self.COMPACTING_TIMEOUT
+        ):
+            return False
+        if self.r_db.exists(self.STALE_KEY):
+            self.r_db.rename(self.STALE_KEY, self.COMPACTED_STALE_KEY)
+        return True
+
+    def finish_compaction(self, succeeded: bool):
+        """Clear the compaction flag, keeping the stale data sources on failure."""
+        if not succeeded and self.r_db.exists(self.COMPACTED_STALE_KEY):
+            self.r_db.sunionstore(
+                self.STALE_KEY, [self.STALE_KEY, self.COMPACTED_STALE_KEY]
+            )
+        self.r_db.delete(self.COMPACTED_STALE_KEY, self.COMPACTING_KEY)
@@ -0,0 +1,50 @@
+import hashlib
+from functools import wraps
+
+from flask import jsonify
+from flask import make_response
+from flask import request
+
+from config import Config
+
+
+def make_etag(datasource_id, version: int, variant: str) -> str:
+    """
+    Build the ETag of a datasource response from its data version and a
+    digest of the variant (query string and negotiated format).
+    """
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+    return f"{datasource_id}-{version}-{digest}"
+
+
+def conditional_on_data_version(view):
+    """
+    Answer `If-None-Match` with 304 from the datasource data version, read from
+    Redis before the view runs, so unchanged payloads never reach the database.
+    Successful responses are tagged with the same ETag; a concurrent change
+    bumps the version, so the next request fetches the new payload.
+    Unknown datasources are answered with 404 whatever the ETag.
+    """
+
+    @wraps(view)
+    def wrapper(datasource_id, *args, **kwargs):
+        if Config.data_sources.get(datasource_id) is None:
+            return jsonify(error=f"No data source found with ID {datasource_id}"), 404
+
+        etag = make_etag(
+            datasource_id,
+            Config.redis_handler.get_data_version(datasource_id),
+            f"{request.full_path}|{request.headers.get('Accept', '')}",
+        )
+        if etag in request.if_none_match:
+            response = make_response("", 304)
+        else:
+            response = make_response(view(datasource_id, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.vary.add("Accept")
+        return response
+
+    return wrapper
@@ -1,20 +1,464 @@
+import heapq
+import json
 from datetime import datetime
-
+from itertools import chain
+from itertools import groupby
+from itertools import islice
+from operator import itemgetter
+from typing import Final
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 from flask import Blueprint
 from flask import jsonify
 from flask import request
+from flask import Response
 from pydantic import ValidationError
 
 from config import Config
 from constants import BASE_PATH
+from constants import CHART_MAX_POINTS
+from constants import INGEST_HEAD_ROWS
+from constants import ROLLUP_BUCKETS
+from constants import STREAM_BATCH_SIZE
+from constants import STREAM_CHUNK_ROWS
+from downsampling import lttb
 from logging_config import logger
+from routes.conditional import conditional_on_data_version
+from structs.enums import ForecastModel
 from structs.models import DataPoint
-from utility import find_data_source_by_id
-from utility import parse_date
+from structs.validation import validate_datapoints
+from timestamps import format_iso
+from timestamps import ISO_UTC_FORMAT
+from timestamps import parse_datetime
+from timestamps import to_epoch
+from utility import columnar_response
+from utility import decode_cursor
+from utility import encode_cursor
+from utility import frame_to_columns
+from utility import is_columnar_requested
+from utility import to_utc_timestamp
 
 bp = Blueprint("datapoints", __name__)
 
+# Response column of the forecasts of each algorithm
+FORECAST_COLUMNS: Final[dict] = {
+    "auto-regression": "AutoReg",
+    "exponential smoothing": "ExpSmoothing",
+    "seasonal-naive": "SeasonalNaive",
+    "drift": "Drift",
+    "moving-average": "MovingAverage",
+    "theta": "Theta",
+    "croston": "Croston",
+}
+STREAM_MIMETYPES: Final[dict] = {
+    "ndjson": "application/x-ndjson",
+    "json-stream": "application/json",
+}
+
+
+def serialize_frame(df: pd.DataFrame, columnar: bool = False) -> list | dict:
+    """Serialize a frame sorted by ts as records, or as columns with epoch-ms ts."""
+    if columnar:
+        return frame_to_columns(df)
+    df = df.assign(ts=format_iso(df["ts"]))
+    return df.to_dict(orient="records")
+
+
+def build_datapoints_payload(
+    datasource_id,
+    data_points_df: pd.DataFrame,
+    start_date,
+    end_date,
+    page,
+    per_page,
+    columnar: bool = False,
+) -> Tuple[dict, int]:
+    """
+    Filter, sort and paginate the data points of a datasource.
+
+    :param columnar: Return the data as parallel arrays instead of records.
+    :return: The JSON payload and the HTTP status code.
+    """
+    if data_points_df.empty:
+        return {
+            "message": f"No data points found for datasource ID {datasource_id}"
+        }, 404
+
+    # Ensure 'ts' column is in datetime format
+    data_points_df["ts"] = pd.to_datetime(data_points_df["ts"])
+
+    # Apply date filters
+    if start_date:
+        data_points_df = data_points_df[data_points_df["ts"] >= start_date]
+    if end_date:
+        data_points_df = data_points_df[data_points_df["ts"] <= end_date]
+
+    data_points_df = data_points_df.sort_values(by="ts", ascending=False)
+
+    # Handle pagination
+    if not page or not per_page:
+        return {"data": serialize_frame(data_points_df, columnar)}, 200
+
+    page, per_page = int(page), int(per_page)
+
+    total_items = len(data_points_df)
+    total_pages = (total_items - 1) // per_page + 1
+
+    # Handle out-of-range pages
+    if page > total_pages:
+        return {
+            "error": f"Page {page} is out of range. Total pages: {total_pages}"
+        }, 404
+
+    start_index = (page - 1) * per_page
+    end_index = start_index + per_page
+
+    paginated_data = serialize_frame(
+        data_points_df.iloc[start_index:end_index], columnar
+    )
+
+    # Return paginated results
+    return (
+        {
+            "total_items": total_items,
+            "total_pages": total_pages,
+            "current_page": page,
+            "per_page": per_page,
+            "data": paginated_data,
+        },
+        200,
+    )
+
+
+def build_all_datapoints_payload(
+    datasource_id,
+    start_date,
+    end_date,
+    latest,
+    page,
+    per_page,
+    columnar: bool = False,
+) -> Tuple[dict, int]:
+    """
+    Read the data points joined with the forecasts of each algorithm, newest
+    first. The join, the range, the latest limit and the pagination are all
+    applied by the database, which only returns the rows of the page.
+
+    :param columnar: Return the data as parallel arrays and the dates as epoch-ms.
+    :return: The JSON payload and the HTTP status code.
+    """
+    first_ts, last_ts, total_items = Config.database.get_joined_data_summary(
+        datasource_id, FORECAST_COLUMNS, start_date, end_date
+    )
+
+    if first_ts is None:
+        return (
+            {
+                "message": f"No data points found for datasource ID {datasource_id}",
+                "data": {},
+            },
+            404,
+        )
+
+    # The latest timestamps only apply without date range
+    if latest and not (start_date or end_date):
+        total_items = min(total_items, int(latest))
+
+    min_date, max_date = to_utc_timestamp(last_ts), to_utc_timestamp(first_ts)
+    if columnar:
+        min_date, max_date = to_epoch([min_date, max_date]).tolist()
+
+    if not page or not per_page:
+        data_df = read_joined_data(datasource_id, start_date, end_date, 0, total_items)
+        return (
+            {
+                "data": serialize_frame(data_df, columnar),
+                "minDate": min_date,
+                "maxDate": max_date,
+            },
+            200,
+        )
+
+    page, per_page = int(page), int(per_page)
+
+    # Paginate the data
+    total_pages = (total_items - 1) // per_page + 1
+
+    # Handle out-of-range pages
+    if page > total_pages:
+        return {
+            "error": f"Page {page} is out of range. Total pages: {total_pages}"
+        }, 404
+
+    start_index = (page - 1) * per_page
+    end_index = min(start_index + per_page, total_items)
+    data_df = read_joined_data(
+        datasource_id, start_date, end_date, start_index, end_index
+    )
+
+    return (
+        {
+            "data": serialize_frame(data_df, columnar),
+            "minDate": min_date,
+            "maxDate": max_date,
+            "pagination": {
+                "current_page": page,
+                "total_pages": total_pages,
+                "per_page": per_page,
+                "total_items": total_items,
+            },
+        },
+        200,
+    )
+
+
+def read_joined_data(datasource_id, start_date, end_date, lo, hi) -> pd.DataFrame:
+    """
+    Read the rows lo to hi (excluded) of the joined data, with UTC timestamps
+    and an empty string for the missing values.
+    """
+    columns = ["ts", "value", *FORECAST_COLUMNS.values()]
+    if hi <= lo:
+        data_df = pd.DataFrame(columns=columns)
+    else:
+        data_df = Config.database.get_joined_data(
+            datasource_id, FORECAST_COLUMNS, start_date, end_date, lo, hi
+        )
+
+    data_df["ts"] = pd.to_datetime(data_df["ts"], utc=True)
+    for column in FORECAST_COLUMNS.values():
+        data_df[column] = data_df[column].astype("Int64")
+    return data_df.astype({column: object for column in columns[1:]}).fillna("")
+
+
+def get_stream_format(format_param: str | None, accept: str) -> str | None:
+    """
+    Select the streaming format from the `format` query parameter, or from the
+    Accept header for NDJSON. Returns None for a regular JSON response.
+    """
+    if format_param is None and "application/x-ndjson" in accept:
+        format_param = "ndjson"
+    return format_param if format_param in STREAM_MIMETYPES else None
+
+
+def iter_all_datapoints(
+    datasource_id: int,
+    start_date=None,
+    end_date=None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    before=None,
+) -> Iterator[dict]:
+    """
+    Merge the data points with the forecasts of each algorithm row by row.
+
+    Both tables are streamed newest first, so merging them and grouping by ts
+    yields the records of `build_all_datapoints_payload` in the same order
+    while holding only one database batch of each table in memory. The ts of
+    the records are left as datetimes.
+    """
+    data_rows = Config.database.iter_data_points(
+        datasource_id, start_date, end_date, batch_size, before
+    )
+    # Each ts has up to one forecast per algorithm
+    forecasting_rows = Config.database.iter_forecasting_data(
+        datasource_id, start_date, end_date, batch_size * len(ForecastModel), before
+    )
+    merged_rows = heapq.merge(
+        ((ts, "value", value) for ts, value in data_rows),
+        (
+            (ts, FORECAST_COLUMNS.get(algorithm), value)
+            for ts, algorithm, value in forecasting_rows
+        ),
+        key=itemgetter(0),
+        reverse=True,
+    )
+
+    for ts, rows in groupby(merged_rows, key=itemgetter(0)):
+        record = {"ts": ts, "value": "", **dict.fromkeys(FORECAST_COLUMNS.values(), "")}
+        for _, column, value in rows:
+            if column == "value":
+                record["value"] = "" if value is None else value
+            elif column is not None:
+                record[column] = int(value) if value else ""
+        yield record
+
+
+def build_cursor_page(
+    records: Iterator[dict], limit: int, columns: List[str], columnar: bool = False
+) -> dict:
+    """
+    Take one keyset page of `limit` records, newest first. One extra record is
+    read to know whether a next page exists; the cursor of the next page is the
+    ts of the last record of this one.
+    """
+    records = list(islice(records, limit + 1))
+    next_cursor = (
+        encode_cursor(records[limit - 1]["ts"]) if len(records) > limit else None
+    )
+
+    page_df = pd.DataFrame(records[:limit], columns=columns)
+    page_df["ts"] = pd.to_datetime(page_df["ts"])
+    return {
+        "data": serialize_frame(page_df, columnar),
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
+
+
+def iter_chart_rows(
+    datasource_id: int, start_date, end_date, latest=None
+) -> Iterator[tuple]:
+    """
+    Stream the (ts, series, value) rows of the chart range, newest first. The
+    date range is applied by the database; without one, reading stops after the
+    `latest` timestamps of any series.
+    """
+    data_rows = Config.database.iter_data_points(datasource_id, start_date, end_date)
+    # Each ts has up to one forecast per algorithm
+    forecasting_rows = Config.database.iter_forecasting_data(
+        datasource_id, start_date, end_date, STREAM_BATCH_SIZE * len(ForecastModel)
+    )
+    rows = heapq.merge(
+        ((ts, "value", value) for ts, value in data_rows),
+        (
+            (ts, FORECAST_COLUMNS.get(algorithm, algorithm), value)
+            for ts, algorithm, value in forecasting_rows
+        ),
+        key=itemgetter(0),
+        reverse=True,
+    )
+    if latest and start_date is None and end_date is None:
+        groups = islice(groupby(rows, key=itemgetter(0)), int(latest))
+        rows = chain.from_iterable(group for _, group in groups)
+    return rows
+
+
+def build_chart_payload(rows: Iterable[tuple], max_points: int) -> dict:
+    """
+    Downsample the data points and the forecasts of each algorithm, given as
+    (ts, series, value) rows newest first, to at most `max_points` points per
+    series with LTTB.
+
+    :return: Epoch-ms timestamps and values of each series, oldest first.
+    """
+    series = {"value": ([], [])}
+    for ts, name, value in rows:
+        timestamps, values = series.setdefault(name, ([], []))
+        timestamps.append(ts)
+        values.append(value)
+
+    chart_series = {}
+    for name, (timestamps, values) in series.items():
+        timestamps, values = lttb(
+            to_epoch(timestamps[::-1]),
+            pd.to_numeric(pd.Series(values[::-1], dtype=object), errors="coerce"),
+            max_points,
+        )
+        chart_series[name] = {"ts": timestamps, "values": values}
+
+    return {"series": chart_series, "max_points": max_points}
+
+
+def parse_keyset_params(limit_param: str, cursor_param: str | None) -> tuple:
+    """
+    Parse the page size and the optional cursor of keyset pagination.
+
+    :raises ValueError: If the limit is not a positive integer or the cursor is malformed.
+    """
+    limit = int(limit_param)
+    if limit < 1:
+        raise ValueError(f"Limit must be positive: {limit}")
+    return limit, decode_cursor(cursor_param) if cursor_param else None
+
+
+def build_datapoints_cursor_page(
+    datasource_id: int, start_date, end_date, limit: int, cursor, columnar=False
+) -> dict:
+    """Keyset page of the data points: `WHERE ts < cursor ORDER BY ts DESC LIMIT n`."""
+    records = (
+        {"ts": ts, "value": value}
+        for ts, value in Config.database.iter_data_points(
+            datasource_id, start_date, end_date, limit + 1, cursor
+        )
+    )
+    return build_cursor_page(records, limit, ["ts", "value"], columnar)
+
+
+def build_all_datapoints_cursor_page(
+    datasource_id: int, start_date, end_date, limit: int, cursor, columnar=False
+) -> dict:
+    """Keyset page of the data points merged with the forecasts."""
+    records = iter_all_datapoints(datasource_id, start_date, end_date, limit + 1, cursor)
+    return build_cursor_page(
+        records, limit, ["ts", "value", *FORECAST_COLUMNS.values()], columnar
+    )
+
+
+def stream_records(records: Iterable[dict], stream_format: str) -> Iterator[str]:
+    """
+    Serialize records incrementally, STREAM_CHUNK_ROWS at a time, either as
+    NDJSON lines or as the `{"data": [...]}` body of the regular response.
+    """
+    records = iter(records)
+    separator = "\n" if stream_format == "ndjson" else ","
+
+    if stream_format != "ndjson":
+        yield '{"data": ['
+
+    first_chunk = True
+    while chunk := list(islice(records, STREAM_CHUNK_ROWS)):
+        timestamps = format_iso([record["ts"] for record in chunk])
+        body = separator.join(
+            json.dumps({**record, "ts": ts}) for record, ts in zip(chunk, timestamps)
+        )
+        if stream_format == "ndjson":
+            yield body + "\n"
+        else:
+            yield body if first_chunk else separator + body
+        first_chunk = False
+
+    if stream_format != "ndjson":
+        yield "]}"
+
+
+def find_possible_duplicates(datasource_id: int, timestamps: np.ndarray):
+    """
+    Flag the timestamps (epoch seconds) of a batch that may already be stored,
+    so that only those pay an existence query. Timestamps beyond the watermark
+    of the datasource are new, as are those its Bloom filter of the latest
+    timestamps has never seen.
+
+    :return: A boolean array, True for the possible duplicates.
+    """
+    index = Config.redis_handler.ingest_index.get(datasource_id)
+    # Mark the index as loading first, so that the datapoints inserted while
+    # the head is read are recorded into it
+    if index is None and Config.redis_handler.ingest_index.begin_load(datasource_id):
+        head = to_epoch(
+            Config.database.get_head_timestamps(datasource_id, INGEST_HEAD_ROWS), "s"
+        )
+        # The filter holds the whole history unless the head was truncated
+        floor = head.min() if len(head) == INGEST_HEAD_ROWS else float("-inf")
+        Config.redis_handler.ingest_index.load(datasource_id, head, floor)
+        index = Config.redis_handler.ingest_index.get(datasource_id)
+
+    # Another request is loading the index, check every timestamp
+    if index is None:
+        return np.ones(len(timestamps), dtype=bool)
+
+    possible = timestamps <= index["watermark"]
+    covered = possible & (timestamps >= index["floor"])
+    if covered.any():
+        possible[covered] = Config.redis_handler.ingest_index.may_contain(
+            datasource_id, timestamps[covered]
+        )
+    return possible
+
 
 @bp.route(f"{BASE_PATH}/datasources/<int:datasource_id>/datapoints", methods=["POST"])
 def add_datapoints(datasource_id: int):
@@ -28,37 +472,54 @@ def add_datapoints(datasource_id: int):
     if not isinstance(data, list):
         return jsonify(error="Invalid input: expected a list of datapoints"), 400
 
-    valid_datapoints = []
-    invalid_datapoints = []
-
-    # Validate and separate valid and invalid datapoints
-    for item in data:
-        try:
-            valid_datapoints.append(DataPoint(**item))
-        except ValidationError as e:
-            invalid_datapoints.append({"data": item, "error": e.json()})
+    # Validate the whole batch at once, reporting invalid items by index
+    valid_df, invalid_datapoints = validate_datapoints(data)
 
     # Check if the data source is available
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     try:
-        # Add valid datapoints to the database
-        skipped_datapoints = [
-            datapoint
-            for datapoint in valid_datapoints
-            if not Config.database.add_data_point(datapoint, datasource_id)
-        ]
+        # Only the first datapoint of a timestamp counts, and only possible
+        # duplicates are checked against the database
+        timestamps = to_epoch(valid_df["ts"], "s")
+        first = ~valid_df["ts"].duplicated().to_numpy()
+        possible = find_possible_duplicates(datasource_id, timestamps)
+
+        # Add valid datapoints to the database, the batch is already validated
+        added = np.array(
+            [
+                is_first
+                and Config.database.add_data_point(
+                    DataPoint.model_construct(ts=ts.to_pydatetime(), value=value),
+                    datasource_id,
+                    check_existing=is_possible,
+                )
+                == 1
+                for ts, value, is_first, is_possible in zip(
+                    valid_df["ts"], valid_df["value"], first, possible
+                )
+            ],
+            dtype=bool,
+        )
+        added_df = valid_df.loc[added, ["ts", "value"]]
+        Config.redis_handler.ingest_index.record(
+            datasource_id, timestamps[added]
+        )
+        if not added_df.empty:
+            Config.redis_handler.bump_data_version(datasource_id)
+
+            # Update the rollups once for the whole batch
+            Config.redis_handler.rollups.before_insert(datasource_id)
+            Config.database.insert_rollups(added_df, datasource_id)
         return jsonify(
-            message=f"{len(valid_datapoints) - len(skipped_datapoints)} datapoints have been added to the database."
+            message=f"{len(added_df)} datapoints have been added to the database.",
+            invalid=invalid_datapoints,
         )
     except Exception as e:
         print(e)
+        # Some datapoints may have been inserted without being indexed
+        Config.redis_handler.ingest_index.reset(datasource_id)
         return jsonify(error="Failed to add datapoints to the database."), 500
 
 
@@ -80,12 +541,7 @@ def get_datapoint(datasource_id: int):
         return jsonify(error="Invalid timestamp format"), 400
 
     # Check if the data source is available
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     try:
@@ -117,18 +573,14 @@ def update_datapoint(datasource_id: int):
         return jsonify(error="Invalid JSON data"), 400
 
     # Check if the data source is available
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
-        # logger.info(redis_handler.get_all_data_sources())
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     try:
         # Update the datapoint in the database
         Config.database.update_data_point(datapoint, datasource_id)
+        Config.redis_handler.bump_data_version(datasource_id)
+        Config.redis_handler.rollups.mark_stale(datasource_id)
         return jsonify(
             message=f"Data point with timestamp {datapoint.ts} in data source ID {datasource_id} has been updated successfully."
         )
@@ -155,18 +607,15 @@ def delete_datapoint(datasource_id: int):
         return jsonify(error="Invalid timestamp format"), 400
 
     # Check if the data source is available
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     try:
         # Attempt to delete the datapoint from the database
         operation_code = Config.database.delete_data_point(datasource_id, datapoint.ts)
         if operation_code == 1:
+            Config.redis_handler.bump_data_version(datasource_id)
+            Config.redis_handler.rollups.mark_stale(datasource_id)
             return jsonify(
                 message=f"Data point with timestamp {ts} in data source ID {datasource_id} has been deleted successfully."
             ), 200
@@ -183,17 +632,13 @@ def delete_datapoint(datasource_id: int):
 @bp.route(
     f"{BASE_PATH}/datasources/<int:datasource_id>/datapoints/data", methods=["GET"]
 )
+@conditional_on_data_version
 def get_datapoints(datasource_id: int):
     """
     file: ../../docs/get_datapoints.yaml
     """
     # Check if the data source is available
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     # Extract and parse query parameters
@@ -204,81 +649,51 @@ def get_datapoints(datasource_id: int):
 
     try:
         # Parse date filters using ISO 8601 format with 'Z' for UTC
-        start_date = (
-            pd.to_datetime(start_date_str, format="%Y-%m-%dT%H:%M:%SZ", errors="coerce")
-            if start_date_str
-            else None
-        )
-        end_date = (
-            pd.to_datetime(end_date_str, format="%Y-%m-%dT%H:%M:%SZ", errors="coerce")
-            if end_date_str
-            else None
-        )
+        start_date = parse_datetime(start_date_str, ISO_UTC_FORMAT)
+        end_date = parse_datetime(end_date_str, ISO_UTC_FORMAT)
 
         # Validate date formats
-        if (start_date_str and pd.isna(start_date)) or (
-            end_date_str and pd.isna(end_date)
+        if (start_date_str and start_date is None) or (
+            end_date_str and end_date is None
         ):
             return jsonify(
                 error='Invalid date format. Please use ISO 8601 format with "Z" (YYYY-MM-DDTHH:MM:SSZ).'
             ), 400
 
+        columnar = is_columnar_requested(
+            request.args.get("format"), request.headers.get("Accept", "")
+        )
+
+        # Keyset pagination: each page costs O(limit) whatever its depth
+        if request.args.get("limit"):
+            try:
+                limit, cursor = parse_keyset_params(
+                    request.args.get("limit"), request.args.get("cursor")
+                )
+            except ValueError as e:
+                logger.error(f"Invalid pagination parameters: {e}")
+                return jsonify(error="Invalid limit or cursor"), 400
+
+            payload = build_datapoints_cursor_page(
+                datasource_id, start_date, end_date, limit, cursor, columnar
+            )
+            return columnar_response(jsonify(payload), columnar), 200
+
         # Retrieve all data points for the datasource
         data_points_df: pd.DataFrame = Config.database.get_all_data_for_datasource(
             datasource_id
         )
 
-        if data_points_df.empty:
-            return jsonify(
-                message=f"No data points found for datasource ID {datasource_id}"
-            ), 404
-
-        # Ensure 'ts' column is in datetime format
-        data_points_df["ts"] = pd.to_datetime(data_points_df["ts"])
-
-        # Apply date filters
-        if start_date:
-            data_points_df = data_points_df[data_points_df["ts"] >= start_date]
-        if end_date:
-            data_points_df = data_points_df[data_points_df["ts"] <= end_date]
-
-        # Convert 'ts' to formatted string for JSON response
-        data_points_df["ts"] = data_points_df["ts"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-        data_points_df = data_points_df.sort_values(by="ts", ascending=False)
-
-        # Handle pagination
-        if not page or not per_page:
-            data_points_json = data_points_df.to_dict(orient="records")
-            return jsonify({"data": data_points_json}), 200
-
-        page, per_page = int(page), int(per_page)
-
-        total_items = len(data_points_df)
-        total_pages = (total_items - 1) // per_page + 1
-
-        # Handle out-of-range pages
-        if page > total_pages:
-            return jsonify(
-                error=f"Page {page} is out of range. Total pages: {total_pages}"
-            ), 404
-
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-
-        paginated_data = data_points_df.iloc[start_index:end_index].to_dict(
-            orient="records"
+        payload, status = build_datapoints_payload(
+            datasource_id,
+            data_points_df,
+            start_date,
+            end_date,
+            page,
+            per_page,
+            columnar,
         )
-
-        # Return paginated results
-        return jsonify(
-            {
-                "total_items": total_items,
-                "total_pages": total_pages,
-                "current_page": page,
-                "per_page": per_page,
-                "data": paginated_data,
-            }
-        ), 200
+        return columnar_response(jsonify(payload), columnar), status
 
     except Exception as e:
         logger.error(f"An error occurred while retrieving data points: {e}")
@@ -286,17 +701,13 @@ def get_datapoints(datasource_id: int):
 
 
 @bp.route(f"{BASE_PATH}/datasources/<datasource_id>/datapoints/all", methods=["GET"])
+@conditional_on_data_version
 def get_all_datapoints(datasource_id: str | int):
     """
     file: ../../docs/get_all_datapoints.yaml
     """
     # Check if the data source exists
-    if (
-        find_data_source_by_id(
-            datasource_id, Config.redis_handler.get_all_data_sources()
-        )
-        is None
-    ):
+    if Config.data_sources.get(datasource_id) is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
     # Get query parameters
@@ -308,8 +719,8 @@ def get_all_datapoints(datasource_id: str | int):
 
     try:
         # Parse date filters using ISO 8601 format
-        start_date = parse_date(start_date_str)
-        end_date = parse_date(end_date_str)
+        start_date = parse_datetime(start_date_str)
+        end_date = parse_datetime(end_date_str)
 
         # Validate the parsed dates
         if (start_date_str and start_date is None) or (
@@ -319,135 +730,142 @@ def get_all_datapoints(datasource_id: str | int):
                 error='Invalid date format. Please use ISO 8601 format with "Z" (e.g., YYYY-MM-DDTHH:MM:SSZ, YYYY-MM-DDTHH:MM:SS.mmmZ, or YYYY-MM-DD).'
             ), 400
 
-        # Retrieve all data points for the given data source ID
-        data_df: pd.DataFrame = Config.database.get_all_data_for_datasource(
-            datasource_id
-        )
-        forecasting_df: pd.DataFrame = (
-            Config.database.get_forecasting_data_for_datasource(datasource_id)
+        columnar = is_columnar_requested(
+            request.args.get("format"), request.headers.get("Accept", "")
         )
 
-        if not forecasting_df.empty:
-            # Pivot forecasting_df to create separate columns for each algorithm
-            pivot_forecasting_df = forecasting_df.pivot_table(
-                index="ts", columns="algorithm", values="value"
-            ).reset_index()
-
-            # Rename the columns for clarity
-            pivot_forecasting_df.columns.name = None
-            # Rename columns if they exist
-            rename_map = {
-                "auto-regression": "AutoReg",
-                "exponential smoothing": "ExpSmoothing",
-            }
-
-            # Check if columns exist before renaming
-            pivot_forecasting_df.rename(
-                columns={
-                    col: rename_map[col]
-                    for col in pivot_forecasting_df.columns
-                    if col in rename_map
-                },
-                inplace=True,
-            )
-            for col in ["AutoReg", "ExpSmoothing"]:
-                if col not in pivot_forecasting_df.columns:
-                    pivot_forecasting_df[col] = ""
-
-            # Reorder columns to have 'ts', 'AutoReg', 'ExpSmoothing'
-            pivot_forecasting_df = pivot_forecasting_df[
-                ["ts", "AutoReg", "ExpSmoothing"]
-            ]
-        else:
-            pivot_forecasting_df = pd.DataFrame(
-                columns=["ts", "AutoReg", "ExpSmoothing"]
+        # Keyset pagination: each page costs O(limit) whatever its depth
+        if request.args.get("limit"):
+            try:
+                limit, cursor = parse_keyset_params(
+                    request.args.get("limit"), request.args.get("cursor")
+                )
+            except ValueError as e:
+                logger.error(f"Invalid pagination parameters: {e}")
+                return jsonify(error="Invalid limit or cursor"), 400
+
+            payload = build_all_datapoints_cursor_page(
+                int(datasource_id), start_date, end_date, limit, cursor, columnar
             )
+            return columnar_response(jsonify(payload), columnar), 200
 
-        # Merge pivoted DataFrame with data_df
-        data_points_df = pd.merge(data_df, pivot_forecasting_df, on="ts", how="outer")
-        data_points_df.fillna("", inplace=True)
-
-        data_points_df["AutoReg"] = data_points_df["AutoReg"].apply(
-            lambda x: int(x) if x else ""
+        # Stream the records instead of building the whole response in memory
+        stream_format = get_stream_format(
+            request.args.get("format"), request.headers.get("Accept", "")
         )
-        data_points_df["ExpSmoothing"] = data_points_df["ExpSmoothing"].apply(
-            lambda x: int(x) if x else ""
+        if stream_format and not (page and per_page):
+            records = iter_all_datapoints(int(datasource_id), start_date, end_date)
+            if latest:
+                records = islice(records, int(latest))
+            return Response(
+                stream_records(records, stream_format),
+                mimetype=STREAM_MIMETYPES[stream_format],
+            )
+
+        payload, status = build_all_datapoints_payload(
+            int(datasource_id),
+            start_date,
+            end_date,
+            latest,
+            page,
+            per_page,
+            columnar,
         )
+        return columnar_response(jsonify(payload), columnar), status
+    except Exception as e:
+        logger.error(f"Failed to retrieve all data points: {e}")
+        return jsonify(
+            error="Failed to retrieve all data points from the database."
+        ), 500
 
-        if data_points_df.empty:
-            return jsonify(
-                {
-                    "message": f"No data points found for datasource ID {datasource_id}",
-                    "data": {},
-                }
-            ), 404
 
-        # Ensure 'ts' column is in datetime format
-        data_points_df["ts"] = pd.to_datetime(data_points_df["ts"], utc=True)
-
-        # Apply date filters
-        if start_date or end_date:
-            if start_date:
-                datapoints_filtered = data_points_df[data_points_df["ts"] >= start_date]
-            if end_date:
-                datapoints_filtered = data_points_df[data_points_df["ts"] <= end_date]
-        elif latest:
-            datapoints_filtered = data_points_df.iloc[-int(latest) :, :]
-        else:
-            datapoints_filtered = data_points_df.copy()
+@bp.route(
+    f"{BASE_PATH}/datasources/<int:datasource_id>/datapoints/chart", methods=["GET"]
+)
+@conditional_on_data_version
+def get_chart_data(datasource_id: int):
+    """
+    file: ../../docs/get_chart_data.yaml
+    """
+    # Check if the data source exists
+    if Config.data_sources.get(datasource_id) is None:
+        return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
-        # Convert 'ts' to formatted string for JSON response
-        datapoints_filtered["ts"] = datapoints_filtered["ts"].dt.strftime(
-            "%Y-%m-%dT%H:%M:%SZ"
-        )
-        datapoints_filtered = datapoints_filtered.sort_values(by="ts", ascending=False)
+    start_date_str = request.args.get("start_date")
+    end_date_str = request.args.get("end_date")
+    latest = request.args.get("latest")
 
-        if not page or not per_page:
-            # Convert DataFrame to JSON
-            data_points_json = datapoints_filtered.to_dict(orient="records")
+    try:
+        max_points = int(request.args.get("max_points", CHART_MAX_POINTS))
+        if max_points < 3:
+            raise ValueError(f"max_points must be at least 3: {max_points}")
+    except ValueError as e:
+        logger.error(f"Invalid max_points: {e}")
+        return jsonify(error="Invalid max_points, expected an integer >= 3"), 400
+
+    start_date = parse_datetime(start_date_str)
+    end_date = parse_datetime(end_date_str)
+    if (start_date_str and start_date is None) or (end_date_str and end_date is None):
+        return jsonify(
+            error='Invalid date format. Please use ISO 8601 format with "Z" (e.g., YYYY-MM-DDTHH:MM:SSZ, YYYY-MM-DDTHH:MM:SS.mmmZ, or YYYY-MM-DD).'
+        ), 400
 
-            return jsonify(
-                {
-                    "data": data_points_json,
-                    "minDate": data_points_df.iloc[-1, 0],
-                    "maxDate": data_points_df.iloc[0, 0],
-                }
-            ), 200
+    try:
+        payload = build_chart_payload(
+            iter_chart_rows(datasource_id, start_date, end_date, latest), max_points
+        )
+        return jsonify(payload), 200
+    except Exception as e:
+        logger.error(f"Failed to build chart data: {e}")
+        return jsonify(error="Failed to retrieve chart data from the database."), 500
 
-        page, per_page = int(page), int(per_page)
 
-        # Paginate the data
-        total_items = len(datapoints_filtered)
-        total_pages = (total_items - 1) // per_page + 1
+@bp.route(f"{BASE_PATH}/datasources/<int:datasource_id>/aggregates", methods=["GET"])
+@conditional_on_data_version
+def get_aggregates(datasource_id: int):
+    """
+    file: ../../docs/get_aggregates.yaml
+    """
+    # Check if the data source exists
+    if Config.data_sources.get(datasource_id) is None:
+        return jsonify(error=f"No data source found with ID {datasource_id}"), 404
 
-        # Handle out-of-range pages
-        if page > total_pages:
-            return jsonify(
-                error=f"Page {page} is out of range. Total pages: {total_pages}"
-            ), 404
+    bucket = request.args.get("bucket", "day")
+    if bucket not in ROLLUP_BUCKETS:
+        return jsonify(
+            error=f"Invalid bucket, expected one of: {', '.join(ROLLUP_BUCKETS)}"
+        ), 400
 
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        paginated_df = datapoints_filtered.iloc[start_index:end_index]
+    start_date_str = request.args.get("start_date")
+    end_date_str = request.args.get("end_date")
+    start_date = parse_datetime(start_date_str)
+    end_date = parse_datetime(end_date_str)
+    if (start_date_str and start_date is None) or (end_date_str and end_date is None):
+        return jsonify(
+            error='Invalid date format. Please use ISO 8601 format with "Z" (e.g., YYYY-MM-DDTHH:MM:SSZ, YYYY-MM-DDTHH:MM:SS.mmmZ, or YYYY-MM-DD).'
+        ), 400
 
-        # Convert DataFrame to JSON
-        data_points_json = paginated_df.to_dict(orient="records")
+    try:
+        columnar = is_columnar_requested(
+            request.args.get("format"), request.headers.get("Accept", "")
+        )
 
-        return jsonify(
-            {
-                "data": data_points_json,
-                "minDate": data_points_df.iloc[-1, 0],
-                "maxDate": data_points_df.iloc[0, 0],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "per_page": per_page,
-                    "total_items": total_items,
-                },
-            }
-        ), 200
+        # Updated or deleted points are only reflected in the rollups by the
+        # next compaction, until then aggregate the raw data
+        aggregates_df = Config.database.get_rollups(
+            datasource_id,
+            bucket,
+            start_date,
+            end_date,
+            from_raw=Config.redis_handler.rollups.are_stale(datasource_id),
+        )
+
+        payload = {
+            "datasource_id": datasource_id,
+            "bucket": bucket,
+            "aggregates": serialize_frame(aggregates_df, columnar),
+        }
+        return columnar_response(jsonify(payload), columnar), 200
     except Exception as e:
-        logger.error(f"Failed to retrieve all data points: {e}")
-        return jsonify(
-            error="Failed to retrieve all data points from the database."
-        ), 500
+        logger.error(f"Failed to retrieve aggregates: {e}")
+        return jsonify(error="Failed to retrieve aggregates from the database."), 500
@@ -14,7 +14,6 @@ from logging_config import logger
 from structs.models import DataSource
 from structs.models import DataSourceInfo
 from structs.models import Training
-from utility import find_data_source_by_id
 
 bp = Blueprint("datasources", __name__)
 
@@ -45,7 +44,7 @@ def create_datasource():
 
     try:
         # Save the data source to Redis
-        Config.redis_handler.add_data_source(datasource.model_dump())
+        Config.data_sources.add_data_source(datasource.model_dump())
     except Exception as e:
         logger.error(f"Failed to save data source: {e}")
         return jsonify(error="Failed to create data source"), 500
@@ -62,7 +61,7 @@ def get_all_datasources():
     logger.info("Fetching all data sources...")
 
     try:
-        datasources = Config.redis_handler.get_all_data_sources()
+        datasources = Config.data_sources.all()
         logger.info(f"Successfully retrieved {len(datasources)} data sources")
         return jsonify(datasources), 200
     except Exception as e:
@@ -80,19 +79,17 @@ def delete_datasource(datasource_id: int):
     # Check if the request has 'htmx' query parameter
     htmx = request.args.get("htmx")
 
-    # Fetch all data sources from Redis
-    datasources = Config.redis_handler.get_all_data_sources()
-
     # Validate the data source ID
-    if find_data_source_by_id(datasource_id, datasources) is None:
+    if Config.data_sources.get(datasource_id) is None:
         message = "Data source not found"
         logger.error(message)
         return jsonify(error=message), 404
 
     try:
         # Remove the data source from Redis and database
-        Config.redis_handler.remove_data_source(datasource_id)
+        Config.data_sources.remove_data_source(datasource_id)
         Config.database.delete_datasource(datasource_id)
+        Config.redis_handler.rollups.mark_stale(datasource_id)
 
         logger.info(f"Data source with ID {datasource_id} deleted successfully")
 
@@ -131,19 +128,13 @@ def initialize_datasource(datasource_id: int):
         logger.error(message)
         return jsonify(error=message), 400
 
-    # Fetch all data sources from Redis
-    datasources = Config.redis_handler.get_all_data_sources()
-
-    # Validate the data source ID
-    data_source_match = find_data_source_by_id(datasource_id, datasources)
-    if data_source_match is None:
+    # Fetch the data source and validate the ID
+    datasource = Config.data_sources.get_model(datasource_id)
+    if datasource is None:
         logger.error(f"Data source not found with ID: {datasource_id}")
         return jsonify(error=f"Data source not found with ID {datasource_id}"), 404
 
     try:
-        # Find the data source by ID
-        datasource_str, datasource_index = data_source_match
-        datasource = DataSource(**datasource_str)
 
         if not datasource.initialized:
             # Read and encode the file
@@ -152,7 +143,7 @@ def initialize_datasource(datasource_id: int):
 
             # Asynchronously process the file
             process_task = process_file.apply_async(
-                args=[file_data_base64, datasource_id, Config.db_config]
+                args=[file_data_base64, datasource_id]
             )
             logger.info(f"File processing task started with ID: {process_task.id}")
             return jsonify({"task_id": process_task.id}), 202
@@ -1,27 +1,90 @@
 import time
 from threading import Thread
+from typing import List
 
+import pandas as pd
 from flask import Blueprint
 from flask import jsonify
 from flask import request
 from pydantic import ValidationError
 
-from async_tasks import process_training
+from async_tasks import request_training
 from config import Config
 from constants import BASE_PATH
+from constants import COLD_START_HISTORY_ROWS
+from constants import COLD_START_MODEL
+from constants import FORECAST_QUANTILES
+from forecasting.intervals import quantile_label
 from forecasting.models import ForecastContext
 from logging_config import logger
+from routes.conditional import conditional_on_data_version
+from structs.enums import ForecastModel
 from structs.enums import PeriodType
-from structs.models import DataSource
 from structs.models import ForecastingData
 from structs.models import Training
 from structs.utility import period_to_pandas_freq
-from utility import find_data_source_by_id
+from timestamps import format_iso
+from timestamps import to_epoch
+from utility import columnar_response
+from utility import is_columnar_requested
 
 # Create a new Blueprint for the forecasting routes
 bp = Blueprint("forecasting", __name__)
 
 
+def parse_quantiles(quantiles_param: str | None) -> List[float]:
+    """
+    Parse a comma separated list of quantiles (e.g. "0.1,0.5,0.9").
+
+    :raises ValueError: If a quantile is not a number strictly between 0 and 1.
+    """
+    quantiles = (
+        [float(q) for q in quantiles_param.split(",")]
+        if quantiles_param
+        else list(FORECAST_QUANTILES)
+    )
+    if not all(0 < q < 1 for q in quantiles):
+        raise ValueError(f"Quantiles out of range: {quantiles}")
+    return quantiles
+
+
+def format_forecast(
+    algorithm: ForecastModel,
+    result: pd.DataFrame,
+    steps: int,
+    quantiles,
+    columnar: bool = False,
+) -> dict:
+    """
+    Format the last `steps` rows of a forecast for the response, with epoch-ms
+    dates in the columnar format. Quantiles only exist for the forecasted rows,
+    they are null for the history rows.
+    """
+    result = result.iloc[-steps:]
+    return {
+        "algorithm": algorithm.value,
+        "dates": (
+            to_epoch(result["ts"]).tolist()
+            if columnar
+            else format_iso(result["ts"])
+        ),
+        "values": [max(0, x) for x in result["value"].tolist()],
+        "quantiles": {
+            label: [None if pd.isna(x) else max(0, x) for x in result[label].tolist()]
+            for label in map(quantile_label, quantiles)
+            if label in result.columns
+        },
+    }
+
+
+def insert_forecasting_data(result: pd.DataFrame, datasource_id: int, algorithm: str):
+    """Insert forecasted rows, consuming the progress the insertion yields."""
+    for _ in Config.database.insert_forecasting_dataframe(
+        result, datasource_id, algorithm
+    ):
+        pass
+
+
 @bp.route(f"{BASE_PATH}/datasources/<int:datasource_id>/training", methods=["POST"])
 def train_datasource(datasource_id: int):
     """
@@ -37,41 +100,38 @@ def train_datasource(datasource_id: int):
         logger.error(f"Invalid JSON data: {e.json()}")
         return jsonify(error="Invalid JSON data"), 400
 
-    # Check if the data source exists in Redis
-    datasource_match = find_data_source_by_id(
-        datasource_id, Config.redis_handler.get_all_data_sources()
-    )
-    if datasource_match is None:
+    # Check if the data source exists in the registry
+    datasource = Config.data_sources.get_model(datasource_id)
+    if datasource is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
-    else:
-        # Retrieve the data source from Redis
-        datasource_str, datasource_index = datasource_match
-        datasource = DataSource(**datasource_str)
 
     try:
         # Extract Frequency of data for training
         frequency = period_to_pandas_freq(datasource.datasource_info.period)
         logger.info(f"Training frequency: {frequency}")
 
-        # Update Redis with the new training data
-        Config.redis_handler.set_item(
-            datasource_index, "training", training_data.model_dump()
-        )
-        logger.info(
-            f"Updated data sources: {Config.redis_handler.get_all_data_sources()}"
+        # Start the training process asynchronously using Celery, unless a
+        # training of this data source is already queued or running
+        outcome, task_id, models = request_training(
+            Config.redis_handler,
+            datasource_id,
+            training_data,
+            frequency,
         )
+        logger.info(f"Training request of data source {datasource_id}: {outcome}")
 
-        # Start the training process asynchronously using Celery
-        task = process_training.apply_async(
-            args=[training_data.json(), datasource_id, Config.db_config, frequency]
-        )
-        return jsonify({"task_id": task.id}), 202
+        # Update Redis with the models that will be trained
+        Config.data_sources.set_item(datasource_id, "training", {"models": models})
+        logger.info(f"Updated training of data source {datasource_id}")
+
+        return jsonify({"task_id": task_id, "coalesced": outcome != "new"}), 202
     except Exception as e:
         logger.error(f"Training task couldn't be started: {e}")
         return jsonify(error=f"Training task couldn't be started: {e}"), 400
 
 
 @bp.route(f"{BASE_PATH}/datasources/<int:datasource_id>/forecasting", methods=["GET"])
+@conditional_on_data_version
 def get_forecast(datasource_id: int):
     """
     file: ../../docs/get_forecast.yaml
@@ -81,6 +141,10 @@ def get_forecast(datasource_id: int):
     # Get query parameters for forecasting
     date_param = request.args.get("date")
     steps_param = request.args.get("steps")
+    quantiles_param = request.args.get("quantiles")
+    columnar = is_columnar_requested(
+        request.args.get("format"), request.headers.get("Accept", "")
+    )
 
     # Validate the query parameters using the ForecastingData model
     try:
@@ -92,30 +156,50 @@ def get_forecast(datasource_id: int):
         logger.error(f"Invalid query parameters: {e.json()}")
         return jsonify(error="Invalid query parameters"), 400
 
-    # Check if the data source exists in Redis
-    datasource_match = find_data_source_by_id(
-        datasource_id, Config.redis_handler.get_all_data_sources()
-    )
-    if datasource_match is None:
+    # Parse the requested quantiles (e.g. "0.1,0.5,0.9")
+    try:
+        quantiles = parse_quantiles(quantiles_param)
+    except ValueError as e:
+        logger.error(f"Invalid quantiles: {e}")
+        return jsonify(error="Invalid quantiles, expected values between 0 and 1"), 400
+
+    # Check if the data source exists in the registry
+    datasource = Config.data_sources.get_model(datasource_id)
+    if datasource is None:
         return jsonify(error=f"No data source found with ID {datasource_id}"), 404
-    else:
-        datasource_str, datasource_index = datasource_match
-        datasource = DataSource(**datasource_str)
 
     try:
         # Initialize a list to hold forecast results for each algorithm
         forecast_results = []
-        # Ensure the data source has been trained
-        if not datasource.trained:
+        # Untrained data sources fall back to a baseline fitted on the fly
+        if not datasource.trained and not datasource.initialized:
             return jsonify(error="Training is required for this step!"), 400
 
         # Extract the frequency of the data
         frequency = period_to_pandas_freq(datasource.datasource_info.period)
         logger.info(f"Forecasting frequency: {frequency}")
 
+        algorithms = (
+            datasource.training.models
+            if datasource.trained
+            else [ForecastModel(COLD_START_MODEL)]
+        )
+
         # Loop through each algorithm in the training models and generate forecasts
-        for algorithm in datasource.training.models:
-            model = ForecastContext(algorithm, datasource_id)
+        for algorithm in algorithms:
+            # The cold start baseline is fitted in memory on the latest points,
+            # the key of a trained model of the same algorithm is left untouched
+            model = ForecastContext(
+                algorithm, datasource_id, persist=datasource.trained
+            )
+            if not datasource.trained:
+                logger.info(f"Cold start forecast with {algorithm.value}")
+                model.train(
+                    Config.database.get_latest_data_points(
+                        datasource_id, COLD_START_HISTORY_ROWS
+                    ),
+                    frequency,
+                )
             lags_needed = model.model.get_nb_lags_needed()
 
             # Fetch data only if needed (optimized ternary logic)
@@ -133,7 +217,11 @@ def get_forecast(datasource_id: int):
 
             # Generate the forecast and log the result
             result = model.forecast(
-                data, forecasting_data.date, forecasting_data.steps, frequency
+                data,
+                forecasting_data.date,
+                forecasting_data.steps,
+                frequency,
+                quantiles,
             )
             logger.info(f"Forecast result for {algorithm.value}: {result}")
 
@@ -145,35 +233,32 @@ def get_forecast(datasource_id: int):
                 f"{Config.database.cursor} {result.iloc[data_length:]}, {datasource_id}, {algorithm.value}"
             )
 
-            # Define a function to insert the forecasting results asynchronously
-            def insert_forecasting_data():
-                Config.database.insert_forecasting_dataframe(
-                    result.iloc[data_length:], datasource_id, algorithm.value
+            # Insert the forecasting results asynchronously, except the cold start
+            # forecast which is not the forecast of a trained model
+            if datasource.trained:
+                thread = Thread(
+                    target=insert_forecasting_data,
+                    args=(result.iloc[data_length:], datasource_id, algorithm.value),
                 )
-
-            # Start the thread and add it to the list for later joining
-            thread = Thread(target=insert_forecasting_data)
-            thread.start()
+                thread.start()
 
             # Prepare forecast results for the response
-            result = result.iloc[-forecasting_data.steps :]
             forecast_results.append(
-                {
-                    "algorithm": algorithm.value,
-                    "dates": result["ts"].dt.strftime("%Y-%m-%dT%H:%M:%SZ").tolist(),
-                    "values": [max(0, x) for x in result["value"].tolist()],
-                }
+                format_forecast(
+                    algorithm, result, forecasting_data.steps, quantiles, columnar
+                )
             )
 
         # Calculate operation time and prepare the response
         end_time = time.perf_counter()
         logger.info(f"Forecast results: {forecast_results}")
-        return jsonify(
+        response = jsonify(
             {
                 "forecasts": forecast_results,
                 "operation_time": f"{end_time - start_time:.4f}s",
             }
-        ), 200
+        )
+        return columnar_response(response, columnar), 200
     except Exception as e:
         logger.error(f"Error during forecasting: {e}")
         return jsonify(error="Failed to retrieve data point from the database."), 500
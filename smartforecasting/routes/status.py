@@ -1,13 +1,64 @@
+import json
+from typing import Final
+
 from celery.result import AsyncResult
 from flask import Blueprint
 from flask import jsonify
+from flask import Response
+from flask import stream_with_context
 
 from config import Config
 from constants import BASE_PATH
+from constants import PROGRESS_KEEPALIVE_INTERVAL
+from progress import FINAL_STATES
+from redis_memory import RedisHandler
+from redis_progress import TaskProgressEvents
 
 bp = Blueprint("status", __name__)
 celery = Config.celery
 
+# Disable caching and proxy buffering, which would hold the events back
+SSE_HEADERS: Final[dict] = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def build_status_payload(state: str, info) -> dict:
+    """Describe a task from its state and its meta (progress info or result)."""
+    if state == "PENDING":
+        response = {"status": state}
+    elif state == "PROGRESS":
+        response = {
+            "status": "In Progress",
+            "progress": f"{info.get('percent', 0):.0f}%",
+            "current_model": info.get("current_model"),
+            "eta_seconds": info.get("eta_seconds"),
+        }
+    else:
+        response = {"status": state, "result": str(info)}
+    return response
+
+
+def format_sse(event: dict) -> str:
+    """Format a progress event as a Server-Sent Events message."""
+    return f"event: {event['status'].lower()}\ndata: {json.dumps(event)}\n\n"
+
+
+def task_state_event(state: str, info) -> dict:
+    """Progress event describing a task from its state, for tasks publishing none."""
+    if state in FINAL_STATES:
+        return {"status": state, "result": str(info)}
+    return {"status": state}
+
+
+def initial_progress_event(task_id: str, latest: dict | None) -> dict:
+    """
+    First event of a stream: the latest published progress event or, for tasks
+    publishing none (e.g. already finished ones), the state of the task.
+    """
+    if latest is not None:
+        return latest
+    task = AsyncResult(task_id, app=celery)
+    return task_state_event(task.state, task.info)
+
 
 @bp.route(f"{BASE_PATH}/status/<task_id>", methods=["GET"])
 def get_status(task_id: str):
@@ -15,23 +66,45 @@ def get_status(task_id: str):
     file: ../../docs/get_status.yaml
     """
     task = AsyncResult(task_id, app=celery)
-    if task.state == "PENDING":
-        response = {"status": task.state}
-    elif task.state == "PROGRESS":
-        percent_complete = (
-            (
-                task.info.get("current model", 0)
-                + task.info.get("current", 0) / task.info.get("total", 1)
+    return jsonify(build_status_payload(task.state, task.info))
+
+
+@bp.route(f"{BASE_PATH}/status/<task_id>/events", methods=["GET"])
+def get_status_events(task_id: str):
+    """
+    file: ../../docs/get_status_events.yaml
+    """
+    redis_handler: RedisHandler = Config.redis_handler
+
+    def generate():
+        # Subscribe before reading the latest event so none is missed in between
+        pubsub = redis_handler.r_db.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(TaskProgressEvents.channel(task_id))
+        try:
+            event = initial_progress_event(
+                task_id, redis_handler.task_progress.get(task_id)
             )
-            / task.info.get("total models", 1)
-            * 100
-        )
-        response = {
-            "status": "In Progress",
-            # "current": task.info.get('current', 0),
-            # "total": task.info.get('total', 1),
-            "progress": f"{percent_complete:.0f}%",
-        }
-    else:
-        response = {"status": task.state, "result": str(task.result)}
-    return jsonify(response)
+            yield format_sse(event)
+
+            while event["status"] not in FINAL_STATES:
+                message = pubsub.get_message(timeout=PROGRESS_KEEPALIVE_INTERVAL)
+                if message is None:
+                    # Idle: keep the connection open and notice silent endings
+                    task = AsyncResult(task_id, app=celery)
+                    if task.state in FINAL_STATES:
+                        event = task_state_event(task.state, task.info)
+                        yield format_sse(event)
+                    else:
+                        yield ": keepalive\n\n"
+                    continue
+
+                event = json.loads(message["data"])
+                yield format_sse(event)
+        finally:
+            pubsub.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS,
+    )
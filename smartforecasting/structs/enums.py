@@ -13,3 +13,8 @@ class PeriodType(str, Enum):
 class ForecastModel(str, Enum):
     AUTO_REGRESSION = "auto-regression"
     EXPONENTIAL_SMOOTHING = "exponential smoothing"
+    SEASONAL_NAIVE = "seasonal-naive"
+    DRIFT = "drift"
+    MOVING_AVERAGE = "moving-average"
+    THETA = "theta"
+    CROSTON = "croston"
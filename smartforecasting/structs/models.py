@@ -7,6 +7,7 @@ from pydantic import validator
 
 from structs.enums import ForecastModel
 from structs.enums import PeriodType
+from timestamps import normalize_datetime
 
 
 class Period(BaseModel):
@@ -38,9 +39,7 @@ class DataPoint(BaseModel):
     @validator("ts")
     def convert_to_sql_datetime(cls, value):
         if isinstance(value, datetime) or isinstance(value, date):
-            return datetime.strptime(
-                value.strftime("%Y-%m-%d %H:%M:%S"), "%Y-%m-%d %H:%M:%S"
-            )
+            return normalize_datetime(value)
         return value
 
 
@@ -51,7 +50,5 @@ class ForecastingData(BaseModel):
     @validator("date")
     def convert_to_sql_datetime(cls, value):
         if isinstance(value, datetime) or isinstance(value, date):
-            return datetime.strptime(
-                value.strftime("%Y-%m-%d %H:%M:%S"), "%Y-%m-%d %H:%M:%S"
-            )
+            return normalize_datetime(value)
         return value
@@ -0,0 +1,95 @@
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from functools import lru_cache
+from typing import Final
+
+import numpy as np
+import pandas as pd
+
+from constants import TIMESTAMP_CACHE_SIZE
+
+# Timestamps are stored and exchanged as UTC: naive datetimes are UTC, and
+# epoch values are int64 seconds or milliseconds since the Unix epoch.
+ISO_UTC_FORMAT: Final[str] = "%Y-%m-%dT%H:%M:%SZ"
+EPOCH: Final[datetime] = datetime(1970, 1, 1)
+EPOCH_UNITS: Final[tuple] = ("s", "ms")
+
+# Accepted besides ISO 8601 dates and datetimes (with "Z" or an UTC offset)
+FALLBACK_FORMATS: Final[tuple] = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d")
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_timestamp(value: str, fmt: str | None = None) -> int | None:
+    """
+    Parse a timestamp string to epoch seconds, taking naive values as UTC.
+
+    Query parameters and payloads repeat the same few strings, so results are
+    cached. Without `fmt`, ISO 8601 is parsed with the C `fromisoformat`
+    before trying the fallback formats.
+
+    :param fmt: Only accept this `strptime` format.
+    :return: The epoch seconds, or None if the string is not a timestamp.
+    """
+    if not isinstance(value, str):
+        return None
+
+    parsed = None
+    for candidate in (fmt,) if fmt else (None, *FALLBACK_FORMATS):
+        try:
+            if candidate is None:
+                parsed = datetime.fromisoformat(value)
+            else:
+                parsed = datetime.strptime(value, candidate)
+            break
+        except ValueError:
+            continue
+    if parsed is None:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return (parsed - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(seconds: int) -> datetime:
+    """Convert epoch seconds to a naive UTC datetime."""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+def parse_datetime(value: str, fmt: str | None = None) -> datetime | None:
+    """
+    Parse a timestamp string to a naive UTC datetime, truncated to the second.
+
+    :return: The datetime, or None if the string is not a timestamp.
+    """
+    seconds = parse_timestamp(value, fmt)
+    return None if seconds is None else from_epoch(seconds)
+
+
+def normalize_datetime(value: date | datetime) -> datetime:
+    """
+    Convert a date or datetime to the stored form: a naive datetime truncated
+    to the second, keeping the wall clock of any timezone.
+    """
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0, tzinfo=None)
+    return datetime(value.year, value.month, value.day)
+
+
+def to_epoch(timestamps, unit: str = "ms") -> np.ndarray:
+    """
+    Convert timestamps to an int64 array of epoch seconds or milliseconds,
+    taking naive values as UTC.
+    """
+    if unit not in EPOCH_UNITS:
+        raise ValueError(f"Invalid epoch unit: {unit}")
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).tz_convert(None)
+    return index.to_numpy(dtype=f"datetime64[{unit}]").astype(np.int64)
+
+
+def format_iso(timestamps) -> list:
+    """Format timestamps as ISO 8601 UTC strings ("YYYY-MM-DDTHH:MM:SSZ")."""
+    seconds = to_epoch(timestamps, "s").astype("datetime64[s]")
+    return np.char.add(np.datetime_as_string(seconds, unit="s"), "Z").tolist()
@@ -1,31 +1,13 @@
+import base64
 import json
 import re
 from datetime import datetime
-from typing import Tuple
 
 import pandas as pd
-from dateutil import parser
 
-from logging_config import logger
+from constants import COLUMNAR_MIMETYPE
 from structs.models import DataSource
-
-
-def parse_date(date_str):
-    """Parse a date string into a datetime object, ensuring UTC timezone."""
-    if not date_str:
-        return None
-
-    try:
-        # Parse with dateutil to handle various formats and ensure UTC
-        parsed_date = parser.parse(date_str)
-
-        # Ensure the date is timezone-aware with UTC
-        if parsed_date.tzinfo is None:
-            parsed_date = parsed_date.replace(tzinfo=pd.Timestamp.now().tzinfo)
-
-        return parsed_date
-    except (ValueError, TypeError):
-        return None
+from timestamps import to_epoch
 
 
 def read_config(file_path: str) -> dict:
@@ -41,28 +23,6 @@ def save_config(file_path: str, config: dict):
         json.dump(config, file, indent=4)
 
 
-def find_data_source_by_id(
-    data_source_id: int, data_source_collection: list[dict]
-) -> Tuple[dict, int] | None:
-    logger.info("Searching for data source in the collection.")
-
-    # Use a generator to find the first matching data source
-    match = next(
-        (
-            (data_source, index)
-            for index, data_source in enumerate(data_source_collection)
-            if data_source.get("id") == data_source_id
-        ),
-        None,
-    )
-
-    if match:
-        logger.info(f"Match found at index {match[1]}.")
-    else:
-        logger.info("No matching ID found.")
-    return match
-
-
 def convert_to_sql_datetime(timestamp: str) -> str:
     """
     Converts an ISO 8601 timestamp to SQL DATETIME format (YYYY-MM-DD HH:MM:SS).
@@ -81,3 +41,52 @@ def convert_to_sql_datetime(timestamp: str) -> str:
 
     # If it's already in SQL DATETIME format, return as is
     return timestamp
+
+
+def is_columnar_requested(format_param: str | None, accept: str) -> bool:
+    """Check whether the columnar format was selected by query parameter or Accept."""
+    return format_param == "columnar" or COLUMNAR_MIMETYPE in accept
+
+
+def columnar_response(response, columnar: bool):
+    """Label a Flask response with the columnar media type, varying on Accept."""
+    if columnar:
+        response.mimetype = COLUMNAR_MIMETYPE
+    response.vary.add("Accept")
+    return response
+
+
+def to_utc_timestamp(value) -> pd.Timestamp:
+    """Convert a datetime to a UTC timestamp, taking naive values as UTC."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def frame_to_columns(df: pd.DataFrame) -> dict:
+    """
+    Convert a frame with a `ts` column to parallel arrays, with epoch-ms
+    timestamps and null for empty cells.
+    """
+    columns = {"ts": to_epoch(df["ts"]).tolist()}
+    for column in df.columns.drop("ts"):
+        columns[column] = [
+            None if value == "" or pd.isna(value) else value
+            for value in df[column].tolist()
+        ]
+    return columns
+
+
+def encode_cursor(ts: datetime) -> str:
+    """Encode the last timestamp of a page as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(ts.isoformat().encode()).decode()
+
+
+def decode_cursor(cursor: str) -> datetime:
+    """
+    Decode a pagination cursor back to its timestamp.
+
+    :raises ValueError: If the cursor is malformed.
+    """
+    return datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
@@ -0,0 +1,63 @@
+from celery.signals import worker_process_init
+from celery.signals import worker_process_shutdown
+
+from constants import DB_CONFIG_FILENAME
+from database import DatabaseHandler
+from logging_config import logger
+from redis_memory import RedisHandler
+from utility import read_config
+
+
+class WorkerResources:
+    """
+    Resources living as long as a Celery worker process and borrowed by its
+    tasks: the database configuration and connection pool, and the Redis
+    client (also used by the forecasting models).
+
+    They are created by the worker_process_init hook, in each process after
+    the fork, since connections must not be shared across processes. Outside
+    of a prefork worker (solo pool, eager tasks) they are created on first
+    use. A prefork process runs a single task at a time, so tasks can share
+    the handlers: `connect()` only borrows a connection from the pool.
+    """
+
+    db_config: dict | None = None
+    database: DatabaseHandler | None = None
+    redis_handler: RedisHandler | None = None
+
+    @classmethod
+    def initialize(cls):
+        cls.db_config = read_config(DB_CONFIG_FILENAME)
+        cls.database = DatabaseHandler(cls.db_config)
+        cls.database.create_pool()
+        cls.redis_handler = RedisHandler.shared()
+        logger.info("Worker process resources initialized")
+
+    @classmethod
+    def shutdown(cls):
+        if cls.database is not None and cls.database.conn_pool is not None:
+            cls.database.conn_pool.closeall()
+        cls.database = None
+        logger.info("Worker process resources released")
+
+    @classmethod
+    def get_database(cls) -> DatabaseHandler:
+        if cls.database is None:
+            cls.initialize()
+        return cls.database
+
+    @classmethod
+    def get_redis_handler(cls) -> RedisHandler:
+        if cls.redis_handler is None:
+            cls.initialize()
+        return cls.redis_handler
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    WorkerResources.initialize()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    WorkerResources.shutdown()
@@ -1,5 +1,31 @@
 #!/bin/bash
 
+# Usage: start_celery.sh [ingest|train|maintenance|all]
+# Each pool consumes its own queue with its own concurrency and prefetch, so
+# bulk ingestion does not starve training and the other way around. The
+# maintenance pool also runs Celery beat (a single one must run). "all" (the
+# default) consumes every queue in a single worker.
+POOL=${1:-all}
+
+case "$POOL" in
+    ingest)
+        WORKER_OPTIONS="-Q ingest --concurrency=2 --prefetch-multiplier=1"
+        ;;
+    train)
+        WORKER_OPTIONS="-Q train --concurrency=4 --prefetch-multiplier=1"
+        ;;
+    maintenance)
+        WORKER_OPTIONS="-Q maintenance --concurrency=1 --prefetch-multiplier=1 -B"
+        ;;
+    all)
+        WORKER_OPTIONS="-Q ingest,train,maintenance --prefetch-multiplier=1 -B"
+        ;;
+    *)
+        echo "Unknown worker pool: $POOL (expected ingest, train, maintenance or all)" >&2
+        exit 1
+        ;;
+esac
+
 # Set the PYTHONPATH to include the parent directory
 export PYTHONPATH=/home/ml/SmartForecasting
 
@@ -10,4 +36,4 @@ cd /home/ml/SmartForecasting/smartforecasting
 POETRY=/home/ml/.pyenv/shims/poetry
 
 # Run Celery worker within the Poetry environment
-exec "$POETRY" run celery -A smartforecasting.run.celery worker --loglevel=info --logfile=/home/ml/SmartForecasting/logs/celery_worker.log --pidfile=/home/ml/SmartForecasting/logs/celery_worker.pid
+exec "$POETRY" run celery -A smartforecasting.run.celery worker $WORKER_OPTIONS -n "$POOL@%h" --loglevel=info --logfile=/home/ml/SmartForecasting/logs/celery_$POOL.log --pidfile=/home/ml/SmartForecasting/logs/celery_$POOL.pid
@@ -0,0 +1,300 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import async_tasks
+from async_tasks import finish_ingestion
+from async_tasks import ingest_chunk
+from async_tasks import process_training
+from async_tasks import schedule_retraining
+from redis_memory import RedisHandler
+from structs.enums import ForecastModel
+from structs.models import Training
+from worker_resources import WorkerResources
+
+DATASOURCE_ID = 1
+
+
+class StubRedis(dict):
+    """Key-value store of the model parameters and residuals."""
+
+    def set(self, key, value):
+        self[key] = value
+
+
+class StubFlights:
+    def __init__(self):
+        self.refreshed = []
+
+    def start(self, datasource_id, task_id):
+        return None
+
+    def refresh(self, datasource_id, task_id):
+        self.refreshed.append(task_id)
+        return True
+
+    def finish(self, datasource_id, task_id):
+        return None
+
+
+class StubFingerprints(dict):
+    """Trained fingerprint of each data source."""
+
+    def __init__(self):
+        super().__init__()
+        self.scheduled = []
+
+    def get_all(self):
+        return dict(self)
+
+    def set(self, datasource_id, fingerprint):
+        self[datasource_id] = fingerprint
+
+    def seed(self, fingerprints):
+        for datasource_id, fingerprint in fingerprints.items():
+            self.setdefault(datasource_id, fingerprint)
+
+    def schedule_retraining(self, datasource_id, fingerprint, ttl):
+        self.scheduled.append(datasource_id)
+        return True
+
+
+class StubTaskProgress(list):
+    def publish(self, task_id, event):
+        self.append(event)
+
+
+class StubNoop:
+    """Rollup and ingest index state, which the tasks only reset."""
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+class StubRedisHandler:
+    def __init__(self):
+        self.r_db = StubRedis()
+        self.items = {}
+        self.data_sources = []
+        self.flights = StubFlights()
+        self.fingerprints = StubFingerprints()
+        self.task_progress = StubTaskProgress()
+        self.rollups = StubNoop()
+        self.ingest_index = StubNoop()
+
+    def set_item(self, datasource_id, key, value):
+        self.items[key] = value
+
+    def get_all_data_sources(self):
+        return self.data_sources
+
+
+class StubDatabase:
+    def __init__(self, df):
+        self.df = df
+        self.forecasts = {}
+        self.rows = []
+        self.failing_rows = 0
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_data_fingerprints(self, ds_id):
+        return {ds_id: "fingerprint"}
+
+    def get_all_data_for_datasource(self, ds_id):
+        return self.df.copy()
+
+    def insert_dataframe(self, df, ds_id):
+        # The last `failing_rows` inserts are reported as not inserted
+        inserted = df.iloc[: len(df) - self.failing_rows]
+        self.rows.extend(inserted.itertuples(index=False))
+        return len(inserted)
+
+    def insert_rollups(self, df, ds_id):
+        return None
+
+    def insert_forecasting_dataframe(self, df, ds_id, algorithm):
+        rows = self.forecasts.setdefault(algorithm, [])
+        for index, row in enumerate(df.to_dict(orient="records")):
+            rows.append(row)
+            if index % 10 == 0:
+                yield index, len(df)
+
+
+@pytest.fixture
+def resources(monkeypatch):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=120, freq="1D"),
+            "value": 100 + np.arange(120) + rng.normal(0, 2, 120),
+        }
+    )
+    redis_handler = StubRedisHandler()
+    database = StubDatabase(df)
+    monkeypatch.setattr(WorkerResources, "redis_handler", redis_handler)
+    monkeypatch.setattr(WorkerResources, "database", database)
+    monkeypatch.setattr(RedisHandler, "_shared", redis_handler)
+    monkeypatch.setattr(process_training, "update_state", lambda **kwargs: None)
+    return redis_handler, database
+
+
+def run_training(models):
+    training = Training(models=models)
+    return process_training.apply(
+        args=[training.json(), DATASOURCE_ID, "1D"], task_id="task"
+    ).get()
+
+
+def test_process_training_inserts_forecasts(resources, monkeypatch):
+    redis_handler, database = resources
+    monkeypatch.setattr(process_training, "is_aborted", lambda: False)
+
+    result = run_training([ForecastModel.AUTO_REGRESSION, ForecastModel.DRIFT])
+
+    assert result.startswith("Training completed successfully")
+    assert set(database.forecasts) == {
+        ForecastModel.AUTO_REGRESSION.value,
+        ForecastModel.DRIFT.value,
+    }
+    assert all(database.forecasts.values())
+    assert redis_handler.items["trained"] is True
+    assert redis_handler.fingerprints[DATASOURCE_ID] == "fingerprint"
+    assert redis_handler.task_progress[-1]["status"] == "SUCCESS"
+    # The training flight is kept alive at each model
+    assert redis_handler.flights.refreshed == ["task", "task"]
+
+
+def test_process_training_skips_models_out_of_time_budget(resources, monkeypatch):
+    redis_handler, database = resources
+    monkeypatch.setattr(process_training, "is_aborted", lambda: False)
+    # Every fit runs out of time, only the AR model was trained before
+    monkeypatch.setattr(async_tasks, "TRAINING_MODEL_TIME_BUDGET", 1e-9)
+    redis_handler.r_db[f"{DATASOURCE_ID}_{ForecastModel.AUTO_REGRESSION.name}"] = (
+        "[100.0, 0.5, 0]"
+    )
+
+    result = run_training([ForecastModel.AUTO_REGRESSION])
+
+    assert result.endswith(
+        f"skipped out of time budget: {ForecastModel.AUTO_REGRESSION.value}"
+    )
+    assert not database.forecasts
+    # The earlier parameters still forecast, but the model is retrained later
+    assert redis_handler.items["trained"] is True
+    assert DATASOURCE_ID not in redis_handler.fingerprints
+    assert redis_handler.task_progress[-1]["result"] == result
+
+    result = run_training([ForecastModel.AUTO_REGRESSION, ForecastModel.DRIFT])
+
+    assert result.endswith(
+        f"{ForecastModel.AUTO_REGRESSION.value}, {ForecastModel.DRIFT.value}"
+    )
+    assert DATASOURCE_ID not in redis_handler.fingerprints
+
+
+def test_process_training_without_params_is_not_trained(resources, monkeypatch):
+    redis_handler, database = resources
+    monkeypatch.setattr(process_training, "is_aborted", lambda: False)
+    monkeypatch.setattr(async_tasks, "TRAINING_MODEL_TIME_BUDGET", 1e-9)
+
+    result = run_training([ForecastModel.DRIFT])
+
+    assert ForecastModel.DRIFT.value in result
+    assert "trained" not in redis_handler.items
+    assert DATASOURCE_ID not in redis_handler.fingerprints
+    assert redis_handler.task_progress[-1]["status"] == "SUCCESS"
+
+
+def test_process_training_stops_inserting_when_aborted(resources, monkeypatch):
+    redis_handler, database = resources
+    # Aborted as soon as the first forecast rows are inserted
+    monkeypatch.setattr(
+        process_training, "is_aborted", lambda: bool(database.forecasts)
+    )
+
+    result = run_training([ForecastModel.DRIFT, ForecastModel.AUTO_REGRESSION])
+
+    assert result == "TASK STOPPED!"
+    assert ForecastModel.AUTO_REGRESSION.value not in database.forecasts
+    assert len(database.forecasts[ForecastModel.DRIFT.value]) == 1
+    assert "trained" not in redis_handler.items
+    assert redis_handler.task_progress[-1]["status"] == "ABORTED"
+
+
+def csv_chunk(rows: int) -> str:
+    return pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=rows, freq="1h"),
+            "value": np.arange(rows, dtype=float),
+        }
+    ).to_csv(index=False)
+
+
+def test_chunked_ingestion_marks_the_datasource_initialized(resources):
+    redis_handler, database = resources
+    inserted_rows = [
+        ingest_chunk.apply(args=[csv_chunk(rows), DATASOURCE_ID]).get()
+        for rows in (50, 30)
+    ]
+
+    assert inserted_rows == [50, 30]
+    finish_ingestion.apply(args=[inserted_rows, DATASOURCE_ID, 80, 0.0]).get()
+    assert redis_handler.items["initialized"] is True
+
+
+def test_chunked_ingestion_fails_when_rows_are_missing(resources):
+    redis_handler, database = resources
+    database.failing_rows = 2
+    inserted_rows = [ingest_chunk.apply(args=[csv_chunk(50), DATASOURCE_ID]).get()]
+
+    assert inserted_rows == [48]
+    with pytest.raises(Exception, match="Inserted 48 of 50 rows"):
+        finish_ingestion.apply(args=[inserted_rows, DATASOURCE_ID, 50, 0.0]).get()
+    assert "initialized" not in redis_handler.items
+
+
+def data_source(datasource_id: int, trained: bool = True) -> dict:
+    return {
+        "id": datasource_id,
+        "datasource_info": {"name": "ds", "period": {"type": "day", "value": 1}},
+        "training": {"models": [ForecastModel.DRIFT.value]},
+        "initialized": True,
+        "trained": trained,
+    }
+
+
+def test_schedule_retraining_seeds_unknown_fingerprints(resources, monkeypatch):
+    redis_handler, database = resources
+    fingerprints = {1: "100:a", 2: "150:b", 3: "100:c", 4: "100:d"}
+    # 1 is unchanged, 2 grew since its training, 3 was trained before
+    # fingerprints existed and 4 was never trained
+    redis_handler.fingerprints.update({1: "100:a", 2: "100:x"})
+    redis_handler.data_sources = [
+        data_source(1),
+        data_source(2),
+        data_source(3),
+        data_source(4, False),
+    ]
+    monkeypatch.setattr(
+        database, "get_data_fingerprints", lambda ds_id=None: fingerprints
+    )
+    requested = []
+    monkeypatch.setattr(
+        async_tasks,
+        "request_training",
+        lambda handler, ds_id, training, frequency, **options: requested.append(
+            (ds_id, options["priority"])
+        ),
+    )
+
+    schedule_retraining.apply().get()
+
+    assert requested == [(2, 4)]
+    assert redis_handler.fingerprints.scheduled == [2]
+    assert redis_handler.fingerprints[3] == "100:c"
+    assert 4 not in redis_handler.fingerprints
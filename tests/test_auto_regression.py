@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+import forecasting.auto_regression  # noqa: F401  (registers the strategy)
+from forecasting.models import ForecastContext
+from structs.enums import ForecastModel
+
+
+def daily_frame(values) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=len(values), freq="D"),
+            "value": np.asarray(values, dtype=float),
+        }
+    )
+
+
+def forecast(params: list, values, steps: int) -> np.ndarray:
+    """Forecast the `steps` days after the lags the model asks for."""
+    context = ForecastContext(ForecastModel.AUTO_REGRESSION, 1, persist=False)
+    context.set_model_params(params)
+    lags = daily_frame(values).tail(context.model.get_nb_lags_needed())
+    lags = lags.reset_index(drop=True)
+    result = context.forecast(lags, lags["ts"].iloc[-1] + pd.Timedelta(days=1), steps)
+    assert result is not None
+    return result["value"].to_numpy()[len(lags) :]
+
+
+def test_order_zero_forecasts_the_intercept():
+    # Intercept only, the latest datapoint still dates the forecast
+    np.testing.assert_allclose(forecast([4.5, 0], [1.0, 9.0, 3.0], 3), [4.5] * 3)
+
+
+def test_forecast_feeds_back_the_last_lags():
+    # y_t = 1 + 0.5 * y_{t-2} + 0.25 * y_{t-1}
+    values = [3.0, 8.0, 4.0, 2.0]
+    expected = []
+    for _ in range(4):
+        expected.append(1 + 0.5 * values[-2] + 0.25 * values[-1])
+        values.append(expected[-1])
+    np.testing.assert_allclose(forecast([1.0, 0.5, 0.25, 0], values[:4], 4), expected)
@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecasting.baselines  # noqa: F401  (registers the baseline strategies)
+from forecasting.models import ForecastContext
+from redis_memory import RedisHandler
+from structs.enums import ForecastModel
+
+BASELINES = [
+    ForecastModel.SEASONAL_NAIVE,
+    ForecastModel.DRIFT,
+    ForecastModel.MOVING_AVERAGE,
+    ForecastModel.THETA,
+    ForecastModel.CROSTON,
+]
+
+
+class StubRedis(dict):
+    def set(self, key, value, **kwargs):
+        self[key] = value.encode()
+
+
+class StubRedisHandler:
+    def __init__(self):
+        self.r_db = StubRedis()
+
+
+@pytest.fixture
+def redis_db(monkeypatch):
+    handler = StubRedisHandler()
+    monkeypatch.setattr(RedisHandler, "shared", classmethod(lambda cls: handler))
+    return handler.r_db
+
+
+def daily_frame(values) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=len(values), freq="D"),
+            "value": np.asarray(values, dtype=float),
+        }
+    )
+
+
+def forecast(context: ForecastContext, data: pd.DataFrame, steps: int):
+    """Forecast the `steps` days after the last point, without the lag rows."""
+    lags = data.tail(1).reset_index(drop=True)
+    result = context.forecast(lags, lags["ts"].iloc[-1] + pd.Timedelta(days=1), steps)
+    return result["value"].to_numpy()[1:]
+
+
+def test_seasonal_naive_repeats_the_last_season(redis_db):
+    season = np.array([1.0, 2.0, 4.0, 9.0, 5.0, 3.0, 2.0])
+    data = daily_frame(np.tile(season, 30))
+    context = ForecastContext(ForecastModel.SEASONAL_NAIVE, 1)
+    context.train(data, "1D")
+    np.testing.assert_allclose(forecast(context, data, 10), np.resize(season, 10))
+
+
+def test_drift_extends_the_line_through_the_first_and_last_values(redis_db):
+    data = daily_frame(3 + 2 * np.arange(50))
+    context = ForecastContext(ForecastModel.DRIFT, 1)
+    context.train(data, "1D")
+    np.testing.assert_allclose(forecast(context, data, 5), 101 + 2 * np.arange(1, 6))
+
+
+def test_moving_average_forecasts_the_mean_of_the_last_window(redis_db):
+    values = np.random.default_rng(0).normal(10, 1, 100)
+    data = daily_frame(values)
+    context = ForecastContext(ForecastModel.MOVING_AVERAGE, 1)
+    context.train(data, "1D")
+    window = context.model.model_params["window"]
+    np.testing.assert_allclose(forecast(context, data, 3), values[-window:].mean())
+
+
+def test_croston_forecasts_the_smoothed_demand_rate(redis_db):
+    # One demand of 6 every third period
+    data = daily_frame(np.tile([0.0, 0.0, 6.0], 40))
+    context = ForecastContext(ForecastModel.CROSTON, 1)
+    context.train(data, "1D")
+    np.testing.assert_allclose(forecast(context, data, 4), 2.0, rtol=1e-2)
+
+
+def test_theta_tracks_a_linear_trend(redis_db):
+    data = daily_frame(np.arange(200, dtype=float))
+    context = ForecastContext(ForecastModel.THETA, 1)
+    context.train(data, "1D")
+    # The level lags the trend, the drift of half the slope catches up with it
+    predicted = forecast(context, data, 5)
+    np.testing.assert_allclose(np.diff(predicted), 0.5)
+    assert predicted[0] == pytest.approx(199.5, abs=1.0)
+
+
+@pytest.mark.parametrize("algorithm", BASELINES)
+def test_trained_baselines_store_their_parameters(redis_db, algorithm):
+    data = daily_frame(np.random.default_rng(1).poisson(5, 100))
+    ForecastContext(algorithm, 1).train(data, "1D")
+
+    params = json.loads(redis_db[f"1_{algorithm.name}"])
+    assert params
+    assert f"1_{algorithm.name}_residuals" in redis_db
+
+    # A new context reloads them and forecasts without training
+    reloaded = ForecastContext(algorithm, 1)
+    assert reloaded.model.model_params == params
+    assert len(forecast(reloaded, data, 3)) == 3
+
+
+@pytest.mark.parametrize("algorithm", BASELINES)
+def test_cold_start_baselines_stay_in_memory(monkeypatch, algorithm):
+    def no_redis(cls):
+        raise AssertionError("a cold start model must not use Redis")
+
+    monkeypatch.setattr(RedisHandler, "shared", classmethod(no_redis))
+    data = daily_frame(np.random.default_rng(2).poisson(5, 100))
+    context = ForecastContext(algorithm, 1, persist=False)
+    context.train(data, "1D")
+
+    lags = data.tail(1).reset_index(drop=True)
+    result = context.forecast(
+        lags, lags["ts"].iloc[-1] + pd.Timedelta(days=1), 3, "1D", (0.5,)
+    )
+    assert len(result) == 4
+    assert result["p50"].iloc[1:].notna().all()
@@ -0,0 +1,61 @@
+import numpy as np
+
+from bloom import bloom_bitmap
+from bloom import bloom_positions
+from constants import INGEST_BLOOM_BITS
+from constants import INGEST_BLOOM_CAPACITY
+from constants import INGEST_BLOOM_HASHES
+
+# Hourly epoch seconds from 2024-01-01, as ingested
+KEYS = 1704067200 + 3600 * np.arange(1000, dtype=np.int64)
+
+
+def test_positions_shape_and_range():
+    positions = bloom_positions(KEYS, 1024, 5)
+    assert positions.shape == (len(KEYS), 5)
+    assert positions.min() >= 0
+    assert positions.max() < 1024
+
+
+def test_positions_are_deterministic():
+    np.testing.assert_array_equal(
+        bloom_positions(KEYS, 1024, 5), bloom_positions(KEYS.tolist(), 1024, 5)
+    )
+    # The positions of a key do not depend on the other keys
+    np.testing.assert_array_equal(
+        bloom_positions(KEYS[10:11], 1024, 5), bloom_positions(KEYS, 1024, 5)[10:11]
+    )
+
+
+def test_bitmap_matches_positions_in_redis_bit_order():
+    positions = bloom_positions(KEYS[:20], 4096, 3)
+    bitmap = bloom_bitmap(KEYS[:20], 4096, 3)
+    assert len(bitmap) == 4096 // 8
+
+    # GETBIT offset 0 is the most significant bit of the first byte
+    set_bits = {
+        offset
+        for offset in range(4096)
+        if bitmap[offset // 8] & (0x80 >> (offset % 8))
+    }
+    assert set_bits == set(positions.ravel().tolist())
+
+
+def may_contain(bitmap: bytes, keys) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8)).astype(bool)
+    positions = bloom_positions(keys, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+    return bits[positions].all(axis=1)
+
+
+def test_no_false_negatives():
+    bitmap = bloom_bitmap(KEYS, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+    assert may_contain(bitmap, KEYS).all()
+
+
+def test_false_positive_rate_at_capacity():
+    keys = 1704067200 + 60 * np.arange(INGEST_BLOOM_CAPACITY, dtype=np.int64)
+    bitmap = bloom_bitmap(keys, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+
+    # Later minutes, never added
+    absent = keys[-1] + 60 * np.arange(1, 100001, dtype=np.int64)
+    assert may_contain(bitmap, absent).mean() < 0.02
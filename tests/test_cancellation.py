@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from forecasting.cancellation import CancellationToken
+from forecasting.cancellation import check_cancelled
+from forecasting.cancellation import TrainingCancelled
+from forecasting.correlation import find_best_lag_pacf
+
+
+def test_check_passes_without_abort_or_budget():
+    CancellationToken().check()
+    check_cancelled(None)
+
+
+def test_exceeded_budget_cancels():
+    token = CancellationToken(budget=-1)
+    with pytest.raises(TrainingCancelled, match="Time budget exceeded"):
+        token.check()
+
+
+def test_abort_cancels():
+    token = CancellationToken(lambda: True)
+    with pytest.raises(TrainingCancelled, match="Task aborted"):
+        token()
+
+
+def test_abort_callback_is_polled_at_most_every_interval():
+    calls = []
+    token = CancellationToken(lambda: calls.append(1) or False, poll_interval=60)
+    for _ in range(5):
+        token.check()
+    assert len(calls) == 1
+
+
+def test_child_token_keeps_parent_deadline():
+    parent = CancellationToken(budget=10)
+    assert parent.with_budget(3600).deadline == parent.deadline
+    assert parent.with_budget(1).deadline < parent.deadline
+    assert parent.with_budget(None).deadline == parent.deadline
+
+
+def test_lag_selection_is_cancellable():
+    values = np.random.default_rng(0).normal(size=200)
+    with pytest.raises(TrainingCancelled):
+        find_best_lag_pacf(values, 15, token=CancellationToken(lambda: True))
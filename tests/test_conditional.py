@@ -0,0 +1,78 @@
+import pytest
+from flask import Flask
+from flask import jsonify
+
+from config import Config
+from routes.conditional import conditional_on_data_version
+from routes.conditional import make_etag
+
+
+class StubDataSources(dict):
+    def get(self, data_source_id):
+        return super().get(int(data_source_id))
+
+
+class StubRedisHandler:
+    def __init__(self):
+        self.versions = {}
+
+    def get_data_version(self, datasource_id):
+        return self.versions.get(datasource_id, 0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    redis_handler = StubRedisHandler()
+    monkeypatch.setattr(
+        Config, "data_sources", StubDataSources({1: {"id": 1}}), raising=False
+    )
+    monkeypatch.setattr(Config, "redis_handler", redis_handler, raising=False)
+
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/datasources/<int:datasource_id>/data")
+    @conditional_on_data_version
+    def view(datasource_id):
+        calls.append(datasource_id)
+        return jsonify(data=[1, 2, 3]), 200
+
+    client = app.test_client()
+    client.calls = calls
+    client.redis_handler = redis_handler
+    return client
+
+
+def test_make_etag_depends_on_the_version_and_variant():
+    etag = make_etag(1, 3, "/data?a=1|")
+    assert etag.startswith("1-3-")
+    assert make_etag(1, 4, "/data?a=1|") != etag
+    assert make_etag(1, 3, "/data?a=2|") != etag
+
+
+def test_matching_etag_is_not_modified(client):
+    response = client.get("/datasources/1/data")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get("/datasources/1/data", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert client.calls == [1]
+
+
+def test_new_data_version_changes_the_etag(client):
+    etag = client.get("/datasources/1/data").headers["ETag"]
+    client.redis_handler.versions[1] = 1
+
+    response = client.get("/datasources/1/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_unknown_datasource_is_not_found_whatever_the_etag(client):
+    # ETag the datasource would get at version 0
+    etag = make_etag(2, 0, "/datasources/2/data?|")
+
+    response = client.get("/datasources/2/data", headers={"If-None-Match": etag})
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from statsmodels.tsa.stattools import acf as sm_acf
+from statsmodels.tsa.stattools import pacf as sm_pacf
+
+from forecasting.correlation import acf
+from forecasting.correlation import detect_seasonal_periods
+from forecasting.correlation import find_best_lag_pacf
+from forecasting.correlation import pacf
+from forecasting.utility import get_seasonal_periods
+
+
+def seasonal_series(period: int, length: int = 2000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = np.arange(length)
+    return 10 * np.sin(2 * np.pi * steps / period) + rng.normal(0, 1, length)
+
+
+def ar2_series(length: int = 2000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = np.zeros(length)
+    noise = rng.normal(0, 1, length)
+    for t in range(2, length):
+        values[t] = 0.6 * values[t - 1] - 0.3 * values[t - 2] + noise[t]
+    return values
+
+
+def test_acf_matches_statsmodels():
+    values = ar2_series(500)
+    np.testing.assert_allclose(acf(values, 20), sm_acf(values, nlags=20, fft=False))
+
+
+def test_pacf_matches_statsmodels():
+    values = ar2_series(500)
+    np.testing.assert_allclose(
+        pacf(values, 15), sm_pacf(values, nlags=15, method="ldb"), atol=1e-10
+    )
+
+
+def test_acf_of_constant_series_is_zero():
+    assert not acf(np.ones(50), 5).any()
+
+
+def test_find_best_lag_pacf_selects_ar_order():
+    assert find_best_lag_pacf(ar2_series(), 15) == 2
+
+
+@pytest.mark.parametrize("length", [200, 1000, 20000])
+@pytest.mark.parametrize("seed", range(5))
+def test_no_period_in_white_noise(length, seed):
+    values = np.random.default_rng(seed).normal(size=length)
+    assert detect_seasonal_periods(values) == []
+
+
+@pytest.mark.parametrize("period", [7, 12, 24])
+def test_known_period_comes_first(period):
+    assert detect_seasonal_periods(seasonal_series(period))[0] == period
+
+
+def test_trend_does_not_hide_period():
+    values = seasonal_series(24) + 0.05 * np.arange(2000)
+    assert detect_seasonal_periods(values)[0] == 24
+
+
+def test_periods_are_capped():
+    assert detect_seasonal_periods(seasonal_series(24), max_period=48) == [24]
+    assert detect_seasonal_periods(seasonal_series(24), max_period=30) == []
+
+
+def test_get_seasonal_periods_detects_period():
+    assert get_seasonal_periods("1H", seasonal_series(24)) == 24
+
+
+def test_get_seasonal_periods_falls_back_to_calendar_period():
+    noise = np.random.default_rng(0).normal(size=1000)
+    assert get_seasonal_periods("1D", noise) == 7
+    assert get_seasonal_periods("1D", noise[:10]) is None
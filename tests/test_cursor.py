@@ -0,0 +1,68 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from routes.datapoints import build_cursor_page
+from routes.datapoints import parse_keyset_params
+from utility import decode_cursor
+from utility import encode_cursor
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "ts",
+    [START, datetime(2024, 2, 29, 23, 59, 59), datetime(2024, 1, 1, 0, 0, 0, 123456)],
+)
+def test_cursor_round_trip(ts):
+    cursor = encode_cursor(ts)
+    assert decode_cursor(cursor) == ts
+    # Safe in a query string without escaping
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_="
+    )
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGEgZGF0ZQ==", "%%%"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_parse_keyset_params():
+    assert parse_keyset_params("10", None) == (10, None)
+    assert parse_keyset_params("5", encode_cursor(START)) == (5, START)
+    with pytest.raises(ValueError):
+        parse_keyset_params("0", None)
+    with pytest.raises(ValueError):
+        parse_keyset_params("ten", None)
+
+
+def records(count: int):
+    """Records newest first, as read from the database."""
+    return (
+        {"ts": START - timedelta(days=day), "value": float(day)}
+        for day in range(count)
+    )
+
+
+def test_cursor_page_with_a_next_page():
+    page = build_cursor_page(records(10), 3, ["ts", "value"])
+
+    assert [record["value"] for record in page["data"]] == [0.0, 1.0, 2.0]
+    assert page["limit"] == 3
+    # The next page starts after the last record of this one
+    assert decode_cursor(page["next_cursor"]) == START - timedelta(days=2)
+
+
+def test_last_cursor_page():
+    page = build_cursor_page(records(3), 3, ["ts", "value"])
+    assert len(page["data"]) == 3
+    assert page["next_cursor"] is None
+
+
+def test_columnar_cursor_page():
+    page = build_cursor_page(records(2), 5, ["ts", "value"], columnar=True)
+    assert page["data"]["value"] == [0.0, 1.0]
+    assert page["data"]["ts"] == [1704067200000, 1703980800000]
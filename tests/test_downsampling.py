@@ -0,0 +1,145 @@
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from config import Config
+from downsampling import lttb
+from downsampling import lttb_indices
+from routes.datapoints import build_chart_payload
+from routes.datapoints import iter_chart_rows
+
+START = datetime(2024, 1, 1)
+
+
+def test_lttb_keeps_short_series():
+    x = np.arange(5)
+    np.testing.assert_array_equal(lttb_indices(x, x**2, 10), x)
+
+
+def test_lttb_keeps_the_ends_and_the_threshold():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000)
+    indices = lttb_indices(x, rng.normal(size=1000), 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_the_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[[200, 700]] = [50, -50]
+    indices = lttb_indices(x, y, 20)
+    assert {200, 700} <= set(indices.tolist())
+
+
+def test_lttb_matches_a_per_point_reference():
+    # Straightforward implementation of Steinarsson's algorithm
+    def reference(x, y, threshold):
+        n = len(x)
+        edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+        selected, previous = [0], 0
+        for bucket in range(threshold - 2):
+            start, end = edges[bucket], edges[bucket + 1]
+            if bucket + 2 < len(edges):
+                following = slice(end, edges[bucket + 2])
+                next_x, next_y = x[following].mean(), y[following].mean()
+            else:
+                next_x, next_y = x[-1], y[-1]
+            areas = [
+                abs(
+                    (x[previous] - next_x) * (y[i] - y[previous])
+                    - (x[previous] - x[i]) * (next_y - y[previous])
+                )
+                for i in range(start, end)
+            ]
+            previous = start + int(np.argmax(areas))
+            selected.append(previous)
+        return selected + [n - 1]
+
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.uniform(0.5, 1.5, 500))
+    y = np.cumsum(rng.normal(size=500))
+    assert lttb_indices(x, y, 40).tolist() == reference(x, y, 40)
+
+
+def test_lttb_skips_missing_values():
+    x, y = lttb([1, 2, 3, 4], [1.0, np.nan, 3.0, 4.0], 10)
+    assert x == [1, 3, 4]
+    assert y == [1.0, 3.0, 4.0]
+
+
+class StubDatabase:
+    """Rows of the data and forecast tables, filtered like the SQL range."""
+
+    def __init__(self, data_rows, forecasting_rows):
+        self.data_rows = data_rows
+        self.forecasting_rows = forecasting_rows
+        self.read = 0
+
+    def iter_rows(self, rows, start_date, end_date):
+        for row in sorted(rows, key=lambda row: row[0], reverse=True):
+            if start_date is not None and row[0] < start_date:
+                continue
+            if end_date is not None and row[0] > end_date:
+                continue
+            self.read += 1
+            yield row
+
+    def iter_data_points(self, ds_id, start_date=None, end_date=None, *args):
+        return self.iter_rows(self.data_rows, start_date, end_date)
+
+    def iter_forecasting_data(self, ds_id, start_date=None, end_date=None, *args):
+        return self.iter_rows(self.forecasting_rows, start_date, end_date)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    days = [START + timedelta(days=day) for day in range(100)]
+    database = StubDatabase(
+        [(ts, float(day)) for day, ts in enumerate(days)],
+        [(ts, "drift", day + 0.5) for day, ts in enumerate(days[90:], 90)]
+        + [(days[-1] + timedelta(days=1), "drift", 100.5)],
+    )
+    monkeypatch.setattr(Config, "database", database, raising=False)
+    return database
+
+
+def epoch_ms(ts: datetime) -> int:
+    return int((ts - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def test_chart_series_within_the_date_range(database):
+    start, end = START + timedelta(days=10), START + timedelta(days=19)
+    payload = build_chart_payload(iter_chart_rows(1, start, end), 2000)
+
+    assert payload["max_points"] == 2000
+    assert set(payload["series"]) == {"value"}
+    assert payload["series"]["value"]["values"] == list(np.arange(10.0, 20.0))
+    assert payload["series"]["value"]["ts"][0] == epoch_ms(start)
+    assert database.read == 10
+
+
+def test_chart_series_of_the_latest_timestamps(database):
+    payload = build_chart_payload(iter_chart_rows(1, None, None, "5"), 2000)
+
+    # The forecast extends one day past the data points
+    assert payload["series"]["value"]["values"] == [96.0, 97.0, 98.0, 99.0]
+    assert payload["series"]["Drift"]["values"] == [96.5, 97.5, 98.5, 99.5, 100.5]
+    # Reading stopped after the latest timestamps (plus the merge lookahead)
+    assert database.read < 15
+
+
+def test_chart_series_are_downsampled(database):
+    payload = build_chart_payload(iter_chart_rows(1, None, None), 10)
+    assert len(payload["series"]["value"]["ts"]) == 10
+    assert payload["series"]["value"]["values"][0] == 0.0
+    assert payload["series"]["value"]["values"][-1] == 99.0
+
+
+def test_chart_series_without_data(database):
+    start = START + timedelta(days=500)
+    payload = build_chart_payload(iter_chart_rows(1, start, None), 10)
+    assert payload["series"] == {"value": {"ts": [], "values": []}}
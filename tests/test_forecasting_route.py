@@ -0,0 +1,118 @@
+from threading import Thread
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+import forecasting.baselines  # noqa: F401  (registers the baseline strategies)
+import routes.forecasting
+from config import Config
+from constants import BASE_PATH
+from forecasting.models import ForecastContext
+from redis_memory import RedisHandler
+from structs.enums import ForecastModel
+from structs.enums import PeriodType
+
+DATASOURCE_ID = 1
+
+
+class StubRedis(dict):
+    def set(self, key, value, **kwargs):
+        self[key] = value.encode()
+
+
+class StubRedisHandler:
+    def __init__(self):
+        self.r_db = StubRedis()
+
+    def get_data_version(self, datasource_id):
+        return 0
+
+
+class StubDataSources:
+    def __init__(self, datasource):
+        self.datasource = datasource
+
+    def get(self, datasource_id):
+        return {"id": datasource_id}
+
+    def get_model(self, datasource_id):
+        return self.datasource
+
+
+class StubDatabase:
+    def __init__(self):
+        self.df = pd.DataFrame(
+            {
+                "ts": pd.date_range("2024-01-01", periods=60, freq="1D"),
+                "value": 10 + np.arange(60, dtype=float) % 7,
+            }
+        )
+        self.inserted = []
+        self.cursor = None
+
+    def get_latest_data_points(self, datasource_id, rows):
+        return self.df.tail(rows).reset_index(drop=True)
+
+    def insert_forecasting_dataframe(self, df, datasource_id, algorithm):
+        for index, row in enumerate(df.to_dict(orient="records")):
+            self.inserted.append((algorithm, row["ts"]))
+            yield index, len(df)
+
+
+class InlineThread(Thread):
+    """Run the insertion before the response, so that it can be checked."""
+
+    def start(self):
+        self.run()
+
+
+@pytest.fixture
+def forecast(monkeypatch):
+    redis_handler = StubRedisHandler()
+    database = StubDatabase()
+    monkeypatch.setattr(RedisHandler, "shared", classmethod(lambda cls: redis_handler))
+    monkeypatch.setattr(Config, "redis_handler", redis_handler, raising=False)
+    monkeypatch.setattr(Config, "database", database, raising=False)
+    monkeypatch.setattr(routes.forecasting, "Thread", InlineThread)
+
+    app = Flask(__name__)
+    app.register_blueprint(routes.forecasting.bp)
+    client = app.test_client()
+
+    def request_forecast(trained: bool):
+        datasource = SimpleNamespace(
+            trained=trained,
+            initialized=True,
+            datasource_info=SimpleNamespace(
+                period=SimpleNamespace(type=PeriodType.DAY, value=1)
+            ),
+            training=SimpleNamespace(models=[ForecastModel.DRIFT]),
+        )
+        monkeypatch.setattr(
+            Config, "data_sources", StubDataSources(datasource), raising=False
+        )
+        response = client.get(
+            f"{BASE_PATH}/datasources/{DATASOURCE_ID}/forecasting",
+            query_string={"date": "2024-03-01", "steps": 5},
+        )
+        assert response.status_code == 200
+        return database.inserted
+
+    return request_forecast
+
+
+def test_cold_start_forecast_is_not_stored(forecast):
+    assert forecast(trained=False) == []
+
+
+def test_trained_forecast_is_stored(forecast):
+    ForecastContext(ForecastModel.DRIFT, DATASOURCE_ID).train(
+        Config.database.df.copy(), "1D"
+    )
+
+    inserted = forecast(trained=True)
+
+    assert [algorithm for algorithm, _ in inserted] == [ForecastModel.DRIFT.value] * 5
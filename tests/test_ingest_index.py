@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from bloom import bloom_bitmap
+from config import Config
+from constants import INGEST_BLOOM_BITS
+from constants import INGEST_BLOOM_HASHES
+from redis_ingest import IngestIndex
+from routes.datapoints import find_possible_duplicates
+
+DATASOURCE_ID = 1
+
+# Hourly epoch seconds from 2024-01-01
+STORED = 1704067200 + 3600 * np.arange(500, dtype=np.int64)
+
+
+class StubRedis(dict):
+    """Bloom filter storage, counting the commands sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.commands = 0
+
+    def register_script(self, script):
+        return lambda keys, args: None
+
+    def get(self, key):
+        self.commands += 1
+        return super().get(key)
+
+
+def test_may_contain_fetches_the_filter_once():
+    r_db = StubRedis()
+    index = IngestIndex(r_db)
+    _, bloom_key = index.keys(DATASOURCE_ID)
+    r_db[bloom_key] = bloom_bitmap(STORED, INGEST_BLOOM_BITS, INGEST_BLOOM_HASHES)
+
+    absent = STORED[-1] + 60 * np.arange(1, 501, dtype=np.int64)
+    possible = index.may_contain(DATASOURCE_ID, np.concatenate([STORED, absent]))
+
+    assert r_db.commands == 1
+    assert possible[: len(STORED)].all()
+    assert possible[len(STORED) :].mean() < 0.05
+
+
+def test_may_contain_without_a_filter():
+    index = IngestIndex(StubRedis())
+    assert not index.may_contain(DATASOURCE_ID, STORED).any()
+
+
+class StubIngestIndex:
+    def __init__(self, loading_elsewhere=False):
+        self.loading_elsewhere = loading_elsewhere
+        self.index = None
+        self.calls = []
+
+    def get(self, datasource_id):
+        return self.index
+
+    def begin_load(self, datasource_id):
+        self.calls.append("begin_load")
+        return not self.loading_elsewhere
+
+    def load(self, datasource_id, timestamps, floor):
+        self.calls.append("load")
+        self.index = {"watermark": timestamps.max(), "floor": floor, "count": 0}
+
+    def may_contain(self, datasource_id, timestamps):
+        return np.isin(timestamps, STORED)
+
+
+class StubRedisHandler:
+    def __init__(self, ingest_index):
+        self.ingest_index = ingest_index
+
+
+class StubDatabase:
+    def __init__(self, ingest_index):
+        self.ingest_index = ingest_index
+
+    def get_head_timestamps(self, datasource_id, rows):
+        self.ingest_index.calls.append("read_head")
+        return STORED.astype("datetime64[s]")
+
+
+@pytest.fixture
+def ingest_index(monkeypatch):
+    def make(**kwargs):
+        index = StubIngestIndex(**kwargs)
+        monkeypatch.setattr(
+            Config, "redis_handler", StubRedisHandler(index), raising=False
+        )
+        monkeypatch.setattr(Config, "database", StubDatabase(index), raising=False)
+        return index
+
+    return make
+
+
+def test_index_is_marked_loading_before_the_head_is_read(ingest_index):
+    index = ingest_index()
+    timestamps = np.array([STORED[10], STORED[-1] + 3600, STORED[-1] + 1800])
+
+    possible = find_possible_duplicates(DATASOURCE_ID, timestamps)
+
+    assert index.calls == ["begin_load", "read_head", "load"]
+    assert possible.tolist() == [True, False, False]
+
+
+def test_timestamps_are_checked_while_another_request_loads(ingest_index):
+    index = ingest_index(loading_elsewhere=True)
+    timestamps = np.array([STORED[10], STORED[-1] + 3600])
+
+    possible = find_possible_duplicates(DATASOURCE_ID, timestamps)
+
+    # Beyond the head read elsewhere is not proof of being new
+    assert index.calls == ["begin_load"]
+    assert possible.tolist() == [True, True]
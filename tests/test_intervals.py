@@ -0,0 +1,142 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.arima_process import arma2ma
+
+from forecasting.intervals import analytic_quantiles
+from forecasting.intervals import ar_psi_weights
+from forecasting.intervals import bootstrap_quantiles
+from forecasting.intervals import holt_winters_psi_weights
+from forecasting.intervals import quantile_label
+from routes.forecasting import format_forecast
+from structs.enums import ForecastModel
+
+Z90 = NormalDist().inv_cdf(0.9)
+
+
+def test_quantile_label():
+    assert [quantile_label(q) for q in (0.1, 0.5, 0.9, 0.025)] == [
+        "p10",
+        "p50",
+        "p90",
+        "p2.5",
+    ]
+
+
+def test_ar1_psi_weights_are_powers_of_the_coefficient():
+    np.testing.assert_allclose(ar_psi_weights([0.7], 10), 0.7 ** np.arange(10))
+
+
+def test_ar_psi_weights_match_statsmodels():
+    coefficients = [0.5, -0.3, 0.2]
+    expected = arma2ma(np.r_[1, -np.array(coefficients)], [1], lags=15)
+    np.testing.assert_allclose(ar_psi_weights(coefficients, 15), expected)
+
+
+def simulate_holt_winters(alpha, beta, gamma, season, steps, paths, seed=0):
+    """
+    Simulate additive Holt-Winters paths with unit variance errors from a known
+    state, following the recursions of statsmodels.
+    """
+    rng = np.random.default_rng(seed)
+    level = np.full(paths, 100.0)
+    trend = np.full(paths, 1.0)
+    seasons = [np.full(paths, value) for value in season]
+    values = np.empty((paths, steps))
+    for h in range(steps):
+        last_season = seasons[h % len(season)]
+        fitted = level + trend + last_season
+        values[:, h] = fitted + rng.normal(0, 1, paths)
+        new_level = alpha * (values[:, h] - last_season) + (1 - alpha) * (
+            level + trend
+        )
+        seasons[h % len(season)] = (
+            gamma * (values[:, h] - level - trend) + (1 - gamma) * last_season
+        )
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return values
+
+
+def test_holt_winters_variance_matches_simulated_paths():
+    alpha, beta, gamma, season, steps = 0.3, 0.2, 0.2, [5.0, -2.0, 0.0, -3.0], 24
+    paths = simulate_holt_winters(alpha, beta, gamma, season, steps, 20000)
+
+    psi = holt_winters_psi_weights(alpha, beta, gamma, len(season), steps)
+    np.testing.assert_allclose(paths.var(axis=0), np.cumsum(psi**2), rtol=0.06)
+
+
+def test_analytic_interval_widths_follow_the_ar1_variance():
+    # Var(e_h) = sigma^2 * (1 - phi^(2h)) / (1 - phi^2) for an AR(1)
+    phi, sigma2, steps = 0.8, 4.0, 12
+    psi = ar_psi_weights([phi], steps)
+    variance = sigma2 * np.cumsum(psi**2)
+    horizon = np.arange(1, steps + 1)
+    np.testing.assert_allclose(
+        variance, sigma2 * (1 - phi ** (2 * horizon)) / (1 - phi**2)
+    )
+
+    point = np.linspace(100, 110, steps)
+    intervals = analytic_quantiles(point, variance, (0.1, 0.5, 0.9))
+    np.testing.assert_allclose(intervals["p50"], point)
+    np.testing.assert_allclose(
+        intervals["p90"] - intervals["p10"], 2 * Z90 * np.sqrt(variance)
+    )
+
+
+def test_bootstrap_widths_grow_like_a_random_walk():
+    residuals = np.random.default_rng(0).normal(0, 2, 5000)
+    steps = 10
+    intervals = bootstrap_quantiles(
+        np.zeros(steps), residuals, (0.1, 0.9), n_paths=20000, seed=1
+    )
+    expected = 2 * Z90 * 2 * np.sqrt(np.arange(1, steps + 1))
+    np.testing.assert_allclose(intervals["p90"] - intervals["p10"], expected, rtol=0.05)
+
+
+def test_bootstrap_propagates_shocks_through_the_psi_weights():
+    residuals = np.random.default_rng(0).normal(0, 1, 5000)
+    psi = ar_psi_weights([0.8], 8)
+    intervals = bootstrap_quantiles(
+        np.zeros(8), residuals, (0.1, 0.9), psi=psi, n_paths=20000, seed=1
+    )
+    expected = 2 * Z90 * np.sqrt(np.cumsum(psi**2))
+    np.testing.assert_allclose(intervals["p90"] - intervals["p10"], expected, rtol=0.05)
+
+
+def test_bootstrap_median_stays_on_biased_point_forecasts():
+    # Residuals of a fit that under-predicts by 3 on average
+    residuals = np.random.default_rng(0).normal(3, 1, 1000)
+    point = np.full(20, 180.0)
+    intervals = bootstrap_quantiles(point, residuals, (0.5,), seed=1)
+    np.testing.assert_allclose(intervals["p50"], point, atol=0.5)
+
+
+def test_format_forecast_sends_null_quantiles_for_the_history_rows():
+    result = pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=3, freq="D"),
+            "value": [5.0, 6.0, -1.0],
+            "p10": [np.nan, 4.0, -2.0],
+            "p90": [np.nan, 8.0, 1.0],
+        }
+    )
+    formatted = format_forecast(ForecastModel.DRIFT, result, 3, (0.1, 0.9))
+    assert formatted["values"] == [5.0, 6.0, 0]
+    assert formatted["quantiles"] == {"p10": [None, 4.0, 0], "p90": [None, 8.0, 1.0]}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_format_forecast_keeps_the_last_steps(columnar):
+    result = pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=4, freq="D"),
+            "value": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    formatted = format_forecast(ForecastModel.DRIFT, result, 2, (0.5,), columnar)
+    assert formatted["values"] == [3.0, 4.0]
+    assert formatted["quantiles"] == {}
+    assert len(formatted["dates"]) == 2
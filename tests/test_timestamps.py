@@ -0,0 +1,90 @@
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import pytest
+
+from timestamps import format_iso
+from timestamps import from_epoch
+from timestamps import normalize_datetime
+from timestamps import parse_datetime
+from timestamps import parse_timestamp
+from timestamps import to_epoch
+
+# 2024-01-02 03:04:05 UTC
+SECONDS = 1704164645
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2024-01-02T03:04:05",
+        "2024-01-02 03:04:05",
+        "2024-01-02T03:04:05Z",
+        "2024-01-02T05:04:05+02:00",
+        "2024-01-01T22:04:05-05:00",
+        "2024/01/02 03:04:05",
+    ],
+)
+def test_parse_timestamp(value):
+    assert parse_timestamp(value) == SECONDS
+
+
+def test_parse_date():
+    assert parse_timestamp("2024-01-02") == 1704153600
+    assert parse_timestamp("2024/01/02") == 1704153600
+
+
+def test_parse_timestamp_with_format():
+    assert parse_timestamp("02.01.2024 03:04:05", "%d.%m.%Y %H:%M:%S") == SECONDS
+    # Only the given format is accepted
+    assert parse_timestamp("2024-01-02T03:04:05", "%d.%m.%Y %H:%M:%S") is None
+
+
+@pytest.mark.parametrize("value", ["", "yesterday", "2024-13-01", None, 1704164645])
+def test_parse_invalid_timestamp(value):
+    assert parse_timestamp(value) is None
+
+
+def test_from_epoch():
+    assert from_epoch(SECONDS) == datetime(2024, 1, 2, 3, 4, 5)
+    assert from_epoch(0) == datetime(1970, 1, 1)
+
+
+def test_parse_datetime():
+    # Naive UTC, truncated to the second
+    assert parse_datetime("2024-01-02T05:04:05.987+02:00") == datetime(
+        2024, 1, 2, 3, 4, 5
+    )
+    assert parse_datetime("not a date") is None
+
+
+def test_normalize_datetime():
+    aware = datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=timezone(timedelta(hours=2)))
+    # The wall clock is kept, not converted to UTC
+    assert normalize_datetime(aware) == datetime(2024, 1, 2, 3, 4, 5)
+    assert normalize_datetime(date(2024, 1, 2)) == datetime(2024, 1, 2)
+
+
+def test_to_epoch():
+    timestamps = [datetime(2024, 1, 2, 3, 4, 5), datetime(1970, 1, 1)]
+    assert to_epoch(timestamps, "s").tolist() == [SECONDS, 0]
+    assert to_epoch(timestamps).tolist() == [SECONDS * 1000, 0]
+    assert to_epoch(timestamps).dtype == "int64"
+
+
+def test_to_epoch_takes_naive_values_as_utc():
+    aware = datetime(2024, 1, 2, 5, 4, 5, tzinfo=timezone(timedelta(hours=2)))
+    naive = datetime(2024, 1, 2, 3, 4, 5)
+    assert to_epoch([aware], "s").tolist() == to_epoch([naive], "s").tolist()
+
+
+def test_to_epoch_invalid_unit():
+    with pytest.raises(ValueError):
+        to_epoch([datetime(2024, 1, 2)], "us")
+
+
+def test_format_iso():
+    timestamps = [datetime(2024, 1, 2, 3, 4, 5, 678), datetime(1970, 1, 1)]
+    assert format_iso(timestamps) == ["2024-01-02T03:04:05Z", "1970-01-01T00:00:00Z"]
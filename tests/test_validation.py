@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from structs.models import DataPoint
+from structs.validation import validate_datapoints
+
+ITEMS = [
+    {"ts": "2024-01-01", "value": 1},
+    {"ts": "2024-01-01T10:20:30Z", "value": 2.5},
+    {"ts": "2024-01-01 10:20:30.123456+02:00", "value": 3},
+    {"ts": "2024-01-01T10:20", "value": 4},
+    {"ts": 1704067200, "value": 5},
+    {"ts": "2024-02-30", "value": 6},
+    {"ts": "01/02/2024", "value": 7},
+    {"ts": "2024-01-01", "value": "8"},
+    {"ts": "2024-01-01", "value": True},
+    {"ts": None, "value": 1},
+    {"value": 1},
+    {"ts": "2024-01-01"},
+    "not an object",
+]
+
+
+def model_result(item):
+    try:
+        datapoint = DataPoint(**item)
+        return datapoint.ts, datapoint.value
+    except ValidationError:
+        return None
+
+
+@pytest.mark.filterwarnings("error")
+def test_validate_datapoints_matches_the_model():
+    valid, invalid = validate_datapoints(ITEMS)
+
+    expected = {
+        index: model_result(item)
+        for index, item in enumerate(ITEMS)
+        if isinstance(item, dict)
+    }
+    accepted = {
+        row["index"]: (row["ts"].to_pydatetime(), row["value"])
+        for row in valid.to_dict(orient="records")
+    }
+    rejected = {error["index"] for error in invalid}
+
+    assert accepted == {
+        index: result for index, result in expected.items() if result is not None
+    }
+    assert rejected == {
+        index for index, item in enumerate(ITEMS) if expected.get(index) is None
+    }
+    assert accepted[1] == (datetime(2024, 1, 1, 10, 20, 30), 2.5)
+    # The wall clock of an offset is kept and fractions of seconds are dropped
+    assert accepted[2][0] == datetime(2024, 1, 1, 10, 20, 30)
+
+
+def test_validate_datapoints_reports_the_errors():
+    valid, invalid = validate_datapoints(["not an object", {"ts": "2024-01-01"}])
+    assert valid.empty
+    assert invalid[0] == {"index": 0, "error": "Input should be an object"}
+    assert invalid[1]["index"] == 1
+    assert "value" in invalid[1]["error"]
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize(
+    "items",
+    [
+        [],
+        [{"ts": 1, "value": 1}, {"ts": None, "value": 2}],
+        [{"ts": "2024-01-01", "value": 1}] * 3,
+    ],
+)
+def test_validate_datapoints_without_warnings(items):
+    valid, invalid = validate_datapoints(items)
+    assert len(valid) + len(invalid) == len(items)
+    assert pd.api.types.is_datetime64_any_dtype(valid["ts"]) or valid.empty